@@ -0,0 +1,11 @@
+import sys
+import time
+from pathlib import Path
+
+# Início do import da API (base do tempo de import medido em app/core/startup.py)
+IMPORT_STARTED = time.perf_counter()
+
+# Raiz do monorepo, para importar o pacote compartilhado `packages.core`
+REPO_ROOT = Path(__file__).resolve().parents[3]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.append(str(REPO_ROOT))
@@ -8,6 +8,45 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str = "HS256"
     CORS_ORIGINS: list[str] = ["http://localhost:3000", "http://127.0.0.1:3000"]
     LOG_SQL: bool = False
+    # URL pública da API, usada nas URLs de mídia (`{API_BASE_URL}/media/<sha256>`)
+    API_BASE_URL: str = "http://localhost:8000"
+    # Arquivos de mídia endereçados por conteúdo (SHA-256)
+    MEDIA_ROOT: str = "./media"
+    MEDIA_MAX_BYTES: int = 20 * 1024 * 1024
+    # Fila de jobs em background (tabela `jobs`, worker em scripts/run_jobs.py)
+    JOB_WORKERS: int = 2
+    JOB_POLL_SECONDS: float = 1.0
+    JOB_RETRY_BASE_SECONDS: float = 10.0
+    JOB_RETRY_MAX_SECONDS: float = 3600.0
+    # Job "running" sem conclusão depois disso é considerado perdido (worker morto) e volta à fila
+    JOB_LOCK_TIMEOUT_SECONDS: int = 1800
+    # Arquivos de entrada dos jobs (ex.: snapshot enviado para import em background)
+    JOB_FILES_ROOT: str = "./job_files"
+    # Tamanho máximo do snapshot enviado em POST /decks/import e do seu conteúdo descomprimido
+    DECK_IMPORT_MAX_BYTES: int = 200 * 1024 * 1024
+    DECK_IMPORT_MAX_DECOMPRESSED_BYTES: int = 2 * 1024 * 1024 * 1024
+    # Perfil por requisição: fração sorteada (0 = só com o header X-Profile) e token de admin
+    # (header X-Profile e GET /debug/profiles; sem token, /debug/profiles fica desligado)
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_ADMIN_TOKEN: str | None = None
+    PROFILE_BUFFER_SIZE: int = 50
+    PROFILE_TOP_FRAMES: int = 30
+    # Histogramas de /metrics: diretório compartilhado pelos workers para somar os números de todos
+    METRICS_DIR: str | None = None
+    METRICS_FLUSH_SECONDS: float = 1.0
+    # Aquecimento no startup (ORM, OpenAPI, pool, SQL compilado) antes de /ready responder 200
+    WARMUP_ON_STARTUP: bool = True
+    DB_POOL_WARM_CONNECTIONS: int = 2
+    # Stream SSE de contagens de revisão: recálculo máximo sem eventos (cobre revisões de outros workers),
+    # keepalive e o `retry` sugerido ao cliente para reconectar
+    DUE_STREAM_REFRESH_SECONDS: float = 300.0
+    DUE_STREAM_KEEPALIVE_SECONDS: float = 15.0
+    DUE_STREAM_RETRY_MS: int = 5000
+    # POST /cards/{id}/review: janela de group commit por usuário e rate limit (token bucket por usuário,
+    # por worker; taxa 0 desliga)
+    REVIEW_COALESCE_MS: float = 5.0
+    REVIEW_RATE_PER_SECOND: float = 10.0
+    REVIEW_RATE_BURST: int = 30
 
     @field_validator("CORS_ORIGINS", mode="before")
     @classmethod
@@ -0,0 +1,192 @@
+"""Histogramas de tempo por estágio das requisições, exportados em OpenMetrics (`GET /metrics`).
+
+`stage_timer("render_template")` mede um trecho e o registra no histograma de estágios com o nome do
+endpoint em que rodou (a rota da requisição corrente, via contextvar). O middleware mede o tempo total
+de cada endpoint. Os buckets são fixos e as observações são só um `bisect` e dois incrementos sob
+um lock, sem alocação.
+
+Com vários workers (uvicorn/gunicorn), cada processo grava seu snapshot em `METRICS_DIR/<pid>.json`
+(no máximo a cada `METRICS_FLUSH_SECONDS`) e `/metrics` soma os snapshots de todos os processos.
+Sem `METRICS_DIR`, os números são só do processo que respondeu.
+"""
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+# Segundos; cobre desde um render de template (sub-ms) até uma requisição lenta
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_scope: ContextVar[Scope | None] = ContextVar("metrics_scope", default=None)
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...]) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        # {valores dos labels: [contagem por bucket (não cumulativa, +Inf no fim), soma]}
+        self.series: dict[tuple[str, ...], list[Any]] = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(BUCKETS, value)
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [[0] * (len(BUCKETS) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+        _maybe_flush()
+
+    def snapshot(self) -> dict[str, Any]:
+        with self.lock:
+            return {"\x1f".join(labels): [list(counts), total] for labels, (counts, total) in self.series.items()}
+
+
+stage_seconds = Histogram(
+    "nihon_flash_stage_seconds", "Duração dos estágios internos por endpoint", ("endpoint", "stage")
+)
+request_seconds = Histogram("nihon_flash_request_seconds", "Duração das requisições por endpoint", ("endpoint", "method"))
+HISTOGRAMS = (stage_seconds, request_seconds)
+
+
+def _endpoint_name(scope: Scope | None) -> str:
+    if scope is None:
+        return "background"
+    route = scope.get("route")
+    return route.name if route is not None else "unmatched"
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_seconds.observe(time.perf_counter() - start, _endpoint_name(_scope.get()), stage)
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _scope.set(scope)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _scope.reset(token)
+            # O roteador grava a rota no próprio scope; 404 fica como "unmatched"
+            request_seconds.observe(time.perf_counter() - start, _endpoint_name(scope), scope["method"])
+
+
+# Agregação entre processos ----------------------------------------------------------------------
+
+_last_flush = 0.0
+_flush_lock = threading.Lock()
+
+
+def _snapshot() -> dict[str, Any]:
+    return {histogram.name: histogram.snapshot() for histogram in HISTOGRAMS}
+
+
+def flush() -> None:
+    """Grava o snapshot deste processo em `METRICS_DIR/<pid>.json` (troca atômica do arquivo)."""
+    if not settings.METRICS_DIR:
+        return
+    directory = Path(settings.METRICS_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    target = directory / f"{os.getpid()}.json"
+    temporary = target.with_suffix(".tmp")
+    temporary.write_text(json.dumps(_snapshot()))
+    os.replace(temporary, target)
+
+
+def _maybe_flush() -> None:
+    global _last_flush
+    if not settings.METRICS_DIR:
+        return
+    now = time.monotonic()
+    if now - _last_flush < settings.METRICS_FLUSH_SECONDS or not _flush_lock.acquire(blocking=False):
+        return
+    try:
+        _last_flush = now
+        flush()
+    finally:
+        _flush_lock.release()
+
+
+def _merge(into: dict[str, Any], snapshot: dict[str, Any]) -> None:
+    for name, series in snapshot.items():
+        target = into.setdefault(name, {})
+        for labels, (counts, total) in series.items():
+            current = target.get(labels)
+            if current is None:
+                target[labels] = [list(counts), total]
+            else:
+                current[0] = [a + b for a, b in zip(current[0], counts)]
+                current[1] += total
+
+
+def collect() -> dict[str, Any]:
+    """Snapshot deste processo somado aos dos demais workers (quando há `METRICS_DIR`)."""
+    merged: dict[str, Any] = {}
+    _merge(merged, _snapshot())
+    if settings.METRICS_DIR:
+        own = f"{os.getpid()}.json"
+        for path in Path(settings.METRICS_DIR).glob("*.json"):
+            if path.name == own:
+                continue
+            try:
+                _merge(merged, json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue
+    return merged
+
+
+def _format_labels(names: tuple[str, ...], values: list[str], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_openmetrics() -> str:
+    merged = collect()
+    lines: list[str] = []
+    for histogram in HISTOGRAMS:
+        lines.append(f"# TYPE {histogram.name} histogram")
+        lines.append(f"# HELP {histogram.name} {histogram.documentation}")
+        for key, (counts, total) in sorted(merged.get(histogram.name, {}).items()):
+            values = [_escape(value) for value in key.split("\x1f")]
+            cumulative = 0
+            for bound, count in zip((*BUCKETS, "+Inf"), counts):
+                cumulative += count
+                labels = _format_labels(histogram.labelnames, values, f'le="{bound}"')
+                lines.append(f"{histogram.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(histogram.labelnames, values)
+            lines.append(f"{histogram.name}_count{labels} {cumulative}")
+            lines.append(f"{histogram.name}_sum{labels} {total:.6f}")
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,171 @@
+"""Perfil opcional por requisição (cProfile + tempos de SQL), guardado num ring buffer em memória.
+
+Uma requisição é perfilada quando sorteada por `PROFILE_SAMPLE_RATE` ou quando traz o header
+`X-Profile` com o `PROFILE_ADMIN_TOKEN`. O FastAPI roda endpoints e dependências síncronas no
+threadpool, e o cProfile só enxerga a thread em que foi ligado: por isso cada chamada ao threadpool
+de uma requisição perfilada roda sob um cProfile próprio, somado ao perfil da requisição no fim.
+As consultas SQL são cronometradas pelos eventos do engine. Código assíncrono no event loop não entra
+no perfil (só no tempo total).
+
+Os últimos `PROFILE_BUFFER_SIZE` perfis ficam em `GET /debug/profiles` (mesmo token).
+"""
+
+import cProfile
+import pstats
+import random
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+from itertools import count
+from typing import Any
+
+import fastapi.dependencies.utils
+import fastapi.routing
+from sqlalchemy import event
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.database import engine
+
+PROFILE_HEADER = "x-profile"
+SQL_STATEMENT_CHARS = 200
+
+_current: ContextVar["RequestProfile | None"] = ContextVar("request_profile", default=None)
+_ids = count(1)
+profiles: deque[dict[str, Any]] = deque(maxlen=settings.PROFILE_BUFFER_SIZE)
+
+
+class RequestProfile:
+    def __init__(self) -> None:
+        self.stats: pstats.Stats | None = None
+        self.sql: dict[str, list[float]] = {}
+        self.lock = threading.Lock()
+
+    def run(self, func, *args, **kwargs):
+        """Executa `func` (já na thread do threadpool) sob um cProfile e soma o resultado."""
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.disable()
+            with self.lock:
+                if self.stats is None:
+                    self.stats = pstats.Stats(profiler)
+                else:
+                    self.stats.add(profiler)
+
+    def add_sql(self, statement: str, seconds: float) -> None:
+        with self.lock:
+            timing = self.sql.setdefault(statement[:SQL_STATEMENT_CHARS], [0, 0.0])
+            timing[0] += 1
+            timing[1] += seconds
+
+    def top_frames(self, limit: int) -> list[dict[str, Any]]:
+        if self.stats is None:
+            return []
+        rows = []
+        for (file_name, line, function), (_, calls, total, cumulative, _) in self.stats.stats.items():
+            rows.append(
+                {
+                    "function": f"{file_name}:{line}({function})",
+                    "calls": calls,
+                    "self_ms": round(total * 1000, 3),
+                    "cumulative_ms": round(cumulative * 1000, 3),
+                }
+            )
+        rows.sort(key=lambda row: row["self_ms"], reverse=True)
+        return rows[:limit]
+
+    def sql_summary(self, limit: int) -> dict[str, Any]:
+        statements = [
+            {"statement": statement, "count": int(calls), "total_ms": round(seconds * 1000, 3)}
+            for statement, (calls, seconds) in self.sql.items()
+        ]
+        statements.sort(key=lambda row: row["total_ms"], reverse=True)
+        return {
+            "count": sum(row["count"] for row in statements),
+            "total_ms": round(sum(row["total_ms"] for row in statements), 3),
+            "statements": statements[:limit],
+        }
+
+
+def _should_profile(scope: Scope) -> bool:
+    if scope["path"].startswith("/debug/"):
+        return False
+    token = settings.PROFILE_ADMIN_TOKEN
+    if token:
+        for name, value in scope.get("headers", []):
+            if name == PROFILE_HEADER.encode() and value.decode("latin-1") == token:
+                return True
+    return settings.PROFILE_SAMPLE_RATE > 0 and random.random() < settings.PROFILE_SAMPLE_RATE
+
+
+class ProfilingMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not _should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started_at = datetime.utcnow()
+        start = time.perf_counter()
+        token = _current.set(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            profiles.append(
+                {
+                    "id": next(_ids),
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "query": scope.get("query_string", b"").decode("latin-1"),
+                    "status": status_code,
+                    "started_at": started_at.isoformat(),
+                    "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+                    "sql": profile.sql_summary(settings.PROFILE_TOP_FRAMES),
+                    "frames": profile.top_frames(settings.PROFILE_TOP_FRAMES),
+                }
+            )
+
+
+async def _profiled_run_in_threadpool(func, *args, **kwargs):
+    profile = _current.get()
+    if profile is None:
+        return await run_in_threadpool(func, *args, **kwargs)
+    return await run_in_threadpool(profile.run, func, *args, **kwargs)
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _current.get() is not None:
+        conn.info.setdefault("profile_query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    profile = _current.get()
+    starts = conn.info.get("profile_query_start")
+    if profile is not None and starts:
+        profile.add_sql(statement, time.perf_counter() - starts.pop())
+
+
+def install_profiling() -> None:
+    """Faz o threadpool do FastAPI (endpoints e dependências síncronas) rodar sob o perfil da requisição."""
+    fastapi.routing.run_in_threadpool = _profiled_run_in_threadpool
+    fastapi.dependencies.utils.run_in_threadpool = _profiled_run_in_threadpool
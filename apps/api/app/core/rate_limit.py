@@ -0,0 +1,58 @@
+"""Rate limit por chave (ex.: usuário) com token bucket em memória, por processo.
+
+Cada chave tem um balde de `burst` fichas que se recarrega a `rate` fichas por segundo; uma
+requisição consome uma ficha. Com vários workers o limite efetivo é por worker.
+"""
+
+import math
+import threading
+import time
+
+from fastapi import HTTPException, status
+
+# Acima disso, baldes já cheios (chaves ociosas) são descartados
+MAX_IDLE_BUCKETS = 10_000
+
+
+class TokenBucketLimiter:
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        # {chave: (fichas, instante da última atualização)}
+        self.buckets: dict[object, tuple[float, float]] = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, key: object) -> float:
+        """Consome uma ficha de `key`; devolve 0 se permitido ou os segundos até haver ficha."""
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        with self.lock:
+            tokens, updated = self.buckets.get(key, (float(self.burst), now))
+            tokens = min(float(self.burst), tokens + (now - updated) * self.rate)
+            if tokens < 1:
+                self.buckets[key] = (tokens, now)
+                return (1 - tokens) / self.rate
+            self.buckets[key] = (tokens - 1, now)
+            if len(self.buckets) > MAX_IDLE_BUCKETS:
+                self._prune(now)
+        return 0.0
+
+    def check(self, key: object) -> None:
+        """Como `acquire`, mas responde 429 com `Retry-After` quando o balde está vazio."""
+        retry_after = self.acquire(key)
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+    def _prune(self, now: float) -> None:
+        full = [
+            key
+            for key, (tokens, updated) in self.buckets.items()
+            if tokens + (now - updated) * self.rate >= self.burst
+        ]
+        for key in full:
+            del self.buckets[key]
@@ -0,0 +1,128 @@
+"""Aquecimento da API no startup e estado de prontidão (`GET /ready`).
+
+O lifespan dispara `warmup` numa thread logo que o processo sobe: `/health` (liveness) responde na
+hora e `/ready` só fica 200 quando o aquecimento termina, para o balanceador mandar tráfego a um
+worker novo só depois que a primeira requisição deixou de pagar os custos de inicialização:
+
+- configuração dos mappers do ORM (senão feita na primeira consulta);
+- schema OpenAPI (gerado no primeiro acesso a `/docs`/`/openapi.json`);
+- conexões do pool abertas de antemão;
+- cache de SQL compilado do SQLAlchemy com as consultas quentes, geradas pelos mesmos construtores
+  das rotas de estudo (fila de novos e de revisão, carga dos cards escolhidos, contagens de revisão).
+
+Cada etapa é cronometrada; o resultado aparece em `/ready` junto com o tempo de import do pacote.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any
+
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.orm import configure_mappers
+
+import app as app_package
+from app.core.config import settings
+from app.core.database import SessionLocal, engine
+from app.models import Deck
+from app.services.study import (
+    load_study_cards,
+    load_study_progress,
+    review_stats,
+    select_new_cards,
+    select_reviews,
+)
+
+logger = logging.getLogger(__name__)
+
+# Id que não existe em nenhuma tabela (autoincremento começa em 1)
+WARMUP_ID = 0
+
+
+class StartupState:
+    def __init__(self) -> None:
+        self.status = "starting"
+        self.import_seconds: float | None = None
+        self.steps: dict[str, float] = {}
+        self.error: str | None = None
+        self.ready_at: datetime | None = None
+        self.lock = threading.Lock()
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "status": self.status,
+            "import_seconds": self.import_seconds,
+            "warmup_seconds": {name: round(seconds, 4) for name, seconds in self.steps.items()},
+            "ready_at": self.ready_at.isoformat() if self.ready_at else None,
+            "error": self.error,
+        }
+
+
+state = StartupState()
+
+
+def record_import_time() -> None:
+    """Chamado ao fim do import de `app.main`: mede desde o import do pacote `app`."""
+    state.import_seconds = round(time.perf_counter() - app_package.IMPORT_STARTED, 4)
+
+
+def _warm_pool() -> None:
+    # Abre as conexões ao mesmo tempo (senão o pool devolveria sempre a mesma)
+    connections = []
+    try:
+        for _ in range(max(1, settings.DB_POOL_WARM_CONNECTIONS)):
+            connection = engine.connect()
+            connection.execute(text("SELECT 1"))
+            connections.append(connection)
+    finally:
+        for connection in connections:
+            connection.close()
+
+
+def _warm_queries() -> None:
+    # Roda os mesmos construtores das rotas de estudo com ids inexistentes: o SQL compilado fica no
+    # cache (que é por formato da consulta, não pelos valores) sem trazer linhas. Um deck comum e um
+    # fork, porque o filtro das notas muda de forma
+    with SessionLocal() as db:
+        db.get(Deck, WARMUP_ID)
+        for deck in (Deck(id=WARMUP_ID), Deck(id=WARMUP_ID, source_deck_id=WARMUP_ID)):
+            select_new_cards(db, WARMUP_ID, deck, 1)
+            select_reviews(db, WARMUP_ID, deck, 1)
+            review_stats(db, WARMUP_ID, deck)
+        load_study_cards(db, [WARMUP_ID])
+        load_study_progress(db, WARMUP_ID, [WARMUP_ID])
+
+
+def warmup(app: FastAPI) -> None:
+    steps = (
+        ("orm_mappers", configure_mappers),
+        ("openapi_schema", app.openapi),
+        ("db_pool", _warm_pool),
+        ("sql_cache", _warm_queries),
+    )
+    try:
+        for name, step in steps:
+            start = time.perf_counter()
+            step()
+            state.steps[name] = time.perf_counter() - start
+    except Exception as exc:  # noqa: BLE001 - o erro vai para /ready
+        logger.exception("Startup warmup failed")
+        with state.lock:
+            state.status = "failed"
+            state.error = repr(exc)
+        return
+    with state.lock:
+        state.status = "ready"
+        state.ready_at = datetime.utcnow()
+    logger.info("API ready: %s", state.as_dict())
+
+
+def check_database() -> bool:
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    except Exception:  # noqa: BLE001
+        return False
+    return True
@@ -1,11 +1,38 @@
-from fastapi import Depends, FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.security import get_current_user
 from app.core.config import settings
-from app.routers import auth, decks, note_types, notes, study
+from app.core.metrics import OPENMETRICS_CONTENT_TYPE, MetricsMiddleware, render_openmetrics
+from app.core.profiling import ProfilingMiddleware, install_profiling
+from app.core.startup import check_database, record_import_time, state as startup_state, warmup
+from app.routers import auth, debug, decks, jobs, media, note_types, notes, study, sync
+from app.services.due_stream import hub as due_stream_hub
+from app.services.images import shutdown_pool
+from app.services.pagination import NEXT_CURSOR_HEADER
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # O aquecimento roda em paralelo: /health responde já e /ready só depois dele
+    warming = None
+    if settings.WARMUP_ON_STARTUP:
+        warming = asyncio.create_task(run_in_threadpool(warmup, app))
+    else:
+        startup_state.status = "ready"
+    yield
+    if warming is not None and not warming.done():
+        warming.cancel()
+    await due_stream_hub.close()
+    shutdown_pool()
 
-app = FastAPI(title="Nihon Flash API")
+
+app = FastAPI(title="Nihon Flash API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -13,7 +40,11 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
+install_profiling()
 
 
 @app.get("/health")
@@ -21,8 +52,31 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/ready")
+def ready():
+    """Prontidão para tráfego: aquecimento concluído e banco acessível (503 até lá)."""
+    body = startup_state.as_dict()
+    if startup_state.status != "ready" or not check_database():
+        if startup_state.status == "ready":
+            body["status"] = "database_unavailable"
+        return JSONResponse(body, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+    return body
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(render_openmetrics(), media_type=OPENMETRICS_CONTENT_TYPE)
+
+
 app.include_router(auth.router)
 app.include_router(decks.router, dependencies=[Depends(get_current_user)])
 app.include_router(note_types.router, dependencies=[Depends(get_current_user)])
 app.include_router(notes.router, dependencies=[Depends(get_current_user)])
 app.include_router(study.router, dependencies=[Depends(get_current_user)])
+app.include_router(sync.router, dependencies=[Depends(get_current_user)])
+app.include_router(media.router, dependencies=[Depends(get_current_user)])
+app.include_router(jobs.router, dependencies=[Depends(get_current_user)])
+app.include_router(media.public_router)
+app.include_router(debug.router)
+
+record_import_time()
@@ -2,9 +2,16 @@ from app.models.user import User
 from app.models.deck import Deck
 from app.models.card import Card
 from app.models.note import Note, NoteType, NoteField, CardTemplate, MediaAsset, NoteFieldValue
-from app.models.enums import CardStatus, NoteFieldType, MediaType, LearningStage
+from app.models.enums import CardStatus, NoteFieldType, MediaType, LearningStage, JobStatus
 from app.models.user_card_progress import UserCardProgress
 from app.models.card_review_log import CardReviewLog
+from app.models.study_session import StudySession
+from app.models.user_deck_state import UserDeckState
+from app.models.user_srs_params import UserSrsParams
+from app.models.due_load_bucket import DueLoadBucket
+from app.models.sync import SyncSequence
+from app.models.note_search_index import NoteSearchIndex
+from app.models.job import Job
 
 __all__ = [
     "User",
@@ -18,8 +25,16 @@ __all__ = [
     "NoteFieldValue",
     "UserCardProgress",
     "CardReviewLog",
+    "StudySession",
+    "UserDeckState",
+    "UserSrsParams",
+    "DueLoadBucket",
+    "SyncSequence",
+    "NoteSearchIndex",
+    "Job",
     "CardStatus",
     "NoteFieldType",
     "MediaType",
     "LearningStage",
+    "JobStatus",
 ]
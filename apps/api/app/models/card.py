@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, Enum, Float, ForeignKey, Integer, Text, text
+from sqlalchemy import BigInteger, Column, DateTime, Enum, Float, ForeignKey, Integer, String, Text, text
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
@@ -22,6 +22,9 @@ class Card(Base):
     last_reviewed_at = Column(DateTime(timezone=True), nullable=True)
     lapses = Column(Integer, nullable=False, server_default="0")
     reps = Column(Integer, nullable=False, server_default="0")
+    # Frente renderizada e truncada, mantida em escrita para listagens/busca sem renderizar
+    preview = Column(String(120), nullable=True)
+    updated_seq = Column(BigInteger, nullable=False, server_default="0", index=True)
 
     note = relationship("Note", back_populates="cards")
     template = relationship("CardTemplate", back_populates="cards")
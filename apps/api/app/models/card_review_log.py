@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Boolean, Column, DateTime, Enum, Float, ForeignKey, Integer
+from sqlalchemy import Boolean, Column, DateTime, Enum, Float, ForeignKey, Index, Integer
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
@@ -9,6 +9,7 @@ from app.models.enums import CardStatus, LearningStage
 
 class CardReviewLog(Base):
     __tablename__ = "card_review_log"
+    __table_args__ = (Index("ix_card_review_log_user_card_created", "user_id", "card_id", "created_at"),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
@@ -19,8 +19,17 @@ class Deck(Base):
     is_public = Column(Boolean, nullable=False, server_default=text("0"))
     tags = Column(JSON, nullable=False, server_default=text("'[]'"))
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    # Nome do algoritmo SRS registrado em packages.core.srs
+    srs_algorithm = Column(String(30), nullable=False, server_default=text("'stages'"))
+    # Espalha os vencimentos dentro de uma janela de tolerância, escolhendo a hora menos carregada
+    load_balance_due = Column(Boolean, nullable=False, server_default=text("0"))
+    # Índice dos sprites de áudio (ver app.services.sprites): {key, built_at, sprites, clips}
+    audio_sprites = Column(JSON, nullable=True)
+    # Fork copy-on-write (app.services.forks): notas da origem valem aqui até serem editadas
+    source_deck_id = Column(Integer, ForeignKey("decks.id", ondelete="SET NULL"), nullable=True, index=True)
 
     owner = relationship("User", back_populates="decks")
+    source_deck = relationship("Deck", remote_side=[id])
     note_types = relationship("NoteType", back_populates="deck", cascade="all, delete-orphan")
     notes = relationship("Note", back_populates="deck", cascade="all, delete-orphan")
     media_assets = relationship("MediaAsset", back_populates="deck", cascade="all, delete-orphan")
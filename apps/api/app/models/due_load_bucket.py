@@ -0,0 +1,15 @@
+from sqlalchemy import Column, ForeignKey, Integer
+
+from app.core.database import Base
+
+
+class DueLoadBucket(Base):
+    """Quantidade de cards do usuário que vencem em cada hora (histograma usado no balanceamento de carga)."""
+
+    __tablename__ = "due_load_buckets"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    deck_id = Column(Integer, ForeignKey("decks.id"), primary_key=True)
+    # Horas desde a época (UTC)
+    bucket = Column(Integer, primary_key=True)
+    count = Column(Integer, nullable=False, server_default="0")
@@ -28,3 +28,10 @@ class LearningStage(str, enum.Enum):
     consolidacao = "consolidacao"
     longo_prazo = "longo_prazo"
     memoria_estavel = "memoria_estavel"
+
+
+class JobStatus(str, enum.Enum):
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Enum, Float, ForeignKey, Index, Integer, JSON, String, Text, text
+
+from app.core.database import Base
+from app.models.enums import JobStatus
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+    # O worker busca o próximo job pronto por (status, run_after)
+    __table_args__ = (Index("ix_jobs_status_run_after", "status", "run_after"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(50), nullable=False)
+    status = Column(Enum(JobStatus), nullable=False, server_default=text("'queued'"))
+    payload = Column(JSON, nullable=False, server_default=text("'{}'"))
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    # 0..1, atualizado pelo próprio job durante a execução
+    progress = Column(Float, nullable=False, server_default="0")
+    progress_message = Column(String(255), nullable=True)
+    attempts = Column(Integer, nullable=False, server_default="0")
+    max_attempts = Column(Integer, nullable=False, server_default="3")
+    # Próxima execução permitida (backoff entre tentativas)
+    run_after = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+    locked_by = Column(String(100), nullable=True)
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True)
+    deck_id = Column(Integer, ForeignKey("decks.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
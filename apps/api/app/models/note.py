@@ -1,11 +1,13 @@
 from datetime import datetime
 
 from sqlalchemy import (
+    BigInteger,
     Boolean,
     Column,
     DateTime,
     Enum,
     ForeignKey,
+    Index,
     Integer,
     JSON,
     String,
@@ -68,6 +70,7 @@ class CardTemplate(Base):
 
 class MediaAsset(Base):
     __tablename__ = "media_assets"
+    __table_args__ = (Index("uq_media_assets_deck_sha256", "deck_id", "sha256", unique=True),)
 
     id = Column(Integer, primary_key=True, index=True)
     deck_id = Column(Integer, ForeignKey("decks.id"), nullable=False, index=True)
@@ -77,6 +80,8 @@ class MediaAsset(Base):
     attribution = Column(String(255), nullable=True)
     license = Column(String(100), nullable=True)
     metadata_json = Column("metadata", JSON, nullable=False, server_default=text("'{}'"))
+    # Conteúdo em MEDIA_ROOT endereçado por SHA-256 (app.services.media); nulo em assets antigos só com URL
+    sha256 = Column(String(64), nullable=True, index=True)
 
     deck = relationship("Deck", back_populates="media_assets")
     field_values = relationship("NoteFieldValue", back_populates="media_asset")
@@ -84,13 +89,22 @@ class MediaAsset(Base):
 
 class Note(Base):
     __tablename__ = "notes"
+    __table_args__ = (
+        Index("uq_notes_deck_content_hash", "deck_id", "content_hash", unique=True),
+        Index("uq_notes_deck_origin", "deck_id", "origin_note_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     deck_id = Column(Integer, ForeignKey("decks.id"), nullable=False, index=True)
     note_type_id = Column(Integer, ForeignKey("note_types.id"), nullable=False, index=True)
     tags = Column(JSON, nullable=False, server_default=text("'[]'"))
+    # Hash do sort field normalizado (app.services.notes.note_content_hash); único por deck
+    content_hash = Column(String(32), nullable=True)
+    # Num fork, a nota da origem que esta cópia substitui (materializada na primeira edição)
+    origin_note_id = Column(Integer, ForeignKey("notes.id", ondelete="SET NULL"), nullable=True)
     created_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow, server_default=func.now())
+    updated_seq = Column(BigInteger, nullable=False, server_default="0", index=True)
 
     deck = relationship("Deck", back_populates="notes")
     note_type = relationship("NoteType", back_populates="notes")
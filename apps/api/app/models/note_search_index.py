@@ -0,0 +1,13 @@
+from sqlalchemy import Column, ForeignKey, Integer, Text
+
+from app.core.database import Base
+
+
+class NoteSearchIndex(Base):
+    __tablename__ = "note_search_index"
+
+    note_id = Column(Integer, ForeignKey("notes.id", ondelete="CASCADE"), primary_key=True)
+    deck_id = Column(Integer, ForeignKey("decks.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Textos dos campos já normalizados (minúsculas, katakana -> hiragana, romaji), um por linha.
+    # No Postgres há um índice GIN pg_trgm sobre esta coluna para LIKE '%q%'.
+    content = Column(Text, nullable=False, server_default="")
@@ -0,0 +1,23 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, JSON, String, text
+from sqlalchemy.orm import relationship
+
+from app.core.database import Base
+
+
+class StudySession(Base):
+    __tablename__ = "study_sessions"
+
+    id = Column(String(36), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    deck_id = Column(Integer, ForeignKey("decks.id"), nullable=False, index=True)
+    # Cards pré-renderizados (RenderedCard serializado + "kind": "new" | "review") na ordem de entrega
+    cards = Column(JSON, nullable=False, server_default=text("'[]'"))
+    cursor = Column(Integer, nullable=False, server_default="0")
+    answered_card_ids = Column(JSON, nullable=False, server_default=text("'[]'"))
+    created_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+    user = relationship("User")
+    deck = relationship("Deck")
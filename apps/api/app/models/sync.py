@@ -0,0 +1,91 @@
+"""Sequência de mudanças usada pelo sync offline (`GET /me/sync?since=<token>`).
+
+Cada transação que cria/altera cards, notas, valores de campo ou progresso recebe um seq (o mesmo em
+todos os flushes dela) gravado em `updated_seq`. O token devolvido ao cliente (`current_sync_seq`) só
+cobre transações já encerradas, então um cliente que leu até o token N nunca perde uma mudança com
+seq <= N, mesmo que uma transação com seq menor faça commit depois de outra com seq maior:
+
+- Postgres: o seq é o id da transação (`txid_current()`), alocado sem lock nenhum, e o token é o
+  `xmin` do snapshot (toda transação com id menor já terminou). Nenhum writer espera por outro.
+- SQLite: só há um writer por vez (lock do banco), então o contador na linha única de
+  `sync_sequence` não serializa nada além do que o SQLite já serializa.
+
+No Postgres os seqs são somados ao valor congelado de `sync_sequence` (o último do contador antigo),
+para ficarem acima de todo token já entregue. Escritas em massa via Core (INSERT ... SELECT) não passam
+pelo listener e devem preencher `updated_seq` com `next_sync_seq`.
+"""
+
+from sqlalchemy import BigInteger, Column, Integer, event, select, text, update
+from sqlalchemy.orm import Session, SessionTransaction
+
+from app.core.database import Base
+from app.models.card import Card
+from app.models.note import Note, NoteFieldValue
+from app.models.user_card_progress import UserCardProgress
+
+SYNCED_MODELS = (Card, Note, UserCardProgress)
+SEQ_INFO_KEY = "sync_seq"
+
+
+class SyncSequence(Base):
+    __tablename__ = "sync_sequence"
+
+    id = Column(Integer, primary_key=True)
+    value = Column(BigInteger, nullable=False, server_default="0")
+
+
+def _uses_transaction_ids(session: Session) -> bool:
+    return session.get_bind().dialect.name == "postgresql"
+
+
+def _base_seq(session: Session) -> int:
+    return session.scalar(select(SyncSequence.value).where(SyncSequence.id == 1)) or 0
+
+
+def next_sync_seq(session: Session) -> int:
+    """Seq da transação corrente da sessão (alocado no primeiro uso e reaproveitado até o commit)."""
+    seq = session.info.get(SEQ_INFO_KEY)
+    if seq is not None:
+        return seq
+    connection = session.connection()
+    if _uses_transaction_ids(session):
+        seq = _base_seq(session) + connection.execute(text("SELECT txid_current()")).scalar_one()
+    else:
+        connection.execute(update(SyncSequence).where(SyncSequence.id == 1).values(value=SyncSequence.value + 1))
+        seq = connection.execute(select(SyncSequence.value).where(SyncSequence.id == 1)).scalar_one()
+    session.info[SEQ_INFO_KEY] = seq
+    return seq
+
+
+def current_sync_seq(session: Session) -> int:
+    """Maior seq já encerrado: nenhuma transação em andamento pode gravar um seq <= a ele."""
+    if _uses_transaction_ids(session):
+        xmin = session.scalar(text("SELECT txid_snapshot_xmin(txid_current_snapshot())"))
+        return _base_seq(session) + xmin - 1
+    return _base_seq(session)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _forget_seq(session: Session, transaction: SessionTransaction) -> None:
+    if transaction.parent is None:
+        session.info.pop(SEQ_INFO_KEY, None)
+
+
+@event.listens_for(Session, "before_flush")
+def _stamp_updated_seq(session: Session, flush_context, instances) -> None:
+    changed = [obj for obj in session.new if isinstance(obj, SYNCED_MODELS)]
+    changed += [obj for obj in session.dirty if isinstance(obj, SYNCED_MODELS) and session.is_modified(obj)]
+    edited_note_ids = {
+        obj.note_id
+        for obj in list(session.new) + list(session.dirty)
+        if isinstance(obj, NoteFieldValue) and obj.note_id is not None
+    }
+    if not changed and not edited_note_ids:
+        return
+
+    seq = next_sync_seq(session)
+    for obj in changed:
+        obj.updated_seq = seq
+    if edited_note_ids:
+        # Valor de campo alterado muda a renderização da nota inteira
+        session.connection().execute(update(Note).where(Note.id.in_(edited_note_ids)).values(updated_seq=seq))
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, Enum, Float, ForeignKey, Integer, text
+from sqlalchemy import BigInteger, Column, DateTime, Enum, Float, ForeignKey, Index, Integer, text
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
@@ -9,6 +9,7 @@ from app.models.enums import CardStatus, LearningStage
 
 class UserCardProgress(Base):
     __tablename__ = "user_card_progress"
+    __table_args__ = (Index("ix_user_card_progress_user_seq", "user_id", "updated_seq"),)
 
     user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
     card_id = Column(Integer, ForeignKey("cards.id"), primary_key=True)
@@ -20,6 +21,7 @@ class UserCardProgress(Base):
     last_reviewed_at = Column(DateTime(timezone=True), nullable=True)
     lapses = Column(Integer, nullable=False, server_default="0")
     reps = Column(Integer, nullable=False, server_default="0")
+    updated_seq = Column(BigInteger, nullable=False, server_default="0")
 
     card = relationship("Card", back_populates="progresses")
     user = relationship("User", back_populates="card_progress")
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Integer
+
+from app.core.database import Base
+
+
+class UserDeckState(Base):
+    __tablename__ = "user_deck_state"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    deck_id = Column(Integer, ForeignKey("decks.id"), primary_key=True)
+    # Maior Card.id já introduzido ao usuário neste deck; novos cards são buscados a partir dele
+    new_card_cursor = Column(Integer, nullable=False, server_default="0")
+    # Quando o histograma de vencimentos (due_load_buckets) foi reconstruído; nulo = precisa reconstruir
+    due_histogram_at = Column(DateTime(timezone=True), nullable=True)
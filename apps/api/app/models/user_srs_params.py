@@ -0,0 +1,16 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, JSON, String, text
+
+from app.core.database import Base
+
+
+class UserSrsParams(Base):
+    __tablename__ = "user_srs_params"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    algorithm = Column(String(30), primary_key=True)
+    # Parâmetros ajustados offline a partir do card_review_log (ver scripts/fit_srs_params.py)
+    params = Column(JSON, nullable=False, server_default=text("'{}'"))
+    review_count = Column(Integer, nullable=False, server_default="0")
+    fitted_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
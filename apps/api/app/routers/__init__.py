@@ -1,3 +1,3 @@
-from app.routers import auth, decks, note_types, notes, study
+from app.routers import auth, decks, media, note_types, notes, study, sync
 
-__all__ = ["auth", "decks", "note_types", "notes", "study"]
+__all__ = ["auth", "decks", "media", "note_types", "notes", "study", "sync"]
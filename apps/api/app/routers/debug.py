@@ -0,0 +1,26 @@
+import secrets
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+
+from app.core.config import settings
+from app.core.profiling import profiles
+
+router = APIRouter(prefix="/debug", tags=["debug"])
+
+
+def require_admin_token(x_profile: str | None = Header(None)) -> None:
+    # Sem PROFILE_ADMIN_TOKEN configurado as rotas de debug não existem
+    if not settings.PROFILE_ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_profile or not secrets.compare_digest(x_profile, settings.PROFILE_ADMIN_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token")
+
+
+@router.get("/profiles", dependencies=[Depends(require_admin_token)])
+def list_profiles(
+    path: str | None = Query(None, description="Prefixo do path"),
+    limit: int = Query(20, ge=1, le=200),
+):
+    """Perfis mais recentes primeiro: top frames do cProfile e tempos de SQL de cada requisição."""
+    items = [profile for profile in reversed(profiles) if not path or profile["path"].startswith(path)]
+    return items[:limit]
@@ -1,21 +1,34 @@
 import re
 
 from datetime import datetime
+from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import func, select, and_
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import case, func, or_, select, and_, update
 from sqlalchemy.orm import Session, joinedload, selectinload
 
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.metrics import stage_timer
 from app.core.security import get_current_user
-from app.models import Card, Deck, Note, NoteFieldValue, NoteType, User, UserCardProgress
+from app.models import Card, Deck, Note, NoteFieldValue, NoteSearchIndex, NoteType, User, UserCardProgress, UserDeckState
 from app.models.enums import CardStatus, LearningStage
 from app.schemas.card import CardStatusResponse, RenderedCard
-from app.schemas.deck import DeckCreate, DeckRead, DeckUpdate
+from app.schemas.deck import DeckCreate, DeckForkCreate, DeckRead, DeckUpdate
 from app.schemas.deck_stats import CardWithStats, DeckStats
+from app.schemas.job import JobRead
 from app.schemas.note import NoteRead
 from app.schemas.note_type import NoteTypeSummary
+from app.services.forks import deck_note_filter, deck_search_filter, fork_deck
+from app.services.jobs import enqueue, store_job_file
 from app.services.notes import build_note_context, render_template
+from app.services.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from app.services.search import search_terms
+from app.services.snapshots import SNAPSHOT_MEDIA_TYPE, DeckImporter, SnapshotReader, export_deck_stream
+from app.services.study import new_cards_query, render_card
+from packages.core.srs import available_algorithms
 
 router = APIRouter(prefix="/decks", tags=["decks"])
 
@@ -43,6 +56,12 @@ def _ensure_can_edit_deck(deck: Deck | None, user: User) -> Deck:
     return deck
 
 
+def _ensure_valid_algorithm(name: str) -> str:
+    if name not in available_algorithms():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unknown SRS algorithm")
+    return name
+
+
 def _build_deck_response(deck: Deck) -> DeckRead:
     summaries = [
         NoteTypeSummary(
@@ -52,7 +71,7 @@ def _build_deck_response(deck: Deck) -> DeckRead:
             template_count=len(nt.templates),
             field_count=len(nt.fields),
         )
-        for nt in deck.note_types
+        for nt in deck.note_types + (deck.source_deck.note_types if deck.source_deck else [])
     ]
     return DeckRead(
         id=deck.id,
@@ -67,6 +86,9 @@ def _build_deck_response(deck: Deck) -> DeckRead:
         is_public=deck.is_public,
         tags=deck.tags or [],
         owner_id=deck.owner_id,
+        source_deck_id=deck.source_deck_id,
+        srs_algorithm=deck.srs_algorithm,
+        load_balance_due=deck.load_balance_due,
         note_types=summaries,
     )
 
@@ -106,6 +128,7 @@ def create_deck(deck_in: DeckCreate, db: Session = Depends(get_db), current_user
     exists = db.scalar(select(Deck.id).where(Deck.slug == slug))
     if exists:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Slug already in use")
+    _ensure_valid_algorithm(deck_in.srs_algorithm)
 
     deck = Deck(
         name=deck_in.name,
@@ -119,6 +142,8 @@ def create_deck(deck_in: DeckCreate, db: Session = Depends(get_db), current_user
         is_public=deck_in.is_public,
         tags=deck_in.tags or [],
         owner_id=current_user.id,
+        srs_algorithm=deck_in.srs_algorithm,
+        load_balance_due=deck_in.load_balance_due,
     )
     db.add(deck)
     db.commit()
@@ -126,6 +151,78 @@ def create_deck(deck_in: DeckCreate, db: Session = Depends(get_db), current_user
     return _build_deck_response(deck)
 
 
+@router.post("/import", response_model=DeckRead | JobRead, status_code=status.HTTP_201_CREATED)
+async def import_deck(
+    request: Request,
+    response: Response,
+    slug: str | None = Query(None, max_length=150),
+    name: str | None = Query(None, max_length=100),
+    background: bool = Query(False),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Cria um deck do usuário a partir de um snapshot (`GET /decks/{id}/export`) enviado como corpo bruto.
+
+    Com `background=true` o arquivo é só gravado e o import roda como job (`202` com o job). Nos dois
+    casos o corpo vai até `DECK_IMPORT_MAX_BYTES` (`413`).
+    """
+    declared_size = request.headers.get("content-length")
+    if declared_size and declared_size.isdigit() and int(declared_size) > settings.DECK_IMPORT_MAX_BYTES:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="File too large")
+    if background:
+        file_name = await store_job_file(request.stream(), ".nfdeck", settings.DECK_IMPORT_MAX_BYTES)
+        payload = {"file": file_name, "owner_id": current_user.id, "slug": slug, "name": name}
+        job = await run_in_threadpool(enqueue, db, "deck_import", payload, current_user.id)
+        await run_in_threadpool(db.commit)
+        response.status_code = status.HTTP_202_ACCEPTED
+        return await run_in_threadpool(JobRead.model_validate, job)
+
+    importer = DeckImporter(db, current_user.id, slug=slug, name=name)
+    reader = SnapshotReader()
+    size = 0
+    try:
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > settings.DECK_IMPORT_MAX_BYTES:
+                raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="File too large")
+            for record in await run_in_threadpool(reader.feed, chunk):
+                await run_in_threadpool(importer.apply, record)
+        deck = await run_in_threadpool(importer.finish)
+    except BaseException:
+        await run_in_threadpool(db.rollback)
+        raise
+    return await run_in_threadpool(_build_deck_response, deck)
+
+
+@router.post("/{deck_id}/fork", response_model=DeckRead, status_code=status.HTTP_201_CREATED)
+def fork_deck_route(
+    deck_id: int,
+    fork_in: DeckForkCreate | None = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Cria um deck privado do usuário que referencia as notas do deck original (cópia sob demanda)."""
+    source = _ensure_can_read_deck(db.get(Deck, deck_id), current_user)
+    fork_in = fork_in or DeckForkCreate()
+    slug = fork_in.slug or _slugify(f"{source.slug}-{current_user.id}")
+    if db.scalar(select(Deck.id).where(Deck.slug == slug)):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Slug already in use")
+    deck = fork_deck(db, source, current_user.id, fork_in.name, slug)
+    db.commit()
+    db.refresh(deck)
+    return _build_deck_response(deck)
+
+
+@router.get("/{deck_id}/export")
+def export_deck(deck_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    deck = _ensure_can_read_deck(db.get(Deck, deck_id), current_user)
+    return StreamingResponse(
+        export_deck_stream(deck.id),
+        media_type=SNAPSHOT_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="{deck.slug}.nfdeck"'},
+    )
+
+
 @router.get("/{deck_id}", response_model=DeckRead)
 def get_deck(deck_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     deck = (
@@ -169,6 +266,17 @@ def update_deck(deck_id: int, deck_in: DeckUpdate, db: Session = Depends(get_db)
     if deck_in.tags is not None:
         deck.tags = deck_in.tags
 
+    if deck_in.srs_algorithm is not None:
+        deck.srs_algorithm = _ensure_valid_algorithm(deck_in.srs_algorithm)
+
+    if deck_in.load_balance_due is not None:
+        if deck_in.load_balance_due and not deck.load_balance_due:
+            # Histogramas ficaram desatualizados enquanto o modo esteve desligado
+            db.execute(
+                update(UserDeckState).where(UserDeckState.deck_id == deck_id).values(due_histogram_at=None)
+            )
+        deck.load_balance_due = deck_in.load_balance_due
+
     db.commit()
     db.refresh(deck)
     deck = (
@@ -185,38 +293,44 @@ def update_deck(deck_id: int, deck_in: DeckUpdate, db: Session = Depends(get_db)
 
 @router.get("/{deck_id}/cards", response_model=list[RenderedCard])
 def list_cards(deck_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    deck = _ensure_can_read_deck(db.get(Deck, deck_id), current_user)
-
-    cards = (
-        db.query(Card)
-        .join(Note)
-        .options(
-            joinedload(Card.template),
-            joinedload(Card.note).joinedload(Note.field_values).joinedload(NoteFieldValue.field),
-            joinedload(Card.note).joinedload(Note.field_values).joinedload(NoteFieldValue.media_asset),
-            joinedload(Card.note).joinedload(Note.note_type),
+    with stage_timer("access_check"):
+        deck = _ensure_can_read_deck(db.get(Deck, deck_id), current_user)
+
+    with stage_timer("eager_load"):
+        cards = (
+            db.query(Card)
+            .join(Note)
+            .options(
+                joinedload(Card.template),
+                joinedload(Card.note).joinedload(Note.field_values).joinedload(NoteFieldValue.field),
+                joinedload(Card.note).joinedload(Note.field_values).joinedload(NoteFieldValue.media_asset),
+                joinedload(Card.note).joinedload(Note.note_type),
+            )
+            .filter(deck_note_filter(deck))
+            .all()
         )
-        .filter(Note.deck_id == deck_id)
-        .all()
-    )
 
     if not cards:
         return []
 
-    progress_map = {
-        p.card_id: p
-        for p in db.query(UserCardProgress).filter(
-            UserCardProgress.user_id == current_user.id,
-            UserCardProgress.card_id.in_([c.id for c in cards]),
-        )
-    }
+    with stage_timer("progress_query"):
+        progress_map = {
+            p.card_id: p
+            for p in db.query(UserCardProgress).filter(
+                UserCardProgress.user_id == current_user.id,
+                UserCardProgress.card_id.in_([c.id for c in cards]),
+            )
+        }
 
     rendered: list[RenderedCard] = []
     for card in cards:
-        context = build_note_context(card.note)
-        front = render_template(card.template.front_template, context)
-        back = render_template(card.template.back_template, context)
-        note_read = NoteRead.model_validate(card.note, from_attributes=True)
+        with stage_timer("build_note_context"):
+            context = build_note_context(card.note)
+        with stage_timer("render_template"):
+            front = render_template(card.template.front_template, context)
+            back = render_template(card.template.back_template, context)
+        with stage_timer("note_serialization"):
+            note_read = NoteRead.model_validate(card.note, from_attributes=True)
         progress = progress_map.get(card.id)
         rendered.append(
             RenderedCard(
@@ -260,7 +374,7 @@ def get_card_status(
             joinedload(Card.note).joinedload(Note.field_values).joinedload(NoteFieldValue.media_asset),
             joinedload(Card.note).joinedload(Note.note_type),
         )
-        .filter(Note.deck_id == deck_id, Card.id == card_id)
+        .filter(deck_note_filter(deck), Card.id == card_id)
         .first()
     )
     if not card:
@@ -314,30 +428,18 @@ def deck_stats(deck_id: int, db: Session = Depends(get_db), current_user: User =
     now = datetime.utcnow()
     end_of_day = now.replace(hour=23, minute=59, second=59, microsecond=999999)
 
-    cards_query = db.query(Card).join(Note).filter(Note.deck_id == deck_id)
+    note_filter = deck_note_filter(deck)
+    cards_query = db.query(Card).join(Note).filter(note_filter)
     total_cards = cards_query.count()
 
-    # cards sem progresso para este usuário = novos disponíveis
-    new_available = (
-        db.query(Card)
-        .join(Note)
-        .outerjoin(
-            UserCardProgress,
-            and_(UserCardProgress.card_id == Card.id, UserCardProgress.user_id == current_user.id),
-        )
-        .filter(
-            Note.deck_id == deck_id,
-            UserCardProgress.card_id == None,  # noqa: E711
-            Card.status == CardStatus.new,
-        )
-        .count()
-    )
+    # cards ainda não introduzidos a este usuário = novos disponíveis
+    new_available = new_cards_query(db, current_user.id, deck).count()
 
     progress_query = (
         db.query(UserCardProgress)
         .join(Card, UserCardProgress.card_id == Card.id)
         .join(Note, Card.note_id == Note.id)
-        .filter(UserCardProgress.user_id == current_user.id, Note.deck_id == deck_id)
+        .filter(UserCardProgress.user_id == current_user.id, note_filter)
     )
 
     due_today = (
@@ -386,48 +488,160 @@ def deck_stats(deck_id: int, db: Session = Depends(get_db), current_user: User =
     )
 
 
-@router.get("/{deck_id}/cards-with-stats", response_model=list[CardWithStats])
-def deck_cards_with_stats(deck_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+@router.get("/{deck_id}/search", response_model=list[RenderedCard])
+def search_deck(
+    deck_id: int,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = Query(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Busca nas notas do deck (kana/romaji normalizados); retorna os cards renderizados das notas encontradas."""
     deck = _ensure_can_read_deck(db.get(Deck, deck_id), current_user)
+    terms = search_terms(q)
+    if not terms:
+        return []
+
+    query = select(NoteSearchIndex.note_id).where(
+        deck_search_filter(deck),
+        or_(*[NoteSearchIndex.content.contains(term, autoescape=True) for term in terms]),
+    )
+    if cursor:
+        _, last_id = decode_cursor(cursor)
+        query = query.where(NoteSearchIndex.note_id > last_id)
+    note_ids = list(db.scalars(query.order_by(NoteSearchIndex.note_id).limit(limit + 1)))
+    if len(note_ids) > limit:
+        note_ids = note_ids[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(note_ids[-1], note_ids[-1])
+    if not note_ids:
+        return []
 
     cards = (
         db.query(Card)
-        .join(Note)
-        .options(joinedload(Card.template), joinedload(Card.note))
-        .filter(Note.deck_id == deck_id)
-        .order_by(Card.id)
+        .options(
+            joinedload(Card.template),
+            joinedload(Card.note).joinedload(Note.field_values).joinedload(NoteFieldValue.field),
+            joinedload(Card.note).joinedload(Note.field_values).joinedload(NoteFieldValue.media_asset),
+            joinedload(Card.note).joinedload(Note.note_type),
+        )
+        .filter(Card.note_id.in_(note_ids))
+        .order_by(Card.note_id, Card.id)
         .all()
     )
-
-    if not cards:
-        return []
-
     progress_map = {
         p.card_id: p
         for p in db.query(UserCardProgress).filter(
             UserCardProgress.user_id == current_user.id,
-            UserCardProgress.card_id.in_([c.id for c in cards]),
+            UserCardProgress.card_id.in_([card.id for card in cards]),
         )
     }
+    return [render_card(card, progress_map.get(card.id)) for card in cards]
 
-    result: list[CardWithStats] = []
-    for card in cards:
-        context = build_note_context(card.note)
-        front = render_template(card.template.front_template, context)
-        preview = front if len(front) <= 80 else front[:77] + "..."
-        progress = progress_map.get(card.id)
-        result.append(
-            CardWithStats(
-                id=card.id,
-                front=preview,
-                status=(progress.status.value if progress and progress.status else card.status.value if card.status else "unknown"),
-                stage=progress.stage.value if progress and progress.stage else getattr(card, "stage", None) and card.stage.value,
-                due_at=progress.due_at if progress else card.due_at,
-                reps=progress.reps if progress else card.reps,
-                lapses=progress.lapses if progress else card.lapses,
-                srs_interval=progress.srs_interval if progress else card.srs_interval,
-                srs_ease=progress.srs_ease if progress else card.srs_ease,
-                last_reviewed_at=progress.last_reviewed_at if progress else card.last_reviewed_at,
-            )
+
+# Chaves de ordenação do navegador de cards; due_at nulo vai para o fim (sentinela) para o keyset funcionar
+_NO_DUE = datetime(9999, 12, 31)
+
+
+def _effective(progress_column, card_column):
+    # Mesmo fallback do progresso do usuário para o estado do card usado no restante da API
+    return case((UserCardProgress.card_id.is_not(None), progress_column), else_=card_column)
+
+
+@router.get("/{deck_id}/cards-with-stats", response_model=list[CardWithStats])
+def deck_cards_with_stats(
+    deck_id: int,
+    response: Response,
+    status_filter: CardStatus | None = Query(None, alias="status"),
+    stage: LearningStage | None = Query(None),
+    due_after: datetime | None = Query(None),
+    due_before: datetime | None = Query(None),
+    q: str | None = Query(None, min_length=1, max_length=80),
+    sort: Literal["id", "due", "lapses", "reps"] = Query("id"),
+    order: Literal["asc", "desc"] = Query("asc"),
+    limit: int = Query(500, ge=1, le=2000),
+    cursor: str | None = Query(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    deck = _ensure_can_read_deck(db.get(Deck, deck_id), current_user)
+
+    status_col = _effective(UserCardProgress.status, Card.status)
+    stage_col = _effective(UserCardProgress.stage, Card.stage)
+    due_col = _effective(UserCardProgress.due_at, Card.due_at)
+    reps_col = _effective(UserCardProgress.reps, Card.reps)
+    lapses_col = _effective(UserCardProgress.lapses, Card.lapses)
+    sort_keys = {
+        "id": Card.id,
+        "due": func.coalesce(due_col, _NO_DUE),
+        "lapses": lapses_col,
+        "reps": reps_col,
+    }
+    sort_key = sort_keys[sort]
+    # O cursor carrega a ordenação que o gerou: reusado com outro `sort`/`order`, é rejeitado
+    cursor_scope = f"{sort}:{order}"
+
+    query = (
+        select(
+            Card.id,
+            Card.preview,
+            status_col.label("status"),
+            stage_col.label("stage"),
+            due_col.label("due_at"),
+            reps_col.label("reps"),
+            lapses_col.label("lapses"),
+            _effective(UserCardProgress.srs_interval, Card.srs_interval).label("srs_interval"),
+            _effective(UserCardProgress.srs_ease, Card.srs_ease).label("srs_ease"),
+            _effective(UserCardProgress.last_reviewed_at, Card.last_reviewed_at).label("last_reviewed_at"),
+            sort_key.label("sort_key"),
+        )
+        .join(Note, Card.note_id == Note.id)
+        .outerjoin(
+            UserCardProgress,
+            and_(UserCardProgress.card_id == Card.id, UserCardProgress.user_id == current_user.id),
         )
-    return result
+        .where(deck_note_filter(deck))
+    )
+    if status_filter:
+        query = query.where(status_col == status_filter)
+    if stage:
+        query = query.where(stage_col == stage)
+    if due_after:
+        query = query.where(due_col >= due_after)
+    if due_before:
+        query = query.where(due_col < due_before)
+    if q:
+        query = query.where(Card.preview.ilike(f"%{q}%"))
+    if cursor:
+        last_value, last_id = decode_cursor(cursor, cursor_scope, datetime if sort == "due" else int)
+        if order == "asc":
+            query = query.where(or_(sort_key > last_value, and_(sort_key == last_value, Card.id > last_id)))
+        else:
+            query = query.where(or_(sort_key < last_value, and_(sort_key == last_value, Card.id < last_id)))
+
+    if order == "asc":
+        query = query.order_by(sort_key.asc(), Card.id.asc())
+    else:
+        query = query.order_by(sort_key.desc(), Card.id.desc())
+    rows = db.execute(query.limit(limit + 1)).all()
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1].sort_key, rows[-1].id, cursor_scope)
+
+    return [
+        CardWithStats(
+            id=row.id,
+            front=row.preview or "",
+            status=row.status.value if row.status else "unknown",
+            stage=row.stage.value if row.stage else None,
+            due_at=row.due_at,
+            reps=row.reps,
+            lapses=row.lapses,
+            srs_interval=row.srs_interval,
+            srs_ease=row.srs_ease,
+            last_reviewed_at=row.last_reviewed_at,
+        )
+        for row in rows
+    ]
@@ -0,0 +1,53 @@
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from app.core.database import get_db
+from app.core.security import get_current_user
+from app.models import Job, JobStatus, User
+from app.schemas.job import JobRead
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+def _get_own_job(db: Session, job_id: int, user: User) -> Job:
+    job = db.get(Job, job_id)
+    if not job or job.owner_id != user.id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+
+@router.get("", response_model=list[JobRead])
+def list_jobs(
+    status_filter: JobStatus | None = Query(None, alias="status"),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    query = db.query(Job).filter(Job.owner_id == current_user.id)
+    if status_filter:
+        query = query.filter(Job.status == status_filter)
+    return query.order_by(Job.id.desc()).limit(limit).all()
+
+
+@router.get("/{job_id}", response_model=JobRead)
+def get_job(job_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    return _get_own_job(db, job_id, current_user)
+
+
+@router.post("/{job_id}/retry", response_model=JobRead)
+def retry_job(job_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    """Recoloca na fila um job que falhou de vez, com as tentativas zeradas."""
+    job = _get_own_job(db, job_id, current_user)
+    if job.status != JobStatus.failed:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Only failed jobs can be retried")
+    job.status = JobStatus.queued
+    job.attempts = 0
+    job.run_after = datetime.utcnow()
+    job.finished_at = None
+    job.progress = 0.0
+    job.progress_message = None
+    db.commit()
+    db.refresh(job)
+    return job
@@ -0,0 +1,162 @@
+import re
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.security import get_current_user
+from app.models import Deck, MediaAsset, User
+from app.schemas.job import JobRead
+from app.schemas.note import AudioSpritesRead, MediaAssetRead
+from app.services.images import build_variants_async
+from app.services.jobs import enqueue
+from app.services.media import (
+    blob_path,
+    detect_mime,
+    discard_if_unused,
+    find_asset,
+    iter_file,
+    parse_range,
+    register_asset,
+    shared_variants,
+    sniff_file,
+    store_stream,
+)
+from app.services.sprites import build_deck_sprites, sprites_stale
+
+router = APIRouter(tags=["media"])
+# Arquivos servidos sem autenticação: o endereço é o próprio hash do conteúdo
+public_router = APIRouter(tags=["media"])
+
+_SHA256 = re.compile(r"^[0-9a-f]{64}$")
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def _register_uploaded(db: Session, deck_id: int, blob, file_name, mime, variants, attribution, license):
+    try:
+        asset = register_asset(db, deck_id, blob, file_name, mime, attribution, license, variants=variants)
+    except HTTPException:
+        discard_if_unused(db, blob)
+        raise
+    db.commit()
+    db.refresh(asset)
+    return asset
+
+
+@router.post("/decks/{deck_id}/media", response_model=MediaAssetRead, status_code=status.HTTP_201_CREATED)
+async def upload_media(
+    deck_id: int,
+    request: Request,
+    response: Response,
+    file_name: str = Query(..., min_length=1, max_length=255),
+    attribution: str | None = Query(None, max_length=255),
+    license: str | None = Query(None, max_length=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Upload com o arquivo como corpo bruto da requisição (Content-Type do arquivo)."""
+    deck = await run_in_threadpool(db.get, Deck, deck_id)
+    if not deck:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Deck not found")
+    if deck.owner_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized for this deck")
+    declared_size = request.headers.get("content-length")
+    if declared_size and declared_size.isdigit() and int(declared_size) > settings.MEDIA_MAX_BYTES:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Media file too large")
+
+    blob = await store_stream(request.stream())
+    existing = await run_in_threadpool(find_asset, db, deck.id, blob.sha256)
+    if existing:
+        response.status_code = status.HTTP_200_OK
+        return existing
+
+    mime = await run_in_threadpool(detect_mime, blob.path, file_name, request.headers.get("content-type"))
+    variants = await run_in_threadpool(shared_variants, db, blob.sha256)
+    if variants is None and mime.startswith("image/"):
+        variants = await build_variants_async(blob, mime)
+    return await run_in_threadpool(
+        _register_uploaded, db, deck.id, blob, file_name, mime, variants, attribution, license
+    )
+
+
+def _sprites_response(db: Session, deck: Deck) -> AudioSpritesRead:
+    index = deck.audio_sprites or {}
+    return AudioSpritesRead(
+        deck_id=deck.id,
+        built_at=index["built_at"],
+        stale=sprites_stale(db, deck),
+        sprites=index.get("sprites", []),
+        clips=index.get("clips", {}),
+    )
+
+
+@router.post("/decks/{deck_id}/audio-sprites", response_model=AudioSpritesRead | JobRead)
+def build_audio_sprites(
+    deck_id: int,
+    response: Response,
+    background: bool = Query(False),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Recria os sprites de áudio do deck (dono do deck); com `background=true`, como job (`202`)."""
+    deck = db.get(Deck, deck_id)
+    if not deck:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Deck not found")
+    if deck.owner_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized for this deck")
+    if background:
+        job = enqueue(db, "audio_sprites", {"deck_id": deck.id}, current_user.id, deck.id)
+        db.commit()
+        response.status_code = status.HTTP_202_ACCEPTED
+        return JobRead.model_validate(job)
+    build_deck_sprites(db, deck)
+    db.commit()
+    db.refresh(deck)
+    return _sprites_response(db, deck)
+
+
+@router.get("/decks/{deck_id}/audio-sprites", response_model=AudioSpritesRead)
+def get_audio_sprites(deck_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    deck = db.get(Deck, deck_id)
+    if not deck:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Deck not found")
+    if not deck.is_public and deck.owner_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized for this deck")
+    if not deck.audio_sprites:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Audio sprites not built")
+    return _sprites_response(db, deck)
+
+
+@public_router.get("/media/{sha256}")
+def get_media(sha256: str, request: Request, db: Session = Depends(get_db)):
+    if not _SHA256.match(sha256):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Media not found")
+    path = blob_path(sha256)
+    if not path.exists():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Media not found")
+    # Derivados (variants) não têm MediaAsset próprio: o tipo vem do próprio arquivo
+    metadata = db.scalar(select(MediaAsset.metadata_json).where(MediaAsset.sha256 == sha256).limit(1)) or {}
+
+    size = path.stat().st_size
+    etag = f'"{sha256}"'
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Accept-Ranges": "bytes"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    media_type = metadata.get("mime_type") or sniff_file(path) or "application/octet-stream"
+    byte_range = parse_range(request.headers.get("range"), size)
+    if byte_range:
+        start, end = byte_range
+        headers.update({"Content-Range": f"bytes {start}-{end}/{size}", "Content-Length": str(end - start + 1)})
+        return StreamingResponse(
+            iter_file(path, start, end),
+            status_code=status.HTTP_206_PARTIAL_CONTENT,
+            media_type=media_type,
+            headers=headers,
+        )
+    headers["Content-Length"] = str(size)
+    return StreamingResponse(iter_file(path, 0, size - 1), media_type=media_type, headers=headers)
@@ -16,9 +16,14 @@ from app.schemas.note_type import (
     NoteTypeRead,
     NoteTypeUpdate,
 )
+from app.services.jobs import enqueue
+from app.services.notes import add_missing_cards, fill_card_previews, touch_template_cards
 
 router = APIRouter(prefix="/note-types", tags=["note-types"])
 
+# Acima disso, a propagação de um template aos cards existentes roda como job em background
+INLINE_PROPAGATION_NOTES = 500
+
 
 def _ensure_deck_owner(deck: Deck | None, user: User) -> Deck:
     if not deck:
@@ -199,6 +204,25 @@ def delete_field(field_id: int, db: Session = Depends(get_db), current_user: Use
     return None
 
 
+def _propagate_template(db: Session, template: CardTemplate, user: User, refresh_previews: bool) -> int | None:
+    """Cria os cards que faltam (template ativo) e atualiza previews; devolve o id do job se foi para background."""
+    note_count = db.scalar(select(func.count()).select_from(Note).where(Note.note_type_id == template.note_type_id))
+    if note_count > INLINE_PROPAGATION_NOTES:
+        payload = {"template_id": template.id, "refresh_previews": refresh_previews}
+        return enqueue(db, "template_cards", payload, user.id, template.note_type.deck_id).id
+    if template.is_active:
+        add_missing_cards(db, template)
+    for _ in fill_card_previews(db, template, only_missing=not refresh_previews):
+        pass
+    return None
+
+
+def _template_response(template: CardTemplate, job_id: int | None) -> CardTemplateRead:
+    response = CardTemplateRead.model_validate(template)
+    response.propagation_job_id = job_id
+    return response
+
+
 @router.post("/{note_type_id}/templates", response_model=CardTemplateRead, status_code=status.HTTP_201_CREATED)
 def create_template(note_type_id: int, payload: CardTemplateCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     note_type = _ensure_note_type_edit_access(
@@ -215,9 +239,11 @@ def create_template(note_type_id: int, payload: CardTemplateCreate, db: Session
         is_active=payload.is_active,
     )
     db.add(template)
+    db.flush()
+    job_id = _propagate_template(db, template, current_user, refresh_previews=False) if template.is_active else None
     db.commit()
     db.refresh(template)
-    return template
+    return _template_response(template, job_id)
 
 
 @router.put("/card-templates/{template_id}", response_model=CardTemplateRead)
@@ -231,15 +257,25 @@ def update_template(template_id: int, payload: CardTemplateUpdate, db: Session =
     if not template:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Template not found")
     _ensure_note_type_edit_access(template.note_type, current_user)
+    was_active = template.is_active
 
     for attr in ["name", "front_template", "back_template", "css", "is_active"]:
         value = getattr(payload, attr)
         if value is not None:
             setattr(template, attr, value)
+    db.flush()
+
+    if any(getattr(payload, attr) is not None for attr in ("front_template", "back_template", "css")):
+        # A renderização dos cards existentes mudou: sync e sessões de estudo abertas precisam da nova
+        touch_template_cards(db, template)
+    job_id = None
+    activated = template.is_active and not was_active
+    if activated or payload.front_template is not None:
+        job_id = _propagate_template(db, template, current_user, refresh_previews=payload.front_template is not None)
 
     db.commit()
     db.refresh(template)
-    return template
+    return _template_response(template, job_id)
 
 
 @router.delete("/card-templates/{template_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload, selectinload
 
 from app.core.database import get_db
 from app.core.security import get_current_user
-from app.models import Note, NoteFieldValue, Deck, User
-from app.schemas.note import NoteCreate, NoteRead
-from app.services.notes import create_note_with_cards
+from app.models import Card, Note, NoteFieldValue, NoteType, Deck, User
+from app.schemas.note import NoteCreate, NoteImport, NoteImportResult, NoteRead, NoteUpdate
+from app.services.forks import deck_scope, ensure_own_notes
+from app.services.notes import create_note_with_cards, import_notes, update_note
 
 router = APIRouter(prefix="/notes", tags=["notes"])
 
@@ -24,6 +26,28 @@ def create_note(payload: NoteCreate, db: Session = Depends(get_db), current_user
     return NoteRead.model_validate(note, from_attributes=True)
 
 
+@router.post("/import", response_model=NoteImportResult)
+def import_notes_batch(
+    payload: NoteImport, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)
+):
+    deck = db.get(Deck, payload.deck_id)
+    if not deck:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Deck not found")
+    if deck.owner_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized for this deck")
+    note_type = (
+        db.query(NoteType)
+        .options(selectinload(NoteType.fields), selectinload(NoteType.templates))
+        .filter(NoteType.id == payload.note_type_id)
+        .first()
+    )
+    if not note_type:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Note type not found")
+    if note_type.deck_id and note_type.deck_id not in deck_scope(deck):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Note type is not part of this deck")
+    return import_notes(db, deck, note_type, payload.notes)
+
+
 @router.get("/{note_id}", response_model=NoteRead)
 def get_note(note_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     note = (
@@ -42,3 +66,36 @@ def get_note(note_id: int, db: Session = Depends(get_db), current_user: User = D
     if not note.deck.is_public and note.deck.owner_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized for this deck")
     return note
+
+
+@router.put("/{note_id}", response_model=NoteRead)
+def edit_note(
+    note_id: int,
+    payload: NoteUpdate,
+    deck_id: int | None = Query(None, description="Fork em que a nota da origem é editada (copiada sob demanda)"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    note = (
+        db.query(Note)
+        .options(
+            joinedload(Note.deck),
+            joinedload(Note.note_type).joinedload(NoteType.fields),
+            joinedload(Note.cards).joinedload(Card.template),
+        )
+        .filter(Note.id == note_id)
+        .first()
+    )
+    if not note:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Note not found")
+    if deck_id is not None and deck_id != note.deck_id:
+        fork = db.get(Deck, deck_id)
+        if not fork or fork.source_deck_id != note.deck_id:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Note is not part of this deck")
+        if fork.owner_id != current_user.id:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized for this deck")
+        copy = db.scalar(select(Note).where(Note.deck_id == fork.id, Note.origin_note_id == note.id))
+        note = copy or ensure_own_notes(db, fork, [note])[note.id]
+    elif note.deck.owner_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized for this deck")
+    return update_note(db, note, payload)
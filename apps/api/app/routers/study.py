@@ -1,22 +1,51 @@
+import uuid
 from datetime import datetime, timedelta
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import and_, func, or_, select
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session, joinedload
 
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.metrics import stage_timer
+from app.core.rate_limit import TokenBucketLimiter
 from app.core.security import get_current_user
-from app.models import Card, CardTemplate, Deck, Note, NoteFieldValue, User, UserCardProgress, CardReviewLog
-from app.models.enums import CardStatus
+from app.models import Card, Deck, Note, User, UserCardProgress, CardReviewLog, StudySession
 from app.schemas.card import RenderedCard
-from app.schemas.note import NoteRead
-from app.schemas.study import ReviewResponse, ReviewResult, ReviewStats, StudyBatch, StudySubmit
+from app.schemas.study import (
+    AnswerResponse,
+    ReviewResponse,
+    ReviewResult,
+    ReviewStats,
+    StudyBatch,
+    StudySessionAnswers,
+    StudySessionBatch,
+    StudySessionCreate,
+    StudySubmit,
+    TypedAnswer,
+)
 from app.schemas.review_log import ReviewLogRead
-from app.services.notes import build_note_context, render_template
-from app.services.srs import apply_review
+from app.services.answers import accepted_answers, grade_answer
+from app.services.due_stream import review_stats_events
+from app.services.forks import deck_note_filter
+from app.services.review_writer import ReviewWriter
+from app.services.srs import load_user_srs_params
+from app.services.study import (
+    advance_new_card_cursor,
+    record_review,
+    render_card,
+    review_response,
+    review_stats,
+    select_new_cards,
+    select_reviews,
+)
 
 router = APIRouter(prefix="", tags=["study"])
 
+STUDY_SESSION_TTL = timedelta(hours=2)
+STREAM_MAX_DECKS = 50
+
 
 def _ensure_deck_access(deck: Deck | None, user: User) -> Deck:
     if not deck:
@@ -26,39 +55,8 @@ def _ensure_deck_access(deck: Deck | None, user: User) -> Deck:
     return deck
 
 
-def _render_card(card: Card, progress: UserCardProgress | None = None) -> RenderedCard:
-    context = build_note_context(card.note)
-    front = render_template(card.template.front_template, context)
-    back = render_template(card.template.back_template, context)
-    note_read = NoteRead.model_validate(card.note, from_attributes=True)
-
-    status = progress.status if progress else card.status
-    stage = getattr(progress, "stage", None) if progress else getattr(card, "stage", None)
-    srs_interval = progress.srs_interval if progress else card.srs_interval
-    srs_ease = progress.srs_ease if progress else card.srs_ease
-    due_at = progress.due_at if progress else card.due_at
-    last_reviewed_at = progress.last_reviewed_at if progress else card.last_reviewed_at
-    lapses = progress.lapses if progress else card.lapses
-    reps = progress.reps if progress else card.reps
-
-    return RenderedCard(
-        id=card.id,
-        note_id=card.note_id,
-        card_template_id=card.card_template_id,
-        mnemonic=card.mnemonic,
-        status=status,
-        stage=stage,
-        srs_interval=srs_interval,
-        srs_ease=srs_ease,
-        due_at=due_at,
-        last_reviewed_at=last_reviewed_at,
-        lapses=lapses,
-        reps=reps,
-        front=front,
-        back=back,
-        note=note_read,
-        template_name=card.template.name if card.template else None,
-    )
+review_limiter = TokenBucketLimiter(settings.REVIEW_RATE_PER_SECOND, settings.REVIEW_RATE_BURST)
+review_writer = ReviewWriter(_ensure_deck_access)
 
 
 @router.get("/decks/{deck_id}/study", response_model=StudyBatch)
@@ -68,31 +66,11 @@ def get_study_batch(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    deck = _ensure_deck_access(db.get(Deck, deck_id), current_user)
+    with stage_timer("access_check"):
+        deck = _ensure_deck_access(db.get(Deck, deck_id), current_user)
 
-    cards = (
-        db.query(Card)
-        .join(Note)
-        .outerjoin(
-            UserCardProgress,
-            and_(UserCardProgress.card_id == Card.id, UserCardProgress.user_id == current_user.id),
-        )
-        .options(
-            joinedload(Card.template),
-            joinedload(Card.note).joinedload(Note.field_values).joinedload(NoteFieldValue.field),
-            joinedload(Card.note).joinedload(Note.field_values).joinedload(NoteFieldValue.media_asset),
-            joinedload(Card.note).joinedload(Note.note_type),
-        )
-        .filter(
-            Note.deck_id == deck_id,
-            Card.status != CardStatus.suspended,
-            UserCardProgress.card_id == None,  # noqa: E711
-        )
-        .order_by(Card.id)
-        .limit(limit)
-        .all()
-    )
-    rendered = [_render_card(card) for card in cards]
+    cards = select_new_cards(db, current_user.id, deck, limit)
+    rendered = [render_card(card) for card in cards]
     return StudyBatch(cards=rendered)
 
 
@@ -102,7 +80,8 @@ def submit_study(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    deck = _ensure_deck_access(db.get(Deck, payload.deck_id), current_user)
+    with stage_timer("access_check"):
+        deck = _ensure_deck_access(db.get(Deck, payload.deck_id), current_user)
 
     card_ids = [r.card_id for r in payload.results]
     if not card_ids:
@@ -111,7 +90,7 @@ def submit_study(
     cards = (
         db.query(Card)
         .join(Note)
-        .filter(Note.deck_id == payload.deck_id, Card.id.in_(card_ids))
+        .filter(deck_note_filter(deck), Card.id.in_(card_ids))
         .options(joinedload(Card.note))
         .all()
     )
@@ -126,42 +105,22 @@ def submit_study(
     }
 
     result_map = {r.card_id: r.correct for r in payload.results}
+    srs_params = load_user_srs_params(db, current_user.id, deck.srs_algorithm)
     for card in cards:
-        correct = result_map.get(card.id, False)
-        progress = progress_map.get(card.id)
-        if not progress:
-            progress = UserCardProgress(
-                user_id=current_user.id,
-                card_id=card.id,
-                status=CardStatus.new,
-                stage=None,
-                srs_interval=0,
-                srs_ease=card.srs_ease,
-                reps=0,
-                lapses=0,
-            )
-            db.add(progress)
-        before_stage = progress.stage
-        apply_review(progress, correct=correct, initial=True)
-        db.add(
-            CardReviewLog(
-                user_id=current_user.id,
-                card_id=card.id,
-                note_id=card.note_id,
-                deck_id=payload.deck_id,
-                correct=correct,
-                stage_before=before_stage,
-                stage_after=progress.stage,
-                status_after=progress.status,
-                due_at_after=progress.due_at,
-                srs_interval_after=progress.srs_interval,
-                srs_ease_after=progress.srs_ease,
-                reps_after=progress.reps,
-                lapses_after=progress.lapses,
-            )
+        record_review(
+            db,
+            current_user.id,
+            deck,
+            card,
+            correct=result_map.get(card.id, False),
+            initial=True,
+            progress=progress_map.get(card.id),
+            params=srs_params,
         )
+    advance_new_card_cursor(db, current_user.id, deck, [card.id for card in cards])
 
-    db.commit()
+    with stage_timer("commit"):
+        db.commit()
     return {"updated": len(cards)}
 
 
@@ -173,46 +132,32 @@ def get_reviews(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    deck = _ensure_deck_access(db.get(Deck, deck_id), current_user)
-
-    now = datetime.utcnow()
-    query = (
-        db.query(UserCardProgress)
-        .join(Card, UserCardProgress.card_id == Card.id)
-        .join(Note, Card.note_id == Note.id)
-        .options(
-            joinedload(UserCardProgress.card)
-            .joinedload(Card.template),
-            joinedload(UserCardProgress.card)
-            .joinedload(Card.note)
-            .joinedload(Note.field_values)
-            .joinedload(NoteFieldValue.field),
-            joinedload(UserCardProgress.card)
-            .joinedload(Card.note)
-            .joinedload(Note.field_values)
-            .joinedload(NoteFieldValue.media_asset),
-            joinedload(UserCardProgress.card).joinedload(Card.note).joinedload(Note.note_type),
-        )
-        .filter(
-            Note.deck_id == deck_id,
-            UserCardProgress.user_id == current_user.id,
-            UserCardProgress.status != CardStatus.suspended,
-        )
-    )
-    if due_only:
-        query = query.filter(or_(UserCardProgress.due_at == None, UserCardProgress.due_at <= now))  # noqa: E711
+    with stage_timer("access_check"):
+        deck = _ensure_deck_access(db.get(Deck, deck_id), current_user)
 
-    progresses = query.order_by(UserCardProgress.due_at.nullsfirst(), Card.id).limit(limit).all()
-    return [_render_card(p.card, p) for p in progresses]
+    progresses = select_reviews(db, current_user.id, deck, limit, due_only=due_only)
+    return [render_card(p.card, p) for p in progresses]
 
 
 @router.post("/cards/{card_id}/review", response_model=ReviewResponse)
 def review_card(
     card_id: int,
     payload: ReviewResult,
+    current_user: User = Depends(get_current_user),
+):
+    """Aplica uma revisão. Revisões simultâneas do mesmo usuário saem num único commit (`ReviewWriter`)."""
+    review_limiter.check(current_user.id)
+    return review_writer.submit(current_user, card_id, payload.correct)
+
+
+@router.post("/cards/{card_id}/answer", response_model=AnswerResponse)
+def answer_card(
+    card_id: int,
+    payload: TypedAnswer,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
+    """Corrige a resposta digitada no servidor e aplica o resultado como uma revisão."""
     card = (
         db.query(Card)
         .options(joinedload(Card.note).joinedload(Note.deck))
@@ -221,97 +166,218 @@ def review_card(
     )
     if not card:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Card not found")
-    _ensure_deck_access(card.note.deck if card.note else None, current_user)
+    with stage_timer("access_check"):
+        deck = _ensure_deck_access(card.note.deck if card.note else None, current_user)
+    grade = grade_answer(accepted_answers(db, card.note), payload.answer)
 
     progress = (
         db.query(UserCardProgress)
         .filter(UserCardProgress.card_id == card_id, UserCardProgress.user_id == current_user.id)
         .first()
     )
-    if not progress:
-        progress = UserCardProgress(
-            user_id=current_user.id,
-            card_id=card.id,
-            status=CardStatus.new,
-            stage=None,
-            srs_interval=card.srs_interval,
-            srs_ease=card.srs_ease,
-            reps=0,
-            lapses=0,
-        )
-        db.add(progress)
-
-    before_stage = progress.stage
-    apply_review(progress, correct=payload.correct, initial=False)
-    db.add(
-        CardReviewLog(
-            user_id=current_user.id,
-            card_id=card.id,
-            note_id=card.note_id,
-            deck_id=card.note.deck_id if card.note else None,
-            correct=payload.correct,
-            stage_before=before_stage,
-            stage_after=progress.stage,
-            status_after=progress.status,
-            due_at_after=progress.due_at,
-            srs_interval_after=progress.srs_interval,
-            srs_ease_after=progress.srs_ease,
-            reps_after=progress.reps,
-            lapses_after=progress.lapses,
-        )
+    initial = progress is None
+    progress = record_review(
+        db,
+        current_user.id,
+        deck,
+        card,
+        correct=grade.correct,
+        initial=initial,
+        progress=progress,
+        params=load_user_srs_params(db, current_user.id, deck.srs_algorithm),
     )
-    db.commit()
+    if initial:
+        advance_new_card_cursor(db, current_user.id, deck, [card.id])
+    with stage_timer("commit"):
+        db.commit()
     db.refresh(progress)
-    return ReviewResponse(
-        card_id=card.id,
-        status=progress.status.value if progress.status else None,
-        stage=progress.stage.value if progress.stage else None,
-        due_at=progress.due_at,
-        srs_interval=progress.srs_interval,
-        srs_ease=progress.srs_ease,
-        reps=progress.reps,
-        lapses=progress.lapses,
+    return AnswerResponse(
+        **review_response(card.id, progress).model_dump(),
+        correct=grade.correct,
+        close_match=grade.close_match,
+        expected=grade.expected,
     )
 
 
-@router.get("/decks/{deck_id}/review-stats", response_model=ReviewStats)
-def get_review_stats(
+def _get_active_session(db: Session, session_id: str, user: User) -> StudySession:
+    session = (
+        db.query(StudySession)
+        .filter(
+            StudySession.id == session_id,
+            StudySession.user_id == user.id,
+            StudySession.expires_at > datetime.utcnow(),
+        )
+        .first()
+    )
+    if not session:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Study session not found or expired")
+    return session
+
+
+def _next_session_batch(session: StudySession, limit: int) -> StudySessionBatch:
+    cards = session.cards or []
+    batch = cards[session.cursor : session.cursor + limit]
+    session.cursor = session.cursor + len(batch)
+    return StudySessionBatch(
+        id=session.id,
+        deck_id=session.deck_id,
+        total=len(cards),
+        remaining=len(cards) - session.cursor,
+        expires_at=session.expires_at,
+        cards=[RenderedCard.model_validate(entry) for entry in batch],
+    )
+
+
+@router.post("/decks/{deck_id}/sessions", response_model=StudySessionBatch, status_code=status.HTTP_201_CREATED)
+def create_study_session(
     deck_id: int,
+    payload: StudySessionCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     deck = _ensure_deck_access(db.get(Deck, deck_id), current_user)
 
     now = datetime.utcnow()
-    end_of_day = now.replace(hour=23, minute=59, second=59, microsecond=999999)
+    # Uma sessão ativa por usuário/deck: a nova libera as reservas da anterior
+    db.query(StudySession).filter(
+        StudySession.user_id == current_user.id,
+        (StudySession.deck_id == deck_id) | (StudySession.expires_at <= now),
+    ).delete(synchronize_session=False)
+
+    # Revisões devidas primeiro, depois os novos; tudo renderizado uma única vez aqui
+    entries: list[dict] = []
+    if payload.review_limit:
+        for progress in select_reviews(db, current_user.id, deck, payload.review_limit, now=now):
+            entries.append({**render_card(progress.card, progress).model_dump(mode="json"), "kind": "review"})
+    if payload.new_limit:
+        for card in select_new_cards(db, current_user.id, deck, payload.new_limit):
+            entries.append({**render_card(card).model_dump(mode="json"), "kind": "new"})
+
+    session = StudySession(
+        id=uuid.uuid4().hex,
+        user_id=current_user.id,
+        deck_id=deck_id,
+        cards=entries,
+        cursor=0,
+        answered_card_ids=[],
+        created_at=now,
+        expires_at=now + STUDY_SESSION_TTL,
+    )
+    db.add(session)
+    batch = _next_session_batch(session, payload.batch_size)
+    db.commit()
+    return batch
 
-    base_query = (
-        db.query(UserCardProgress)
-        .join(Card, UserCardProgress.card_id == Card.id)
-        .join(Note, Card.note_id == Note.id)
-        .filter(
-            Note.deck_id == deck_id,
-            UserCardProgress.user_id == current_user.id,
-            UserCardProgress.status != CardStatus.suspended,
+
+@router.get("/sessions/{session_id}/next", response_model=StudySessionBatch)
+def next_study_session_batch(
+    session_id: str,
+    limit: int = Query(5, ge=1, le=50),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    session = _get_active_session(db, session_id, current_user)
+    batch = _next_session_batch(session, limit)
+    db.commit()
+    return batch
+
+
+@router.post("/sessions/{session_id}/answers", response_model=list[ReviewResponse])
+def answer_study_session(
+    session_id: str,
+    payload: StudySessionAnswers,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    session = _get_active_session(db, session_id, current_user)
+    if not payload.results:
+        return []
+
+    kinds = {entry["id"]: entry.get("kind", "review") for entry in session.cards or []}
+    card_ids = [r.card_id for r in payload.results]
+    if any(card_id not in kinds for card_id in card_ids):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Card is not part of this session")
+
+    cards = {card.id: card for card in db.query(Card).filter(Card.id.in_(card_ids))}
+    if len(cards) != len(set(card_ids)):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid card ids for this deck")
+    progress_map = {
+        p.card_id: p
+        for p in db.query(UserCardProgress).filter(
+            UserCardProgress.user_id == current_user.id, UserCardProgress.card_id.in_(card_ids)
         )
-    )
+    }
 
-    due_today_count = (
-        base_query.filter(UserCardProgress.due_at != None, UserCardProgress.due_at <= end_of_day)  # noqa: E711
-        .with_entities(func.count())
-        .scalar()
-        or 0
+    answered = list(session.answered_card_ids or [])
+    deck = session.deck
+    srs_params = load_user_srs_params(db, current_user.id, deck.srs_algorithm)
+    responses: list[ReviewResponse] = []
+    for result in payload.results:
+        # Primeira resposta de um card novo segue o fluxo de /study/submit; as demais, o de revisão
+        initial = kinds[result.card_id] == "new" and result.card_id not in answered
+        progress = record_review(
+            db,
+            current_user.id,
+            deck,
+            cards[result.card_id],
+            correct=result.correct,
+            initial=initial,
+            progress=progress_map.get(result.card_id),
+            params=srs_params,
+        )
+        progress_map[result.card_id] = progress
+        responses.append(review_response(result.card_id, progress))
+        if result.card_id not in answered:
+            answered.append(result.card_id)
+    session.answered_card_ids = answered
+
+    # Novos reservados e ainda pendentes seguram o cursor (ver `advance_new_card_cursor`)
+    advance_new_card_cursor(
+        db, current_user.id, deck, [card_id for card_id in answered if kinds[card_id] == "new"]
     )
 
-    next_due_at = (
-        base_query.filter(UserCardProgress.due_at != None)  # noqa: E711
-        .order_by(UserCardProgress.due_at)
-        .with_entities(UserCardProgress.due_at)
-        .first()
-    )
-    next_due_value = next_due_at[0] if next_due_at else None
+    db.commit()
+    return responses
+
 
-    return ReviewStats(due_count_today=due_today_count, next_due_at=next_due_value)
+@router.get("/decks/{deck_id}/review-stats", response_model=ReviewStats)
+def get_review_stats(
+    deck_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    deck = _ensure_deck_access(db.get(Deck, deck_id), current_user)
+    return review_stats(db, current_user.id, deck)
+
+
+def _check_stream_decks(db: Session, deck_ids: list[int], user: User) -> None:
+    decks = {deck.id: deck for deck in db.query(Deck).filter(Deck.id.in_(deck_ids))}
+    for deck_id in deck_ids:
+        _ensure_deck_access(decks.get(deck_id), user)
+    # O stream dura muito: não segura a sessão (nem a conexão) da requisição
+    db.close()
+
+
+@router.get("/me/review-stats/stream")
+async def stream_review_stats(
+    deck_id: list[int] = Query(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Server-sent events com as contagens de `GET /decks/{deck_id}/review-stats` de cada deck pedido.
+
+    Envia as contagens atuais ao conectar e depois um evento por deck sempre que mudam (revisões ou
+    cards vencendo), no lugar do polling.
+    """
+    deck_ids = list(dict.fromkeys(deck_id))
+    if len(deck_ids) > STREAM_MAX_DECKS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"At most {STREAM_MAX_DECKS} decks per stream")
+    await run_in_threadpool(_check_stream_decks, db, deck_ids, current_user)
+    return StreamingResponse(
+        review_stats_events(current_user.id, deck_ids),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.get("/me/review-log", response_model=list[ReviewLogRead])
@@ -0,0 +1,181 @@
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import case, select
+from sqlalchemy.orm import Session, joinedload
+
+from app.core.database import get_db
+from app.core.security import get_current_user
+from app.models import Card, Deck, Note, NoteFieldValue, User, UserCardProgress, UserDeckState
+from app.models.sync import current_sync_seq
+from app.schemas.sync import ProgressRead, SyncConflict, SyncPull, SyncPush, SyncPushResult
+from app.services.srs import load_user_srs_params
+from app.services.study import advance_new_card_cursor, record_review, render_card
+
+router = APIRouter(prefix="/me", tags=["sync"])
+
+
+def _readable_decks(user: User):
+    return (Deck.is_public == True) | (Deck.owner_id == user.id)  # noqa: E712
+
+
+def _synced_decks(user: User):
+    """Decks cujos cards vão no pull: os do usuário e os públicos que ele estuda (estado, progresso ou fork)."""
+    with_state = select(UserDeckState.deck_id).where(UserDeckState.user_id == user.id)
+    with_progress = (
+        select(Note.deck_id)
+        .join(Card, Card.note_id == Note.id)
+        .join(UserCardProgress, UserCardProgress.card_id == Card.id)
+        .where(UserCardProgress.user_id == user.id)
+        .distinct()
+    )
+    fork_sources = select(Deck.source_deck_id).where(Deck.owner_id == user.id, Deck.source_deck_id != None)  # noqa: E711
+    studied = Deck.id.in_(with_state) | Deck.id.in_(with_progress) | Deck.id.in_(fork_sources)
+    return (Deck.owner_id == user.id) | ((Deck.is_public == True) & studied)  # noqa: E712
+
+
+def _naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+@router.get("/sync", response_model=SyncPull)
+def pull_changes(
+    since: int = Query(0, ge=0),
+    limit: int = Query(500, ge=1, le=2000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    # Tudo que foi commitado até aqui tem seq <= head; mudanças em andamento recebem valores maiores
+    head = current_sync_seq(db)
+
+    # Card muda de renderização quando ele ou a nota mudam: vale o maior dos dois seqs
+    card_seq = case((Card.updated_seq > Note.updated_seq, Card.updated_seq), else_=Note.updated_seq)
+    progress_filter = (UserCardProgress.user_id == current_user.id,)
+    card_filter = (_synced_decks(current_user),)
+
+    # Cada fluxo é limitado em `limit` linhas; o token avança só até o menor seq alcançado por eles
+    streams = [
+        (
+            select(UserCardProgress.updated_seq).where(
+                *progress_filter, UserCardProgress.updated_seq > since, UserCardProgress.updated_seq <= head
+            ),
+            UserCardProgress.updated_seq,
+        ),
+        (
+            select(card_seq)
+            .select_from(Card)
+            .join(Note, Card.note_id == Note.id)
+            .join(Deck, Note.deck_id == Deck.id)
+            .where(*card_filter, card_seq > since, card_seq <= head),
+            card_seq,
+        ),
+    ]
+    frontiers = [db.scalar(query.order_by(seq).offset(limit - 1).limit(1)) for query, seq in streams]
+    bounded = [value for value in frontiers if value is not None]
+    token = min(bounded) if bounded else head
+    # Página cheia não basta: só há mais se algum fluxo tem mudança depois do token
+    has_more = bool(bounded) and any(db.scalar(select(query.where(seq > token).exists())) for query, seq in streams)
+
+    progresses = (
+        db.query(UserCardProgress)
+        .filter(*progress_filter, UserCardProgress.updated_seq > since, UserCardProgress.updated_seq <= token)
+        .order_by(UserCardProgress.updated_seq)
+        .all()
+    )
+    cards = (
+        db.query(Card)
+        .join(Note, Card.note_id == Note.id)
+        .join(Deck, Note.deck_id == Deck.id)
+        .options(
+            joinedload(Card.template),
+            joinedload(Card.note).joinedload(Note.field_values).joinedload(NoteFieldValue.field),
+            joinedload(Card.note).joinedload(Note.field_values).joinedload(NoteFieldValue.media_asset),
+            joinedload(Card.note).joinedload(Note.note_type),
+        )
+        .filter(*card_filter, card_seq > since, card_seq <= token)
+        .order_by(card_seq, Card.id)
+        .all()
+    )
+
+    return SyncPull(
+        token=token,
+        has_more=has_more,
+        progress=[ProgressRead.model_validate(p) for p in progresses],
+        cards=[render_card(card) for card in cards],
+    )
+
+
+@router.post("/sync", response_model=SyncPushResult)
+def push_reviews(
+    payload: SyncPush,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    if not payload.reviews:
+        return SyncPushResult(applied=0)
+
+    now = datetime.utcnow()
+    card_ids = {review.card_id for review in payload.reviews}
+    cards = {
+        card.id: card
+        for card in db.query(Card)
+        .join(Note, Card.note_id == Note.id)
+        .join(Deck, Note.deck_id == Deck.id)
+        .options(joinedload(Card.note).joinedload(Note.deck))
+        .filter(Card.id.in_(card_ids), _readable_decks(current_user))
+    }
+    progress_map = {
+        p.card_id: p
+        for p in db.query(UserCardProgress).filter(
+            UserCardProgress.user_id == current_user.id, UserCardProgress.card_id.in_(card_ids)
+        )
+    }
+
+    params_by_algorithm: dict[str, dict | None] = {}
+    introduced: dict[Deck, list[int]] = {}
+    conflicts: list[SyncConflict] = []
+    applied = 0
+
+    # Replay na ordem em que as revisões aconteceram no cliente
+    for review in sorted(payload.reviews, key=lambda r: _naive_utc(r.reviewed_at)):
+        reviewed_at = min(_naive_utc(review.reviewed_at), now)
+        card = cards.get(review.card_id)
+        if not card:
+            conflicts.append(SyncConflict(card_id=review.card_id, reviewed_at=review.reviewed_at, reason="card_not_found"))
+            continue
+
+        progress = progress_map.get(card.id)
+        last_reviewed_at = _naive_utc(progress.last_reviewed_at) if progress and progress.last_reviewed_at else None
+        if last_reviewed_at and reviewed_at <= last_reviewed_at:
+            # O servidor já tem uma revisão mais recente deste card: ela prevalece
+            conflicts.append(SyncConflict(card_id=card.id, reviewed_at=review.reviewed_at, reason="stale"))
+            continue
+
+        deck = card.note.deck
+        if deck.srs_algorithm not in params_by_algorithm:
+            params_by_algorithm[deck.srs_algorithm] = load_user_srs_params(db, current_user.id, deck.srs_algorithm)
+        if not progress:
+            introduced.setdefault(deck, []).append(card.id)
+
+        progress_map[card.id] = record_review(
+            db,
+            current_user.id,
+            deck,
+            card,
+            correct=review.correct,
+            initial=progress is None,
+            progress=progress,
+            params=params_by_algorithm[deck.srs_algorithm],
+            now=reviewed_at,
+        )
+        applied += 1
+
+    for deck, introduced_ids in introduced.items():
+        advance_new_card_cursor(db, current_user.id, deck, introduced_ids)
+
+    db.flush()
+    touched = [ProgressRead.model_validate(progress_map[card_id]) for card_id in card_ids if card_id in progress_map]
+    db.commit()
+    return SyncPushResult(applied=applied, conflicts=conflicts, progress=touched)
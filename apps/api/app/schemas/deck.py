@@ -13,6 +13,8 @@ class DeckBase(BaseModel):
     target_lang: str | None = None
     is_public: bool = False
     tags: list[str] = Field(default_factory=list)
+    srs_algorithm: str = "stages"
+    load_balance_due: bool = False
 
 
 class DeckCreate(DeckBase):
@@ -31,12 +33,20 @@ class DeckUpdate(BaseModel):
     is_public: bool | None = None
     tags: list[str] | None = None
     slug: str | None = None
+    srs_algorithm: str | None = None
+    load_balance_due: bool | None = None
+
+
+class DeckForkCreate(BaseModel):
+    name: str | None = None
+    slug: str | None = None
 
 
 class DeckRead(DeckBase):
     id: int
     slug: str
     owner_id: int | None = None
+    source_deck_id: int | None = None
     note_types: list[NoteTypeSummary] = Field(default_factory=list)
 
     model_config = {"from_attributes": True}
@@ -0,0 +1,25 @@
+from datetime import datetime
+from typing import Any
+
+from pydantic import BaseModel
+
+from app.models.enums import JobStatus
+
+
+class JobRead(BaseModel):
+    id: int
+    kind: str
+    status: JobStatus
+    progress: float
+    progress_message: str | None = None
+    result: dict[str, Any] | None = None
+    error: str | None = None
+    attempts: int
+    max_attempts: int
+    run_after: datetime
+    deck_id: int | None = None
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+    model_config = {"from_attributes": True}
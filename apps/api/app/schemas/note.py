@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import Any
 
 from pydantic import BaseModel, Field
 
@@ -11,10 +12,37 @@ class MediaAssetRead(BaseModel):
     file_name: str
     url: str
     media_type: MediaType | None = None
+    sha256: str | None = None
+    # size, mime_type e, conforme o tipo, width/height ou duration
+    metadata: dict[str, Any] = Field(default_factory=dict, validation_alias="metadata_json")
 
     model_config = {"from_attributes": True}
 
 
+class AudioSprite(BaseModel):
+    sha256: str
+    url: str
+    mime_type: str
+    size: int
+    duration: float
+
+
+class AudioSpriteClip(BaseModel):
+    # Índice em `sprites`; o trecho é [offset, offset + duration) em segundos
+    sprite: int
+    offset: float
+    duration: float
+
+
+class AudioSpritesRead(BaseModel):
+    deck_id: int
+    built_at: datetime
+    stale: bool = False
+    sprites: list[AudioSprite] = Field(default_factory=list)
+    # Chave: id do MediaAsset
+    clips: dict[int, AudioSpriteClip] = Field(default_factory=dict)
+
+
 class NoteFieldValueBase(BaseModel):
     field_id: int
     value_text: str | None = None
@@ -45,6 +73,32 @@ class NoteCreate(NoteBase):
     mnemonic: str | None = None
 
 
+class NoteUpdate(BaseModel):
+    tags: list[str] | None = None
+    field_values: list[NoteFieldValueCreate] | None = None
+    mnemonic: str | None = None
+
+
+class NoteImportItem(BaseModel):
+    # Valores por nome de campo; o sort field do note type identifica a nota no deck
+    fields: dict[str, str | None]
+    tags: list[str] | None = None
+    mnemonic: str | None = None
+
+
+class NoteImport(BaseModel):
+    deck_id: int
+    note_type_id: int
+    notes: list[NoteImportItem] = Field(..., max_length=1000)
+
+
+class NoteImportResult(BaseModel):
+    created: int
+    updated: int
+    # Id da nota de cada item, na ordem enviada
+    note_ids: list[int]
+
+
 class NoteRead(NoteBase):
     id: int
     created_at: datetime | None = None
@@ -59,6 +59,8 @@ class CardTemplateUpdate(BaseModel):
 class CardTemplateRead(CardTemplateBase):
     id: int
     note_type_id: int
+    # Job que aplica a mudança aos cards existentes quando o note type tem muitas notas
+    propagation_job_id: int | None = None
 
     model_config = {"from_attributes": True}
 
@@ -35,6 +35,44 @@ class ReviewResponse(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class TypedAnswer(BaseModel):
+    answer: str = Field(..., max_length=200)
+
+
+class AnswerResponse(ReviewResponse):
+    correct: bool
+    # Aceita com erro de digitação (distância de edição dentro do limite)
+    close_match: bool = False
+    expected: str
+
+
 class ReviewStats(BaseModel):
     due_count_today: int
+    # Devidas já (due_at <= agora); due_count_today inclui as que vencem até o fim do dia
+    due_now_count: int = 0
     next_due_at: datetime | None = None
+
+
+class DeckReviewStats(ReviewStats):
+    """Evento de `GET /me/review-stats/stream`."""
+
+    deck_id: int
+
+
+class StudySessionCreate(BaseModel):
+    new_limit: int = Field(10, ge=0, le=50)
+    review_limit: int = Field(20, ge=0, le=100)
+    batch_size: int = Field(5, ge=1, le=50)
+
+
+class StudySessionBatch(BaseModel):
+    id: str
+    deck_id: int
+    total: int
+    remaining: int
+    expires_at: datetime
+    cards: list[RenderedCard] = Field(default_factory=list)
+
+
+class StudySessionAnswers(BaseModel):
+    results: list[StudyResult]
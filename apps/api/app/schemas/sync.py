@@ -0,0 +1,50 @@
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+from app.models.enums import CardStatus, LearningStage
+from app.schemas.card import RenderedCard
+
+
+class ProgressRead(BaseModel):
+    card_id: int
+    status: CardStatus
+    stage: LearningStage | None = None
+    srs_interval: int | None = None
+    srs_ease: float | None = None
+    due_at: datetime | None = None
+    last_reviewed_at: datetime | None = None
+    lapses: int
+    reps: int
+    updated_seq: int
+
+    model_config = {"from_attributes": True}
+
+
+class SyncPull(BaseModel):
+    token: int
+    has_more: bool = False
+    progress: list[ProgressRead] = Field(default_factory=list)
+    cards: list[RenderedCard] = Field(default_factory=list)
+
+
+class OfflineReview(BaseModel):
+    card_id: int
+    correct: bool
+    reviewed_at: datetime
+
+
+class SyncPush(BaseModel):
+    reviews: list[OfflineReview]
+
+
+class SyncConflict(BaseModel):
+    card_id: int
+    reviewed_at: datetime
+    reason: str
+
+
+class SyncPushResult(BaseModel):
+    applied: int
+    conflicts: list[SyncConflict] = Field(default_factory=list)
+    progress: list[ProgressRead] = Field(default_factory=list)
@@ -0,0 +1,147 @@
+"""Correção de respostas digitadas (`POST /cards/{card_id}/answer`).
+
+As respostas aceitas de cada nota são pré-compiladas (chave em romaji via `packages.core.kana`) e
+ficam num LRU em memória indexado por `(note_id, updated_seq, campos)`, em que `campos` resume o que
+decide o campo de resposta no tipo de nota (id, nome e `config.answer` de cada campo). Editar a nota
+muda o seq e editar os campos muda o resumo, então a entrada antiga simplesmente deixa de ser usada
+(em todos os workers, sem invalidação explícita). A comparação é exata contra o conjunto e, se falhar,
+por distância de edição limitada (poucos erros de digitação), o que mantém a correção bem abaixo de
+1 ms por resposta.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session, joinedload
+
+from app.models import Note, NoteField, NoteFieldValue
+from packages.core.kana import romaji_key
+
+# Campo usado como resposta quando nenhum tem `config.answer = true`
+DEFAULT_ANSWER_FIELDS = ("answer", "resposta", "romaji")
+ANSWER_CACHE_SIZE = 4096
+
+_SEPARATORS = re.compile(r"[,;/|\n]")
+_IGNORED = re.compile(r"[\s'’\-.!?]")
+
+
+@dataclass(frozen=True)
+class AcceptedAnswers:
+    expected: str
+    keys: frozenset[str]
+
+
+@dataclass(frozen=True)
+class Grade:
+    correct: bool
+    close_match: bool
+    expected: str
+
+
+class _AnswerCache:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[tuple, AcceptedAnswers] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> AcceptedAnswers | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: tuple, entry: AcceptedAnswers) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+answer_cache = _AnswerCache(ANSWER_CACHE_SIZE)
+
+
+def answer_key(text: str) -> str:
+    """Chave de comparação: romaji canônico sem espaços/pontuação ("Shi", "し", "シ " -> "shi")."""
+    return _IGNORED.sub("", romaji_key(text))
+
+
+def bounded_edit_distance(a: str, b: str, limit: int) -> int | None:
+    """Distância de Levenshtein se for <= limit; None caso contrário (com corte antecipado)."""
+    if abs(len(a) - len(b)) > limit:
+        return None
+    if len(a) > len(b):
+        a, b = b, a
+    previous = list(range(len(a) + 1))
+    for i, char_b in enumerate(b, start=1):
+        current = [i]
+        for j, char_a in enumerate(a, start=1):
+            current.append(
+                min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b))
+            )
+        if min(current) > limit:
+            return None
+        previous = current
+    return previous[-1] if previous[-1] <= limit else None
+
+
+def allowed_typos(key: str) -> int:
+    if len(key) <= 3:
+        return 0
+    return 1 if len(key) <= 7 else 2
+
+
+def _answer_field_value(note: Note) -> str:
+    values = [value for value in note.field_values if value.field and value.value_text]
+    for value in values:
+        if (value.field.config or {}).get("answer"):
+            return value.value_text
+    by_name = {value.field.name: value.value_text for value in values}
+    for name in DEFAULT_ANSWER_FIELDS:
+        if by_name.get(name):
+            return by_name[name]
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Card has no answer field")
+
+
+def _answer_fields_signature(db: Session, note_type_id: int) -> tuple:
+    rows = (
+        db.query(NoteField.id, NoteField.name, NoteField.config)
+        .filter(NoteField.note_type_id == note_type_id)
+        .order_by(NoteField.id)
+    )
+    return tuple((field_id, name, bool((config or {}).get("answer"))) for field_id, name, config in rows)
+
+
+def accepted_answers(db: Session, note: Note) -> AcceptedAnswers:
+    cache_key = (note.id, note.updated_seq or 0, _answer_fields_signature(db, note.note_type_id))
+    entry = answer_cache.get(cache_key)
+    if entry is not None:
+        return entry
+
+    note = (
+        db.query(Note)
+        .options(joinedload(Note.field_values).joinedload(NoteFieldValue.field))
+        .filter(Note.id == note.id)
+        .one()
+    )
+    expected = _answer_field_value(note)
+    # "shi / si" ou "gato, neko" viram alternativas aceitas
+    keys = frozenset(key for key in (answer_key(part) for part in _SEPARATORS.split(expected)) if key)
+    entry = AcceptedAnswers(expected=expected, keys=keys)
+    answer_cache.put(cache_key, entry)
+    return entry
+
+
+def grade_answer(accepted: AcceptedAnswers, given: str) -> Grade:
+    key = answer_key(given)
+    if key in accepted.keys:
+        return Grade(correct=True, close_match=False, expected=accepted.expected)
+    if key:
+        for candidate in accepted.keys:
+            if bounded_edit_distance(key, candidate, allowed_typos(candidate)) is not None:
+                return Grade(correct=True, close_match=True, expected=accepted.expected)
+    return Grade(correct=False, close_match=False, expected=accepted.expected)
@@ -0,0 +1,276 @@
+"""Pipeline de áudio gerado (TTS) para cards.
+
+Cada item passa por: síntese num backend plugável -> normalização de loudness -> codificação
+compacta (Opus), com os itens processados em paralelo por um pool limitado de threads (o trabalho
+pesado fica no serviço de TTS ou no ffmpeg, fora do GIL). Um `manifest.json` no diretório de saída
+guarda, por item, o hash das entradas (texto, backend, codificador) e os arquivos gerados com
+tamanho e duração; reexecutar só refaz o que mudou.
+
+Com ffmpeg no PATH a normalização usa o filtro `loudnorm` (EBU R128) e gera `<nome>.mp3` +
+`<nome>.opus`. Sem ffmpeg, WAVs (backend offline) são normalizados em Python pelo RMS e MP3s
+ficam como vieram (`normalized: false` no manifest).
+"""
+
+import array
+import hashlib
+import json
+import logging
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import wave
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+from app.services.media import audio_duration, sniff_file
+
+logger = logging.getLogger(__name__)
+
+# Mudar quando a cadeia de processamento mudar, para invalidar o manifest
+PIPELINE_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+TARGET_LUFS = -16.0
+# Alvo aproximado quando não há ffmpeg (RMS em dBFS, próximo de -16 LUFS para fala)
+TARGET_RMS_DBFS = -18.0
+MP3_BITRATE = "64k"
+OPUS_BITRATE = "24k"
+DEFAULT_WORKERS = 4
+
+
+@dataclass(frozen=True)
+class AudioItem:
+    """Um arquivo a gerar: `name` vira o nome do arquivo (ex.: romaji), `text` é o que será falado."""
+
+    name: str
+    text: str
+    lang: str = "ja"
+
+
+class TTSBackend(ABC):
+    """Interface dos backends: `synthesize` grava o áudio bruto em `dest` (formato em `extension`)."""
+
+    name = ""
+    extension = ""
+
+    def signature(self) -> str:
+        """Identifica voz/configuração; entra no hash do manifest."""
+        return self.name
+
+    @abstractmethod
+    def synthesize(self, text: str, lang: str, dest: Path) -> None:
+        ...
+
+
+class GTTSBackend(TTSBackend):
+    """Google TTS via gTTS (rede); devolve MP3."""
+
+    name = "gtts"
+    extension = "mp3"
+
+    def synthesize(self, text: str, lang: str, dest: Path) -> None:
+        try:
+            from gtts import gTTS
+        except ImportError as exc:
+            raise RuntimeError("Instale gTTS primeiro: pip install gTTS") from exc
+        gTTS(text=text, lang=lang).save(str(dest))
+
+
+class OfflineBackend(TTSBackend):
+    """Substituto local e determinístico de um motor de TTS offline: gera um WAV PCM com uma
+    sequência de tons derivada do texto (dois por caractere). Serve para desenvolvimento, CI e
+    para exercitar o pipeline sem rede."""
+
+    name = "offline"
+    extension = "wav"
+    sample_rate = 22050
+    syllable_seconds = 0.18
+
+    def synthesize(self, text: str, lang: str, dest: Path) -> None:
+        samples = array.array("h")
+        frames = int(self.sample_rate * self.syllable_seconds / 2)
+        for char in text or " ":
+            # Dois tons por caractere, para que caracteres diferentes quase nunca soem iguais
+            digest = hashlib.blake2b(f"{lang}:{char}".encode("utf-8"), digest_size=4).digest()
+            tones = (180 + int.from_bytes(digest[:2], "big") % 320, 180 + int.from_bytes(digest[2:], "big") % 320)
+            for frequency in tones:
+                for index in range(frames):
+                    # Envelope senoidal evita cliques entre os tons
+                    envelope = math.sin(math.pi * index / frames)
+                    value = 0.3 * envelope * math.sin(2 * math.pi * frequency * index / self.sample_rate)
+                    samples.append(int(value * 32767))
+        with wave.open(str(dest), "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(self.sample_rate)
+            wav.writeframes(samples.tobytes())
+
+
+BACKENDS: dict[str, type[TTSBackend]] = {
+    GTTSBackend.name: GTTSBackend,
+    OfflineBackend.name: OfflineBackend,
+}
+
+
+def get_backend(name: str) -> TTSBackend:
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Backend de TTS desconhecido: {name} (opções: {', '.join(BACKENDS)})") from None
+
+
+def ffmpeg_path() -> str | None:
+    return shutil.which("ffmpeg")
+
+
+def encoder_signature() -> str:
+    return f"ffmpeg:{TARGET_LUFS}:{MP3_BITRATE}:{OPUS_BITRATE}" if ffmpeg_path() else f"python:{TARGET_RMS_DBFS}"
+
+
+def item_key(item: AudioItem, backend: TTSBackend) -> str:
+    payload = json.dumps(
+        [PIPELINE_VERSION, backend.signature(), encoder_signature(), item.lang, item.text],
+        ensure_ascii=False,
+    )
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _normalize_wav(source: Path, dest: Path) -> None:
+    """Normalização por RMS (ganho único, limitado para não clipar) de um WAV PCM 16 bits."""
+    with wave.open(str(source), "rb") as wav:
+        params = wav.getparams()
+        samples = array.array("h", wav.readframes(wav.getnframes()))
+    if params.sampwidth != 2:
+        shutil.copyfile(source, dest)
+        return
+    if sys.byteorder == "big":
+        samples.byteswap()
+    if samples:
+        rms = math.sqrt(sum(value * value for value in samples) / len(samples)) / 32768
+        peak = max(abs(value) for value in samples) / 32768
+        if rms > 0:
+            gain = min(10 ** (TARGET_RMS_DBFS / 20) / rms, 0.99 / peak)
+            samples = array.array("h", (int(value * gain) for value in samples))
+    if sys.byteorder == "big":
+        samples.byteswap()
+    with wave.open(str(dest), "wb") as out:
+        out.setparams(params)
+        out.writeframes(samples.tobytes())
+
+
+def _ffmpeg(source: Path, dest: Path, *codec: str) -> None:
+    subprocess.run(
+        [
+            ffmpeg_path() or "ffmpeg", "-nostdin", "-loglevel", "error", "-y", "-i", str(source),
+            "-af", f"loudnorm=I={TARGET_LUFS}:TP=-1.5:LRA=11", "-ac", "1", *codec, str(dest),
+        ],
+        check=True,
+    )
+
+
+def _encode(raw: Path, extension: str, work_dir: Path) -> tuple[list[Path], bool]:
+    """Normaliza e codifica; devolve os arquivos gerados (principal primeiro) e se houve normalização."""
+    if ffmpeg_path():
+        mp3 = work_dir / "out.mp3"
+        opus = work_dir / "out.opus"
+        _ffmpeg(raw, mp3, "-c:a", "libmp3lame", "-b:a", MP3_BITRATE)
+        _ffmpeg(raw, opus, "-c:a", "libopus", "-b:a", OPUS_BITRATE, "-application", "voip")
+        return [mp3, opus], True
+    out = work_dir / f"out.{extension}"
+    if sniff_file(raw) == "audio/wav":
+        _normalize_wav(raw, out)
+        return [out], True
+    shutil.copyfile(raw, out)
+    return [out], False
+
+
+def _process(item: AudioItem, backend: TTSBackend, out_dir: Path, key: str) -> dict[str, Any]:
+    with tempfile.TemporaryDirectory(dir=out_dir, prefix=".tts-") as tmp:
+        work_dir = Path(tmp)
+        raw = work_dir / f"raw.{backend.extension}"
+        backend.synthesize(item.text, item.lang, raw)
+        outputs, normalized = _encode(raw, backend.extension, work_dir)
+        files = []
+        for output in outputs:
+            final = out_dir / f"{item.name}{output.suffix}"
+            os.replace(output, final)
+            files.append(
+                {
+                    "file": final.name,
+                    "mime_type": sniff_file(final),
+                    "size": final.stat().st_size,
+                    "duration": audio_duration(final),
+                }
+            )
+    return {"key": key, "text": item.text, "backend": backend.name, "normalized": normalized, "files": files}
+
+
+def load_manifest(out_dir: Path) -> dict[str, dict[str, Any]]:
+    path = out_dir / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _save_manifest(out_dir: Path, manifest: dict[str, dict[str, Any]]) -> None:
+    path = out_dir / MANIFEST_NAME
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _is_current(entry: dict[str, Any] | None, key: str, out_dir: Path) -> bool:
+    return bool(entry) and entry.get("key") == key and all((out_dir / f["file"]).exists() for f in entry["files"])
+
+
+def generate_audio(
+    items: list[AudioItem],
+    out_dir: Path,
+    backend: TTSBackend,
+    workers: int = DEFAULT_WORKERS,
+    force: bool = False,
+    progress: Callable[[AudioItem, str], None] | None = None,
+) -> dict[str, int]:
+    """Gera os itens em paralelo (no máximo `workers` simultâneos), pulando os inalterados.
+
+    `progress(item, status)` recebe "skipped", "generated" ou "failed". O manifest é gravado
+    mesmo se alguns itens falharem, para que a próxima execução retome só o que faltou.
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest(out_dir)
+    summary = {"generated": 0, "skipped": 0, "failed": 0}
+
+    pending: list[tuple[AudioItem, str]] = []
+    for item in items:
+        key = item_key(item, backend)
+        if not force and _is_current(manifest.get(item.name), key, out_dir):
+            summary["skipped"] += 1
+            if progress:
+                progress(item, "skipped")
+        else:
+            pending.append((item, key))
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = {pool.submit(_process, item, backend, out_dir, key): item for item, key in pending}
+            for future in as_completed(futures):
+                item = futures[future]
+                try:
+                    manifest[item.name] = future.result()
+                except Exception:  # noqa: BLE001 - um item com erro não interrompe o lote
+                    logger.exception("Falha ao gerar áudio de %s", item.name)
+                    summary["failed"] += 1
+                    if progress:
+                        progress(item, "failed")
+                    continue
+                summary["generated"] += 1
+                if progress:
+                    progress(item, "generated")
+    finally:
+        _save_manifest(out_dir, manifest)
+    return summary
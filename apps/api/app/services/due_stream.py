@@ -0,0 +1,226 @@
+"""Contagens de revisão ao vivo por SSE (`GET /me/review-stats/stream`), sem polling.
+
+Cada processo da API mantém um hub com as assinaturas abertas (usuário + decks). As contagens de uma
+assinatura são recalculadas só quando podem ter mudado:
+
+- revisões: um listener de sessão anota os usuários cujo progresso foi gravado e, no commit, avisa o
+  hub (revisões do próprio processo chegam na hora);
+- tempo: uma roda de temporização (hashed timing wheel) agenda cada assinatura para o próximo
+  `due_at` dos seus decks ou a virada do dia, o que vier antes, limitado a `DUE_STREAM_REFRESH_SECONDS`
+  (que também cobre revisões feitas em outros workers).
+
+Um tick por segundo avança a roda em O(1) por slot, qualquer que seja o número de assinaturas, e só
+as vencidas vão ao banco. Evento só é enviado quando as contagens de um deck mudam.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from collections.abc import AsyncIterator, Hashable
+from datetime import datetime, timedelta
+from itertools import chain
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models import Deck, UserCardProgress
+from app.schemas.study import DeckReviewStats
+from app.services.study import review_stats_with_next_change
+
+WHEEL_SLOTS = 512
+WHEEL_TICK_SECONDS = 1.0
+SESSION_INFO_KEY = "due_stream_users"
+
+logger = logging.getLogger(__name__)
+
+
+class TimerWheel:
+    """Roda de temporização: `slots` posições de `tick` segundos; prazos além de uma volta contam rodadas."""
+
+    def __init__(self, slots: int = WHEEL_SLOTS, tick: float = WHEEL_TICK_SECONDS) -> None:
+        self.tick = tick
+        self.slots: list[dict[Hashable, int]] = [{} for _ in range(slots)]
+        self.positions: dict[Hashable, int] = {}
+        self.cursor = 0
+
+    def schedule(self, key: Hashable, delay: float) -> None:
+        """(Re)agenda `key` para daqui a `delay` segundos (no mínimo um tick); substitui o agendamento anterior."""
+        self.cancel(key)
+        ticks = max(1, math.ceil(delay / self.tick))
+        slot = (self.cursor + ticks) % len(self.slots)
+        self.slots[slot][key] = (ticks - 1) // len(self.slots)
+        self.positions[key] = slot
+
+    def cancel(self, key: Hashable) -> None:
+        slot = self.positions.pop(key, None)
+        if slot is not None:
+            self.slots[slot].pop(key, None)
+
+    def advance(self) -> list[Hashable]:
+        """Avança um tick e devolve as chaves vencidas."""
+        self.cursor = (self.cursor + 1) % len(self.slots)
+        bucket = self.slots[self.cursor]
+        expired = [key for key, rounds in bucket.items() if rounds == 0]
+        for key in list(bucket):
+            if bucket[key] == 0:
+                del bucket[key]
+                del self.positions[key]
+            else:
+                bucket[key] -= 1
+        return expired
+
+
+class Subscription:
+    def __init__(self, user_id: int, deck_ids: list[int]) -> None:
+        self.user_id = user_id
+        self.deck_ids = deck_ids
+        self.queue: asyncio.Queue[DeckReviewStats | None] = asyncio.Queue()
+        self.last: dict[int, DeckReviewStats] = {}
+        self.refreshing = False
+        self.pending = False
+
+
+def _compute(user_id: int, deck_ids: list[int]) -> tuple[list[DeckReviewStats], float]:
+    """Contagens dos decks e em quantos segundos recalcular (roda no threadpool)."""
+    now = datetime.utcnow()
+    stats: list[DeckReviewStats] = []
+    next_change = now + timedelta(seconds=settings.DUE_STREAM_REFRESH_SECONDS)
+    with SessionLocal() as db:
+        # Decks carregados de uma vez; depois uma consulta por deck (contagens e próxima mudança juntas)
+        decks = {deck.id: deck for deck in db.scalars(select(Deck).where(Deck.id.in_(deck_ids)))}
+        for deck in (decks[deck_id] for deck_id in deck_ids if deck_id in decks):
+            deck_stats, deck_change = review_stats_with_next_change(db, user_id, deck, now)
+            stats.append(DeckReviewStats(deck_id=deck.id, **deck_stats.model_dump()))
+            next_change = min(next_change, deck_change)
+    return stats, (next_change - now).total_seconds()
+
+
+class DueStreamHub:
+    def __init__(self) -> None:
+        self.subscriptions: dict[int, set[Subscription]] = {}
+        self.wheel = TimerWheel()
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.ticker: asyncio.Task | None = None
+
+    async def subscribe(self, user_id: int, deck_ids: list[int]) -> Subscription:
+        self.loop = asyncio.get_running_loop()
+        if self.ticker is None or self.ticker.done():
+            self.ticker = asyncio.create_task(self._tick())
+        subscription = Subscription(user_id, deck_ids)
+        self.subscriptions.setdefault(user_id, set()).add(subscription)
+        await self._refresh(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self.wheel.cancel(subscription)
+        subscriptions = self.subscriptions.get(subscription.user_id)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self.subscriptions[subscription.user_id]
+
+    def notify(self, user_ids: set[int]) -> None:
+        """Progresso dos usuários mudou (chamado de qualquer thread, após o commit)."""
+        loop = self.loop
+        watched = [user_id for user_id in user_ids if user_id in self.subscriptions]
+        if loop is None or not watched or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(self._refresh_users, watched)
+
+    def _refresh_users(self, user_ids: list[int]) -> None:
+        for user_id in user_ids:
+            for subscription in list(self.subscriptions.get(user_id, ())):
+                asyncio.create_task(self._refresh(subscription))
+
+    async def _refresh(self, subscription: Subscription) -> None:
+        # Uma consulta por vez por assinatura; avisos durante a consulta viram uma única repetição
+        if subscription.refreshing:
+            subscription.pending = True
+            return
+        subscription.refreshing = True
+        try:
+            while True:
+                subscription.pending = False
+                try:
+                    stats, delay = await run_in_threadpool(_compute, subscription.user_id, subscription.deck_ids)
+                except Exception:  # noqa: BLE001 - banco indisponível: tenta de novo no próximo refresh
+                    logger.exception("Failed to refresh review stats for user %s", subscription.user_id)
+                    stats, delay = [], settings.DUE_STREAM_REFRESH_SECONDS
+                for item in stats:
+                    if subscription.last.get(item.deck_id) != item:
+                        subscription.last[item.deck_id] = item
+                        subscription.queue.put_nowait(item)
+                if not subscription.pending:
+                    break
+        finally:
+            subscription.refreshing = False
+        if subscription in self.subscriptions.get(subscription.user_id, ()):
+            self.wheel.schedule(subscription, delay)
+
+    async def _tick(self) -> None:
+        # Avança pelo relógio monotônico: atrasos do loop não acumulam deriva
+        next_tick = time.monotonic() + self.wheel.tick
+        while self.subscriptions:
+            await asyncio.sleep(max(0.0, next_tick - time.monotonic()))
+            while next_tick <= time.monotonic():
+                next_tick += self.wheel.tick
+                for subscription in self.wheel.advance():
+                    asyncio.create_task(self._refresh(subscription))
+        self.ticker = None
+
+    async def close(self) -> None:
+        """Encerra os streams abertos (shutdown da aplicação)."""
+        for subscription in chain.from_iterable(list(self.subscriptions.values())):
+            subscription.queue.put_nowait(None)
+        if self.ticker is not None:
+            self.ticker.cancel()
+            self.ticker = None
+
+
+hub = DueStreamHub()
+
+
+async def review_stats_events(user_id: int, deck_ids: list[int]) -> AsyncIterator[str]:
+    """Corpo `text/event-stream`: um evento `review-stats` por deck sempre que as contagens mudam."""
+    subscription = await hub.subscribe(user_id, deck_ids)
+    try:
+        yield f"retry: {settings.DUE_STREAM_RETRY_MS}\n\n"
+        while True:
+            try:
+                item = await asyncio.wait_for(subscription.queue.get(), timeout=settings.DUE_STREAM_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                # Comentário SSE: mantém a conexão viva em proxies que cortam conexões ociosas
+                yield ": keepalive\n\n"
+                continue
+            if item is None:
+                return
+            yield f"event: review-stats\ndata: {item.model_dump_json()}\n\n"
+    finally:
+        hub.unsubscribe(subscription)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_progress_users(session: Session, flush_context) -> None:
+    user_ids = {
+        obj.user_id
+        for obj in chain(session.new, session.dirty, session.deleted)
+        if isinstance(obj, UserCardProgress)
+    }
+    if user_ids:
+        session.info.setdefault(SESSION_INFO_KEY, set()).update(user_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_progress_users(session: Session) -> None:
+    user_ids = session.info.pop(SESSION_INFO_KEY, None)
+    if user_ids:
+        hub.notify(user_ids)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_progress_users(session: Session, previous_transaction) -> None:
+    session.info.pop(SESSION_INFO_KEY, None)
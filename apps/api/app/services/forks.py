@@ -0,0 +1,152 @@
+"""Forks copy-on-write de decks.
+
+Um fork (`Deck.source_deck_id`) nasce sem notas: as notas, valores de campo, cards, tipos de nota e
+mídia da origem valem nele por referência. Editar uma nota da origem dentro do fork a materializa
+(`materialize_notes`): a cópia fica no fork com `origin_note_id` apontando para a original, que
+deixa de aparecer ali. O progresso do dono do fork nos cards da origem é copiado para os cards novos,
+então nada se perde. Consultas por deck usam `deck_note_filter` em vez de `Note.deck_id == ...`; os
+filtros recebem o `Deck` já carregado pela rota (checagem de acesso), sem consultar a origem de novo.
+"""
+
+from sqlalchemy import and_, exists, inspect, or_, select
+from sqlalchemy.orm import Session, aliased, selectinload
+
+from app.models import Card, Deck, Note, NoteFieldValue, NoteSearchIndex, UserCardProgress
+from app.services.search import index_notes
+
+# Colunas SRS copiadas do card original (o card copiado continua do ponto em que estava)
+CARD_STATE_COLUMNS = (
+    "mnemonic",
+    "status",
+    "stage",
+    "srs_interval",
+    "srs_ease",
+    "due_at",
+    "last_reviewed_at",
+    "lapses",
+    "reps",
+    "preview",
+)
+
+
+def deck_scope(deck: Deck) -> list[int]:
+    """Decks cujas notas, tipos de nota e mídia são visíveis no deck (ele e, num fork, a origem)."""
+    return [deck.id] if deck.source_deck_id is None else [deck.id, deck.source_deck_id]
+
+
+def deck_note_filter(deck: Deck):
+    """Filtro de `Note` para as notas do deck; num fork, inclui as da origem ainda não materializadas."""
+    if deck.source_deck_id is None:
+        return Note.deck_id == deck.id
+    shadow = aliased(Note)
+    return or_(
+        Note.deck_id == deck.id,
+        and_(
+            Note.deck_id == deck.source_deck_id,
+            ~exists().where(shadow.deck_id == deck.id, shadow.origin_note_id == Note.id),
+        ),
+    )
+
+
+def deck_search_filter(deck: Deck):
+    """Mesmo recorte de `deck_note_filter` para o índice de busca."""
+    if deck.source_deck_id is None:
+        return NoteSearchIndex.deck_id == deck.id
+    shadow = aliased(Note)
+    return and_(
+        NoteSearchIndex.deck_id.in_(deck_scope(deck)),
+        ~exists().where(shadow.deck_id == deck.id, shadow.origin_note_id == NoteSearchIndex.note_id),
+    )
+
+
+def materialize_notes(db: Session, deck: Deck, notes: list[Note]) -> dict[int, Note]:
+    """Copia as notas (com valores e cards) para `deck`; devolve {id original: cópia} (sem commit).
+
+    Notas da origem do fork viram cópias com `origin_note_id` = original. Notas de outro fork
+    (ao forkar um fork) mantêm o `origin_note_id` delas. O progresso do dono do fork vai junto.
+    """
+    copies: dict[int, Note] = {}
+    card_pairs: list[tuple[int, Card]] = []
+    for note in notes:
+        copy = Note(
+            deck_id=deck.id,
+            note_type_id=note.note_type_id,
+            tags=list(note.tags or []),
+            content_hash=note.content_hash,
+            origin_note_id=note.id if note.deck_id == deck.source_deck_id else note.origin_note_id,
+        )
+        for value in note.field_values:
+            copy.field_values.append(
+                NoteFieldValue(field_id=value.field_id, value_text=value.value_text, media_asset_id=value.media_asset_id)
+            )
+        for card in note.cards:
+            new_card = Card(
+                card_template_id=card.card_template_id,
+                **{column: getattr(card, column) for column in CARD_STATE_COLUMNS},
+            )
+            copy.cards.append(new_card)
+            card_pairs.append((card.id, new_card))
+        db.add(copy)
+        copies[note.id] = copy
+    db.flush()
+
+    if card_pairs:
+        new_by_old = {old_id: new_card.id for old_id, new_card in card_pairs}
+        columns = [column.key for column in inspect(UserCardProgress).column_attrs if column.key not in ("card_id", "updated_seq")]
+        for progress in db.scalars(
+            select(UserCardProgress).where(
+                UserCardProgress.user_id == deck.owner_id, UserCardProgress.card_id.in_(list(new_by_old))
+            )
+        ):
+            db.add(
+                UserCardProgress(
+                    card_id=new_by_old[progress.card_id], **{column: getattr(progress, column) for column in columns}
+                )
+            )
+    index_notes(db, [(copy, [value.value_text for value in copy.field_values]) for copy in copies.values()])
+    db.flush()
+    return copies
+
+
+def _load_for_copy(db: Session, note_filter) -> list[Note]:
+    return (
+        db.query(Note)
+        .options(selectinload(Note.field_values), selectinload(Note.cards))
+        .filter(note_filter)
+        .order_by(Note.id)
+        .all()
+    )
+
+
+def fork_deck(db: Session, source: Deck, owner_id: int, name: str | None, slug: str) -> Deck:
+    """Cria o fork privado de `source` (sem commit). Custa uma linha, mais as notas próprias se `source` já for fork."""
+    root_id = source.source_deck_id or source.id
+    fork = Deck(
+        name=name or source.name,
+        slug=slug,
+        description=source.description,
+        description_md=source.description_md,
+        cover_image_url=source.cover_image_url,
+        instructions_md=source.instructions_md,
+        source_lang=source.source_lang,
+        target_lang=source.target_lang,
+        tags=list(source.tags or []),
+        srs_algorithm=source.srs_algorithm,
+        load_balance_due=source.load_balance_due,
+        is_public=False,
+        owner_id=owner_id,
+        source_deck_id=root_id,
+    )
+    db.add(fork)
+    db.flush()
+    if source.source_deck_id:
+        # Fork de fork: referencia a mesma origem e copia só o que o fork intermediário já tinha de próprio
+        materialize_notes(db, fork, _load_for_copy(db, Note.deck_id == source.id))
+    return fork
+
+
+def ensure_own_notes(db: Session, deck: Deck, notes: list[Note]) -> dict[int, Note]:
+    """Para edições: notas de outro deck (a origem do fork) são materializadas; devolve {id pedido: nota editável}."""
+    foreign = [note for note in notes if note.deck_id != deck.id]
+    copies = materialize_notes(db, deck, foreign) if foreign else {}
+    return {note.id: copies.get(note.id, note) for note in notes}
@@ -0,0 +1,120 @@
+"""Derivados de imagem (larguras menores em WebP/AVIF) para mídia de cards.
+
+A codificação roda num pool de processos (CPU pura, fora do event loop e do GIL); o processo pai só
+grava os bytes resultantes como blobs endereçados por conteúdo (`app.services.media`). Os derivados
+ficam em `MediaAsset.metadata_json["variants"]` e `render_template` os usa para emitir `srcset`.
+
+Requer Pillow; sem ele (ou para formatos não suportados) nenhum derivado é gerado.
+"""
+
+import asyncio
+import io
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+from app.services.media import StoredBlob, media_url, store_file
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVE_WIDTHS = (160, 320, 640)
+WEBP_QUALITY = 80
+AVIF_QUALITY = 60
+# Formatos de origem que vale a pena redimensionar (GIF pode ser animado; fica como está)
+SOURCE_MIME_TYPES = {"image/png", "image/jpeg", "image/webp"}
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=max(1, min(4, os.cpu_count() or 1)))
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def encode_variants(path: str, widths: tuple[int, ...] = DERIVATIVE_WIDTHS) -> list[dict[str, Any]]:
+    """Roda no worker: redimensiona e codifica; devolve [{width, height, mime_type, data}]."""
+    try:
+        from PIL import Image, features
+    except ImportError:
+        return []
+
+    formats = [("WEBP", "image/webp", {"quality": WEBP_QUALITY, "method": 4})]
+    if features.check("avif"):
+        formats.append(("AVIF", "image/avif", {"quality": AVIF_QUALITY}))
+
+    encoded: list[dict[str, Any]] = []
+    with Image.open(path) as image:
+        image.load()
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info or image.mode in ("LA", "P") else "RGB")
+        # Sempre uma versão WebP no tamanho original, mais as larguras menores que a original
+        targets = [width for width in widths if width < image.width] + [image.width]
+        for width in targets:
+            height = max(1, round(image.height * width / image.width))
+            resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+            for pil_format, mime, options in formats:
+                buffer = io.BytesIO()
+                resized.save(buffer, pil_format, **options)
+                encoded.append({"width": width, "height": height, "mime_type": mime, "data": buffer.getvalue()})
+    return encoded
+
+
+def _store_variants(encoded: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    variants = []
+    for item in encoded:
+        blob = store_file(io.BytesIO(item["data"]))
+        variants.append(
+            {
+                "width": item["width"],
+                "height": item["height"],
+                "mime_type": item["mime_type"],
+                "size": blob.size,
+                "sha256": blob.sha256,
+                "url": media_url(blob.sha256),
+            }
+        )
+    return variants
+
+
+def _safe_encode(path: str) -> list[dict[str, Any]]:
+    try:
+        return encode_variants(path)
+    except Exception:  # noqa: BLE001 - imagem corrompida não deve derrubar o upload
+        logger.exception("Falha ao gerar derivados de %s", path)
+        return []
+
+
+async def build_variants_async(blob: StoredBlob, mime: str) -> list[dict[str, Any]]:
+    """Para o upload: codifica no pool sem bloquear o event loop."""
+    if mime not in SOURCE_MIME_TYPES:
+        return []
+    loop = asyncio.get_running_loop()
+    encoded = await loop.run_in_executor(get_pool(), _safe_encode, str(blob.path))
+    return await loop.run_in_executor(None, _store_variants, encoded)
+
+
+def build_variants_batch(items: list[tuple[StoredBlob, str]]) -> list[list[dict[str, Any]]]:
+    """Para seeds e backfill: codifica vários arquivos em paralelo no pool."""
+    paths = [str(blob.path) if mime in SOURCE_MIME_TYPES else None for blob, mime in items]
+    pending = [path for path in paths if path]
+    results = iter(get_pool().map(_safe_encode, pending)) if pending else iter(())
+    return [_store_variants(next(results)) if path else [] for path in paths]
+
+
+def build_srcset(metadata: dict[str, Any] | None) -> str | None:
+    """`srcset` com os derivados WebP (AVIF exigiria <picture>), do menor para o maior."""
+    variants = [v for v in (metadata or {}).get("variants", []) if v.get("mime_type") == "image/webp"]
+    if not variants:
+        return None
+    variants.sort(key=lambda variant: variant["width"])
+    return ", ".join(f"{variant['url']} {variant['width']}w" for variant in variants)
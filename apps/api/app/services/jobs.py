@@ -0,0 +1,413 @@
+"""Fila de jobs em background persistida no banco (tabela `jobs`), sem broker externo.
+
+As rotas enfileiram com `enqueue` e respondem na hora; o worker (`scripts/run_jobs.py`) reivindica
+os jobs prontos e os executa num pool de processos, fora das threads de requisição. A reivindicação
+é um UPDATE condicional (`status = queued`), que funciona igual em SQLite e Postgres sem
+`SELECT ... FOR UPDATE`: dois workers nunca pegam o mesmo job.
+
+Cada tipo de job é uma função registrada com `@job_handler("tipo")` que recebe um `JobContext`
+(sessão e progresso) e o payload, e devolve o resultado (JSON). O trabalho do handler e a marcação
+de sucesso são commitados juntos. Falhas voltam para a fila com backoff exponencial até
+`max_attempts`; `HTTPException` 4xx e `PermanentJobError` falham na hora (repetir não adianta).
+
+Cada reivindicação grava um token único em `locked_by`. Enquanto o job roda, um heartbeat (e cada
+`ctx.progress`) renova `locked_at`; só jobs sem heartbeat há `JOB_LOCK_TIMEOUT_SECONDS` (worker morto)
+voltam à fila. O sucesso e o progresso só são gravados se o token ainda for o da execução corrente:
+uma execução que perdeu o lock descarta o próprio resultado em vez de sobrescrever o de outra.
+
+O arquivo de entrada do job (`payload["file"]`, gravado com `store_job_file`) só é apagado depois
+que o sucesso foi commitado ou quando o job falha de vez; retentativas ainda o encontram.
+"""
+
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+import uuid
+from collections.abc import AsyncIterator, Callable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal, engine
+from app.models import Card, CardTemplate, Deck, Job, JobStatus
+from app.services.load_balance import rebuild_due_histogram
+from app.services.notes import add_missing_cards, fill_card_previews
+from app.services.snapshots import DeckImporter, SnapshotReader
+from app.services.sprites import SPRITE_MAX_BYTES, build_deck_sprites
+
+DEFAULT_MAX_ATTEMPTS = 3
+
+logger = logging.getLogger(__name__)
+
+
+class PermanentJobError(Exception):
+    """Erro que não melhora com nova tentativa (dados inválidos, alvo removido)."""
+
+
+class JobLostError(Exception):
+    """O lock do job expirou e ele foi reivindicado de novo: esta execução para sem gravar nada."""
+
+
+def _refresh_lock(db: Session, job_id: int, lock: str) -> bool:
+    """Renova `locked_at` se o job ainda pertence à execução com o token `lock` (sem commit)."""
+    return bool(
+        db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.locked_by == lock, Job.status == JobStatus.running)
+            .values(locked_at=datetime.utcnow())
+        ).rowcount
+    )
+
+
+class JobContext:
+    def __init__(self, db: Session, job: Job, lock: str) -> None:
+        self.db = db
+        self.job = job
+        self.lock = lock
+
+    def progress(self, done: int, total: int, message: str | None = None) -> None:
+        """Publica o progresso e renova o lock. Commita a transação do job: chame só entre lotes já consistentes."""
+        if not _refresh_lock(self.db, self.job.id, self.lock):
+            raise JobLostError(f"Job {self.job.id} lost its lock")
+        self.job.progress = min(1.0, done / total) if total else 0.0
+        self.job.progress_message = message
+        self.db.commit()
+
+
+Handler = Callable[[JobContext, dict[str, Any]], dict[str, Any] | None]
+HANDLERS: dict[str, Handler] = {}
+
+
+def job_handler(kind: str) -> Callable[[Handler], Handler]:
+    def register(func: Handler) -> Handler:
+        HANDLERS[kind] = func
+        return func
+
+    return register
+
+
+def enqueue(
+    db: Session,
+    kind: str,
+    payload: dict[str, Any],
+    owner_id: int | None = None,
+    deck_id: int | None = None,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+) -> Job:
+    """Cria o job na fila (sem commit: entra junto com a transação de quem enfileira)."""
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    job = Job(
+        kind=kind,
+        status=JobStatus.queued,
+        payload=payload,
+        owner_id=owner_id,
+        deck_id=deck_id,
+        max_attempts=max_attempts,
+        run_after=datetime.utcnow(),
+    )
+    db.add(job)
+    db.flush()
+    return job
+
+
+def retry_delay(attempts: int) -> float:
+    """Backoff exponencial com jitter (±20%) para a tentativa seguinte à `attempts`-ésima."""
+    base = min(settings.JOB_RETRY_MAX_SECONDS, settings.JOB_RETRY_BASE_SECONDS * 2 ** max(0, attempts - 1))
+    return base * random.uniform(0.8, 1.2)
+
+
+def claim_next(db: Session, worker_id: str) -> tuple[int, str] | None:
+    """Reivindica o próximo job pronto e devolve (id, token do lock), ou None se a fila está vazia."""
+    for _ in range(5):
+        now = datetime.utcnow()
+        job_id = db.scalar(
+            select(Job.id)
+            .where(Job.status == JobStatus.queued, Job.run_after <= now)
+            .order_by(Job.run_after, Job.id)
+            .limit(1)
+        )
+        if job_id is None:
+            return None
+        lock = f"{worker_id}:{uuid.uuid4().hex[:12]}"
+        claimed = db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == JobStatus.queued)
+            .values(
+                status=JobStatus.running,
+                locked_by=lock,
+                locked_at=now,
+                started_at=now,
+                attempts=Job.attempts + 1,
+                error=None,
+            )
+        ).rowcount
+        db.commit()
+        if claimed:
+            return job_id, lock
+    return None
+
+
+def record_failure(
+    db: Session, job_id: int, error: str, permanent: bool = False, lock: str | None = None
+) -> None:
+    """Devolve o job à fila com backoff ou o marca como falho de vez (com commit).
+
+    Com `lock`, só age se o job ainda pertence a essa execução.
+    """
+    job = db.get(Job, job_id)
+    if not job or (lock is not None and job.locked_by != lock):
+        return
+    job.error = error[-4000:]
+    job.locked_by = None
+    job.locked_at = None
+    failed = permanent or job.attempts >= job.max_attempts
+    if failed:
+        job.status = JobStatus.failed
+        job.finished_at = datetime.utcnow()
+    else:
+        job.status = JobStatus.queued
+        job.run_after = datetime.utcnow() + timedelta(seconds=retry_delay(job.attempts))
+    db.commit()
+    if failed:
+        _remove_job_file(job.payload)
+
+
+def requeue_stale(db: Session) -> int:
+    """Jobs "running" sem heartbeat há `JOB_LOCK_TIMEOUT_SECONDS` (worker morto) contam como tentativa falha."""
+    limit = datetime.utcnow() - timedelta(seconds=settings.JOB_LOCK_TIMEOUT_SECONDS)
+    stale = list(db.scalars(select(Job.id).where(Job.status == JobStatus.running, Job.locked_at < limit)))
+    for job_id in stale:
+        record_failure(db, job_id, "Worker lost while running the job")
+    return len(stale)
+
+
+@contextmanager
+def _heartbeat(job_id: int, lock: str) -> Iterator[None]:
+    """Renova o lock do job numa thread (conexão própria) enquanto o handler roda."""
+    stopped = threading.Event()
+    interval = max(1.0, settings.JOB_LOCK_TIMEOUT_SECONDS / 3)
+
+    def beat() -> None:
+        while not stopped.wait(interval):
+            try:
+                with SessionLocal() as db:
+                    alive = _refresh_lock(db, job_id, lock)
+                    db.commit()
+            except Exception:  # noqa: BLE001 - banco ocupado: tenta no próximo intervalo
+                logger.warning("Heartbeat failed for job %s", job_id, exc_info=True)
+                continue
+            if not alive:
+                return
+
+    thread = threading.Thread(target=beat, name=f"job-{job_id}-heartbeat", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stopped.set()
+        thread.join()
+
+
+def run_job(job_id: int) -> None:
+    """Executa um job já reivindicado (no processo do pool, com sessão própria)."""
+    with SessionLocal() as db:
+        job = db.get(Job, job_id)
+        if not job or job.status != JobStatus.running:
+            return
+        lock = job.locked_by
+        handler = HANDLERS.get(job.kind)
+        try:
+            if handler is None:
+                raise PermanentJobError(f"Unknown job kind: {job.kind}")
+            with _heartbeat(job_id, lock):
+                result = handler(JobContext(db, job, lock), dict(job.payload or {}))
+        except JobLostError:
+            db.rollback()
+            return
+        except (PermanentJobError, HTTPException) as exc:
+            db.rollback()
+            permanent = not isinstance(exc, HTTPException) or exc.status_code < 500
+            record_failure(db, job_id, str(exc.detail if isinstance(exc, HTTPException) else exc), permanent, lock)
+            return
+        except Exception:
+            db.rollback()
+            record_failure(db, job_id, traceback.format_exc(), lock=lock)
+            return
+        finished = db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.locked_by == lock, Job.status == JobStatus.running)
+            .values(
+                status=JobStatus.succeeded,
+                result=result,
+                progress=1.0,
+                locked_by=None,
+                locked_at=None,
+                finished_at=datetime.utcnow(),
+            )
+        ).rowcount
+        if not finished:
+            # O lock expirou e outra execução assumiu o job: o trabalho desta é descartado
+            db.rollback()
+            return
+        db.commit()
+        _remove_job_file(job.payload)
+
+
+def _init_worker_process() -> None:
+    # Conexões herdadas do processo pai (fork) não podem ser reusadas no filho
+    engine.dispose(close=False)
+
+
+def run_worker(workers: int | None = None, poll_seconds: float | None = None, once: bool = False) -> int:
+    """Laço do worker: reivindica jobs e os executa num pool de processos; devolve quantos rodou.
+
+    Com `once=True`, esvazia a fila (o que estiver pronto) e retorna.
+    """
+    workers = workers or settings.JOB_WORKERS
+    poll_seconds = poll_seconds or settings.JOB_POLL_SECONDS
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    processed = 0
+    db = SessionLocal()
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker_process)
+    running: dict[Future, tuple[int, str]] = {}
+    try:
+        while True:
+            requeue_stale(db)
+            while len(running) < workers:
+                claimed = claim_next(db, worker_id)
+                if claimed is None:
+                    break
+                running[pool.submit(run_job, claimed[0])] = claimed
+            if not running:
+                if once:
+                    return processed
+                time.sleep(poll_seconds)
+                continue
+
+            done, _ = wait(running, timeout=poll_seconds, return_when=FIRST_COMPLETED)
+            broken = False
+            for future in done:
+                job_id, lock = running.pop(future)
+                processed += 1
+                error = future.exception()
+                if error is not None:
+                    # O processo do job morreu (ex.: falta de memória) antes de registrar o resultado
+                    record_failure(db, job_id, f"Worker process failed: {error!r}", lock=lock)
+                    broken = broken or isinstance(error, BrokenProcessPool)
+            if broken:
+                for job_id, lock in running.values():
+                    record_failure(db, job_id, "Worker process pool broke", lock=lock)
+                running.clear()
+                pool.shutdown(wait=False, cancel_futures=True)
+                pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker_process)
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+        db.close()
+
+
+def job_file_path(name: str) -> Path:
+    return Path(settings.JOB_FILES_ROOT) / name
+
+
+def _remove_job_file(payload: dict[str, Any] | None) -> None:
+    if payload and payload.get("file"):
+        job_file_path(payload["file"]).unlink(missing_ok=True)
+
+
+async def store_job_file(chunks: AsyncIterator[bytes], suffix: str, max_bytes: int) -> str:
+    """Grava a entrada de um job (corpo da requisição) em `JOB_FILES_ROOT`; devolve o nome do arquivo.
+
+    A escrita roda no threadpool, fora do event loop; acima de `max_bytes` responde 413.
+    """
+    name = f"{uuid.uuid4().hex}{suffix}"
+    path = job_file_path(name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    handle = await run_in_threadpool(open, path, "wb")
+    size = 0
+    try:
+        async for chunk in chunks:
+            if not chunk:
+                continue
+            size += len(chunk)
+            if size > max_bytes:
+                raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="File too large")
+            await run_in_threadpool(handle.write, chunk)
+    except BaseException:
+        handle.close()
+        path.unlink(missing_ok=True)
+        raise
+    await run_in_threadpool(handle.close)
+    return name
+
+
+# Handlers -----------------------------------------------------------------------------------------
+
+
+@job_handler("deck_import")
+def _deck_import(ctx: JobContext, payload: dict[str, Any]) -> dict[str, Any]:
+    path = job_file_path(payload["file"])
+    if not path.exists():
+        raise PermanentJobError("Snapshot file not found")
+    total = path.stat().st_size
+    ctx.progress(0, total, "Importando snapshot")
+    importer = DeckImporter(ctx.db, payload["owner_id"], slug=payload.get("slug"), name=payload.get("name"))
+    reader = SnapshotReader()
+    with open(path, "rb") as handle:
+        while chunk := handle.read(256 * 1024):
+            for record in reader.feed(chunk):
+                importer.apply(record)
+    # Sem commit aqui: o deck entra na mesma transação que marca o job como concluído
+    deck = importer.finish(commit=False)
+    return {"deck_id": deck.id, "slug": deck.slug, **importer.counts}
+
+
+@job_handler("audio_sprites")
+def _audio_sprites(ctx: JobContext, payload: dict[str, Any]) -> dict[str, Any]:
+    deck = ctx.db.get(Deck, payload["deck_id"])
+    if not deck:
+        raise PermanentJobError("Deck not found")
+    index = build_deck_sprites(ctx.db, deck, max_bytes=payload.get("max_bytes") or SPRITE_MAX_BYTES)
+    return {"sprites": len(index["sprites"]), "clips": len(index["clips"])}
+
+
+@job_handler("due_histogram")
+def _due_histogram(ctx: JobContext, payload: dict[str, Any]) -> dict[str, Any]:
+    deck = ctx.db.get(Deck, payload["deck_id"])
+    if not deck:
+        raise PermanentJobError("Deck not found")
+    rebuild_due_histogram(ctx.db, payload["user_id"], deck)
+    return {"user_id": payload["user_id"], "deck_id": payload["deck_id"]}
+
+
+@job_handler("template_cards")
+def _template_cards(ctx: JobContext, payload: dict[str, Any]) -> dict[str, Any]:
+    """Propaga um template novo/ativado ou editado: cards que faltam (um INSERT ... SELECT) e previews em lotes."""
+    template = ctx.db.get(CardTemplate, payload["template_id"])
+    if not template:
+        raise PermanentJobError("Template not found")
+    only_missing = not payload.get("refresh_previews")
+    created = add_missing_cards(ctx.db, template) if template.is_active else 0
+    query = select(func.count()).select_from(Card).where(Card.card_template_id == template.id)
+    if only_missing:
+        query = query.where(Card.preview == None)  # noqa: E711
+    total = ctx.db.scalar(query) or 0
+    ctx.progress(0, total, f"{created} cards criados")
+    done = 0
+    for count in fill_card_previews(ctx.db, template, only_missing=only_missing):
+        done += count
+        ctx.progress(done, total, "Atualizando previews")
+    return {"created": created, "previews": done}
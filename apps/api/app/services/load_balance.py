@@ -0,0 +1,134 @@
+"""Balanceamento de carga dos vencimentos (due dates).
+
+Em vez de `due_at = now + intervalo` exato, o vencimento é movido dentro de uma janela de tolerância
+para a hora com menos cards vencendo para o usuário naquele deck. As contagens por hora ficam em
+`due_load_buckets` e são mantidas incrementalmente a cada revisão; o histograma é reconstruído a
+partir do progresso apenas na primeira vez (ou após o modo ser religado no deck).
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models import Card, Deck, DueLoadBucket, Note, UserCardProgress, UserDeckState
+from app.services.forks import deck_note_filter
+
+BUCKET_MINUTES = 60
+MINUTES_PER_DAY = 24 * 60
+EPOCH = datetime(1970, 1, 1)
+
+
+def _naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def bucket_of(value: datetime) -> int:
+    return int((_naive_utc(value) - EPOCH).total_seconds() // (BUCKET_MINUTES * 60))
+
+
+def fuzz_window(interval_minutes: int) -> int:
+    """Tolerância (minutos, para cada lado) em torno do vencimento para um intervalo."""
+    if interval_minutes < BUCKET_MINUTES:
+        return 0
+    if interval_minutes < 7 * MINUTES_PER_DAY:
+        return int(interval_minutes * 0.15)
+    return max(MINUTES_PER_DAY, int(interval_minutes * 0.05))
+
+
+def rebuild_due_histogram(db: Session, user_id: int, deck: Deck) -> None:
+    """Recalcula os buckets futuros do usuário no deck a partir do user_card_progress (sem commit)."""
+    now_bucket = bucket_of(datetime.utcnow())
+    db.execute(delete(DueLoadBucket).where(DueLoadBucket.user_id == user_id, DueLoadBucket.deck_id == deck.id))
+
+    counts: dict[int, int] = {}
+    due_dates = db.scalars(
+        select(UserCardProgress.due_at)
+        .join(Card, UserCardProgress.card_id == Card.id)
+        .join(Note, Card.note_id == Note.id)
+        .where(
+            UserCardProgress.user_id == user_id,
+            deck_note_filter(deck),
+            UserCardProgress.due_at != None,  # noqa: E711
+        )
+    )
+    for due_at in due_dates:
+        bucket = bucket_of(due_at)
+        if bucket >= now_bucket:
+            counts[bucket] = counts.get(bucket, 0) + 1
+    db.add_all(
+        DueLoadBucket(user_id=user_id, deck_id=deck.id, bucket=bucket, count=count) for bucket, count in counts.items()
+    )
+
+    state = db.get(UserDeckState, (user_id, deck.id))
+    if not state:
+        state = UserDeckState(user_id=user_id, deck_id=deck.id, new_card_cursor=0)
+        db.add(state)
+    state.due_histogram_at = datetime.utcnow()
+    db.flush()
+
+
+def ensure_due_histogram(db: Session, user_id: int, deck: Deck) -> None:
+    """Constrói o histograma se ainda não existe. Chamar antes de criar ou alterar o progresso do card
+    revisado: a reconstrução lê o progresso do banco e, se um flush já tivesse gravado o card, ele
+    entraria na contagem e seria contado de novo por `move_due`."""
+    built_at = db.scalar(
+        select(UserDeckState.due_histogram_at).where(UserDeckState.user_id == user_id, UserDeckState.deck_id == deck.id)
+    )
+    if built_at is None:
+        rebuild_due_histogram(db, user_id, deck)
+
+
+def pick_balanced_due(db: Session, user_id: int, deck_id: int, due_at: datetime, interval_minutes: int) -> datetime:
+    """Vencimento deslocado para a hora menos carregada dentro da janela de tolerância (requer
+    `ensure_due_histogram`)."""
+    window = fuzz_window(interval_minutes or 0)
+    if not window:
+        return due_at
+
+    original = bucket_of(due_at)
+    first = bucket_of(due_at - timedelta(minutes=window))
+    last = bucket_of(due_at + timedelta(minutes=window))
+    loads = dict(
+        db.execute(
+            select(DueLoadBucket.bucket, DueLoadBucket.count).where(
+                DueLoadBucket.user_id == user_id,
+                DueLoadBucket.deck_id == deck_id,
+                DueLoadBucket.bucket.between(first, last),
+            )
+        ).all()
+    )
+    # Menor carga; no empate, a hora mais próxima do vencimento original
+    chosen = min(range(first, last + 1), key=lambda bucket: (loads.get(bucket, 0), abs(bucket - original)))
+    shifted = due_at + timedelta(minutes=(chosen - original) * BUCKET_MINUTES)
+    return min(max(shifted, due_at - timedelta(minutes=window)), due_at + timedelta(minutes=window))
+
+
+def move_due(db: Session, user_id: int, deck_id: int, old_due: datetime | None, new_due: datetime | None) -> None:
+    """Atualiza o histograma quando um card troca de vencimento (sem commit; requer `ensure_due_histogram`)."""
+    now_bucket = bucket_of(datetime.utcnow())
+    owner = (DueLoadBucket.user_id == user_id, DueLoadBucket.deck_id == deck_id)
+
+    if old_due is not None and bucket_of(old_due) >= now_bucket:
+        db.execute(
+            update(DueLoadBucket)
+            .where(*owner, DueLoadBucket.bucket == bucket_of(old_due), DueLoadBucket.count > 0)
+            .values(count=DueLoadBucket.count - 1)
+        )
+    if new_due is not None:
+        # Upsert: duas revisões concorrentes criando o mesmo bucket não colidem na chave primária
+        dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+        db.execute(
+            dialect.insert(DueLoadBucket)
+            .values(user_id=user_id, deck_id=deck_id, bucket=bucket_of(new_due), count=1)
+            .on_conflict_do_update(
+                index_elements=[DueLoadBucket.user_id, DueLoadBucket.deck_id, DueLoadBucket.bucket],
+                set_={"count": DueLoadBucket.count + 1},
+            )
+        )
+
+    # Buckets que já passaram não influenciam mais nenhuma escolha
+    db.execute(delete(DueLoadBucket).where(*owner, DueLoadBucket.bucket < now_bucket))
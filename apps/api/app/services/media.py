@@ -0,0 +1,416 @@
+"""Armazenamento de mídia endereçado por conteúdo.
+
+Cada arquivo fica uma única vez em `MEDIA_ROOT/<sha[:2]>/<sha[2:4]>/<sha>`, não importa quantos
+decks o usem; `MediaAsset` continua por deck (permissões, atribuição), mas aponta para o mesmo
+`sha256` e a mesma URL (`/media/<sha256>`), então o navegador também baixa e cacheia uma vez só.
+O hash é calculado em streaming enquanto o corpo é gravado num arquivo temporário.
+"""
+
+import hashlib
+import mimetypes
+import os
+import struct
+import tempfile
+import wave
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Iterator
+
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models import MediaAsset
+from app.models.enums import MediaType
+
+CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class StoredBlob:
+    sha256: str
+    size: int
+    path: Path
+
+
+def media_root() -> Path:
+    return Path(settings.MEDIA_ROOT)
+
+
+def blob_path(sha256: str) -> Path:
+    return media_root() / sha256[:2] / sha256[2:4] / sha256
+
+
+def media_url(sha256: str) -> str:
+    return f"{settings.API_BASE_URL.rstrip('/')}/media/{sha256}"
+
+
+class _BlobWriter:
+    """Grava pedaços num temporário calculando o SHA-256; `finish` move para o caminho final."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._hash = hashlib.sha256()
+        tmp_dir = media_root() / "tmp"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        self._file = tempfile.NamedTemporaryFile(dir=tmp_dir, delete=False)
+
+    def write(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            self.abort()
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Media file too large")
+        self._hash.update(chunk)
+        self._file.write(chunk)
+
+    def abort(self) -> None:
+        self._file.close()
+        Path(self._file.name).unlink(missing_ok=True)
+
+    def finish(self) -> StoredBlob:
+        self._file.close()
+        tmp_path = Path(self._file.name)
+        if self.size == 0:
+            tmp_path.unlink(missing_ok=True)
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty media file")
+        sha256 = self._hash.hexdigest()
+        target = blob_path(sha256)
+        if target.exists():
+            # Já armazenado (mesmo arquivo em outro deck ou reenvio): descarta a cópia
+            tmp_path.unlink(missing_ok=True)
+        else:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp_path, target)
+        return StoredBlob(sha256=sha256, size=self.size, path=target)
+
+
+async def store_stream(chunks: AsyncIterator[bytes], max_bytes: int | None = None) -> StoredBlob:
+    """Grava o corpo da requisição; hash e escrita rodam no threadpool, fora do event loop."""
+    writer = await run_in_threadpool(_BlobWriter, max_bytes or settings.MEDIA_MAX_BYTES)
+    try:
+        async for chunk in chunks:
+            if chunk:
+                await run_in_threadpool(writer.write, chunk)
+    except BaseException:
+        await run_in_threadpool(writer.abort)
+        raise
+    return await run_in_threadpool(writer.finish)
+
+
+def store_file(source: BinaryIO | Path, max_bytes: int | None = None) -> StoredBlob:
+    """Versão síncrona de `store_stream` para scripts e jobs."""
+    writer = _BlobWriter(max_bytes or settings.MEDIA_MAX_BYTES)
+    handle = open(source, "rb") if isinstance(source, Path) else source
+    try:
+        while chunk := handle.read(CHUNK_SIZE):
+            writer.write(chunk)
+    except BaseException:
+        writer.abort()
+        raise
+    finally:
+        if isinstance(source, Path):
+            handle.close()
+    return writer.finish()
+
+
+def _sniff_mime(head: bytes) -> str | None:
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+        return "audio/wav"
+    if head[4:12] in (b"ftypavif", b"ftypavis"):
+        return "image/avif"
+    if head.startswith(b"OggS"):
+        return "audio/ogg"
+    if head.startswith(b"ID3") or (len(head) > 1 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0):
+        return "audio/mpeg"
+    return None
+
+
+def sniff_file(path: Path) -> str | None:
+    with open(path, "rb") as handle:
+        return _sniff_mime(handle.read(16))
+
+
+def detect_mime(path: Path, file_name: str, declared: str | None) -> str:
+    sniffed = sniff_file(path)
+    if sniffed:
+        return sniffed
+    if declared and declared != "application/octet-stream":
+        return declared.split(";")[0].strip()
+    return mimetypes.guess_type(file_name)[0] or "application/octet-stream"
+
+
+def _image_size(path: Path, mime: str) -> tuple[int, int] | None:
+    with open(path, "rb") as handle:
+        head = handle.read(32)
+        if mime == "image/png" and len(head) >= 24:
+            return struct.unpack(">II", head[16:24])
+        if mime == "image/gif" and len(head) >= 10:
+            return struct.unpack("<HH", head[6:10])
+        if mime == "image/webp" and len(head) >= 30:
+            chunk = head[12:16]
+            if chunk == b"VP8X":
+                width = int.from_bytes(head[24:27], "little") + 1
+                height = int.from_bytes(head[27:30], "little") + 1
+                return width, height
+            if chunk == b"VP8 ":
+                width, height = struct.unpack("<HH", head[26:30])
+                return width & 0x3FFF, height & 0x3FFF
+            if chunk == b"VP8L":
+                bits = int.from_bytes(head[21:25], "little")
+                return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if mime == "image/jpeg":
+            # Percorre os segmentos até o SOF (start of frame), que traz altura/largura
+            handle.seek(2)
+            while marker := handle.read(2):
+                if len(marker) < 2 or marker[0] != 0xFF:
+                    return None
+                length = struct.unpack(">H", handle.read(2))[0]
+                if 0xC0 <= marker[1] <= 0xCF and marker[1] not in (0xC4, 0xC8, 0xCC):
+                    height, width = struct.unpack(">xHH", handle.read(5))
+                    return width, height
+                handle.seek(length - 2, os.SEEK_CUR)
+    return None
+
+
+_MP3_BITRATES = {
+    # (versão MPEG-1?, layer III) -> kbps por índice
+    True: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    False: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+def _mp3_duration(path: Path, size: int) -> float | None:
+    with open(path, "rb") as handle:
+        head = handle.read(10)
+        offset = 0
+        if head.startswith(b"ID3"):
+            # Tamanho do tag ID3v2 em inteiro "synchsafe" (7 bits por byte)
+            offset = 10 + ((head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9])
+        handle.seek(offset)
+        data = handle.read(4096)
+    for index in range(len(data) - 4):
+        if data[index] != 0xFF or data[index + 1] & 0xE0 != 0xE0:
+            continue
+        version = (data[index + 1] >> 3) & 0x03
+        bitrate_index = data[index + 2] >> 4
+        rate_index = (data[index + 2] >> 2) & 0x03
+        if version == 1 or bitrate_index in (0, 15) or rate_index == 3:
+            continue
+        mpeg1 = version == 3
+        sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+        samples_per_frame = 1152 if mpeg1 else 576
+        # Cabeçalho Xing/Info (VBR) traz o número de frames
+        for tag in (b"Xing", b"Info"):
+            position = data.find(tag, index, index + 64)
+            if position != -1 and data[position + 7] & 0x01:
+                frames = struct.unpack(">I", data[position + 8 : position + 12])[0]
+                return round(frames * samples_per_frame / sample_rate, 3)
+        bitrate = _MP3_BITRATES[mpeg1][bitrate_index] * 1000
+        return round((size - offset - index) * 8 / bitrate, 3)
+    return None
+
+
+def mp3_frames(data: bytes) -> tuple[bytes, float, int] | None:
+    """Só os frames de áudio de um MP3 (sem tags ID3 nem o frame Xing/Info), a duração exata e a taxa.
+
+    Usado para concatenar MP3s (sprites): o frame Xing de um arquivo faria o player achar que o
+    resultado tem a duração do primeiro.
+    """
+    offset = 0
+    if data.startswith(b"ID3") and len(data) >= 10:
+        offset = 10 + ((data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9])
+    payload = bytearray()
+    frames = 0
+    sample_rate = samples_per_frame = 0
+    while offset + 4 <= len(data):
+        if data[offset] != 0xFF or data[offset + 1] & 0xE0 != 0xE0:
+            # Lixo entre frames (ou tag ID3v1 no fim): procura a próxima sincronização
+            offset += 1
+            continue
+        version = (data[offset + 1] >> 3) & 0x03
+        bitrate_index = data[offset + 2] >> 4
+        rate_index = (data[offset + 2] >> 2) & 0x03
+        if version == 1 or bitrate_index in (0, 15) or rate_index == 3:
+            offset += 1
+            continue
+        mpeg1 = version == 3
+        rate = _MP3_SAMPLE_RATES[version][rate_index]
+        padding = (data[offset + 2] >> 1) & 0x01
+        length = (144 if mpeg1 else 72) * _MP3_BITRATES[mpeg1][bitrate_index] * 1000 // rate + padding
+        frame = data[offset : offset + length]
+        if len(frame) < length:
+            break
+        offset += length
+        if frames == 0 and not payload and (b"Xing" in frame[:64] or b"Info" in frame[:64]):
+            continue
+        sample_rate, samples_per_frame = rate, 1152 if mpeg1 else 576
+        payload += frame
+        frames += 1
+    if not frames:
+        return None
+    return bytes(payload), frames * samples_per_frame / sample_rate, sample_rate
+
+
+def _ogg_duration(path: Path, size: int) -> float | None:
+    with open(path, "rb") as handle:
+        head = handle.read(512)
+        handle.seek(max(0, size - 65536))
+        tail = handle.read()
+    # Opus conta a posição em amostras a 48 kHz menos o pre-skip; Vorbis usa a taxa do cabeçalho
+    if (position := head.find(b"OpusHead")) != -1:
+        rate = 48000
+        pre_skip = struct.unpack("<H", head[position + 10 : position + 12])[0]
+    elif (position := head.find(b"\x01vorbis")) != -1:
+        rate = struct.unpack("<I", head[position + 12 : position + 16])[0]
+        pre_skip = 0
+    else:
+        return None
+    last_page = tail.rfind(b"OggS")
+    if last_page == -1 or not rate:
+        return None
+    granule = struct.unpack("<q", tail[last_page + 6 : last_page + 14])[0]
+    return round(max(0, granule - pre_skip) / rate, 3)
+
+
+def _audio_duration(path: Path, mime: str, size: int) -> float | None:
+    try:
+        if mime == "audio/wav":
+            with wave.open(str(path), "rb") as wav:
+                return round(wav.getnframes() / wav.getframerate(), 3)
+        if mime == "audio/mpeg":
+            return _mp3_duration(path, size)
+        if mime == "audio/ogg":
+            return _ogg_duration(path, size)
+    except (wave.Error, EOFError, struct.error, IndexError):
+        return None
+    return None
+
+
+def audio_duration(path: Path) -> float | None:
+    """Duração em segundos de um WAV/MP3/Ogg no disco (None se o formato não for reconhecido)."""
+    mime = sniff_file(path)
+    if not mime or not mime.startswith("audio/"):
+        return None
+    return _audio_duration(path, mime, path.stat().st_size)
+
+
+def probe_metadata(blob: StoredBlob, mime: str) -> dict:
+    metadata: dict = {"size": blob.size, "mime_type": mime}
+    if mime.startswith("image/"):
+        dimensions = _image_size(blob.path, mime)
+        if dimensions:
+            metadata["width"], metadata["height"] = dimensions
+    elif mime.startswith("audio/"):
+        duration = _audio_duration(blob.path, mime, blob.size)
+        if duration is not None:
+            metadata["duration"] = duration
+    return metadata
+
+
+def media_type_for(mime: str) -> MediaType:
+    if mime.startswith("image/"):
+        return MediaType.image
+    if mime.startswith("audio/"):
+        return MediaType.audio
+    raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail="Only image and audio files are supported")
+
+
+def find_asset(db: Session, deck_id: int, sha256: str) -> MediaAsset | None:
+    return db.scalar(select(MediaAsset).where(MediaAsset.deck_id == deck_id, MediaAsset.sha256 == sha256))
+
+
+def shared_variants(db: Session, sha256: str) -> list[dict] | None:
+    """Derivados já gerados para o mesmo conteúdo em qualquer deck (evita recodificar)."""
+    for metadata in db.scalars(select(MediaAsset.metadata_json).where(MediaAsset.sha256 == sha256)):
+        if metadata and metadata.get("variants"):
+            return metadata["variants"]
+    return None
+
+
+def register_asset(
+    db: Session,
+    deck_id: int,
+    blob: StoredBlob,
+    file_name: str,
+    declared_mime: str | None = None,
+    attribution: str | None = None,
+    license: str | None = None,
+    variants: list[dict] | None = None,
+) -> MediaAsset:
+    """MediaAsset do deck para o blob; reenviar o mesmo conteúdo ao mesmo deck devolve o existente (sem commit).
+
+    `variants` são os derivados de imagem (ver `app.services.images`), gravados em `metadata_json`.
+    """
+    asset = find_asset(db, deck_id, blob.sha256)
+    if asset:
+        return asset
+
+    mime = detect_mime(blob.path, file_name, declared_mime)
+    metadata = probe_metadata(blob, mime)
+    if variants:
+        metadata["variants"] = variants
+    asset = MediaAsset(
+        deck_id=deck_id,
+        file_name=file_name,
+        url=media_url(blob.sha256),
+        media_type=media_type_for(mime),
+        attribution=attribution,
+        license=license,
+        sha256=blob.sha256,
+        metadata_json=metadata,
+    )
+    db.add(asset)
+    return asset
+
+
+def discard_if_unused(db: Session, blob: StoredBlob) -> None:
+    """Apaga o arquivo de um upload rejeitado se nenhum asset o referencia."""
+    if not db.scalar(select(MediaAsset.id).where(MediaAsset.sha256 == blob.sha256).limit(1)):
+        blob.path.unlink(missing_ok=True)
+
+
+def parse_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """Intervalo (início, fim inclusivo) de um header `Range: bytes=...` com um único intervalo."""
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    start_text, _, end_text = header[len("bytes=") :].strip().partition("-")
+    try:
+        if start_text:
+            start = int(start_text)
+            end = min(int(end_text), size - 1) if end_text else size - 1
+        else:
+            # "bytes=-500": últimos 500 bytes
+            start, end = max(size - int(end_text), 0), size - 1
+    except ValueError:
+        return None
+    if start > end or start >= size:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
+
+
+def iter_file(path: Path, start: int, end: int) -> Iterator[bytes]:
+    with open(path, "rb") as handle:
+        handle.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = handle.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
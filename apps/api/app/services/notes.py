@@ -1,12 +1,42 @@
+import hashlib
 import re
+from collections.abc import Iterator
 from datetime import datetime
 
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import exists, insert, literal, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased, joinedload, selectinload
 
-from app.models import Card, Deck, MediaAsset, Note, NoteField, NoteFieldValue, NoteType
+from app.models import (
+    Card,
+    CardTemplate,
+    Deck,
+    MediaAsset,
+    Note,
+    NoteField,
+    NoteFieldValue,
+    NoteType,
+    StudySession,
+)
 from app.models.enums import CardStatus
-from app.schemas.note import NoteCreate
+from app.models.sync import next_sync_seq
+from app.schemas.note import NoteCreate, NoteImportItem, NoteImportResult, NoteUpdate
+from app.services.forks import deck_note_filter, deck_scope, ensure_own_notes
+from app.services.images import build_srcset
+from app.services.search import index_note, index_notes
+from packages.core.kana import normalize_text
+
+
+_IMG_WITHOUT_SRCSET = re.compile(r'<img\b(?![^>]*\bsrcset=)([^>]*?)\bsrc="([^"]+)"')
+
+
+class NoteContext(dict):
+    """Valores dos campos por nome, mais o `srcset` das imagens com derivados (por URL)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.srcsets: dict[str, str] = {}
 
 
 def render_template(template: str, context: dict[str, str]) -> str:
@@ -17,31 +47,192 @@ def render_template(template: str, context: dict[str, str]) -> str:
         value = context.get(key, "")
         return "" if value is None else str(value)
 
-    return pattern.sub(replace, template)
+    rendered = pattern.sub(replace, template)
+    srcsets = getattr(context, "srcsets", None)
+    if srcsets:
+        # <img src="{{imagem}}"> ganha os derivados responsivos sem mudar o template
+        def add_srcset(match: re.Match[str]) -> str:
+            srcset = srcsets.get(match.group(2))
+            return f'{match.group(0)} srcset="{srcset}"' if srcset else match.group(0)
 
+        rendered = _IMG_WITHOUT_SRCSET.sub(add_srcset, rendered)
+    return rendered
 
-def build_note_context(note: Note) -> dict[str, str]:
-    context: dict[str, str] = {}
+
+def build_note_context(note: Note) -> NoteContext:
+    context = NoteContext()
     for value in note.field_values:
         data = value.value_text or ""
         if value.media_asset:
             data = value.media_asset.url
+            srcset = build_srcset(value.media_asset.metadata_json)
+            if srcset:
+                context.srcsets[data] = srcset
         if value.field:
             context[value.field.name] = data
     return context
 
 
-def _validate_media_asset(db: Session, asset_id: int, deck_id: int) -> MediaAsset:
+PREVIEW_LENGTH = 80
+PREVIEW_BATCH = 500
+
+
+def card_preview(front: str) -> str:
+    return front if len(front) <= PREVIEW_LENGTH else front[: PREVIEW_LENGTH - 3] + "..."
+
+
+def fill_card_previews(db: Session, template: CardTemplate, only_missing: bool = False) -> Iterator[int]:
+    """Calcula `Card.preview` dos cards do template em lotes (sem commit); rende quantos cards cada lote tratou.
+
+    `only_missing` limita aos cards sem preview (os recém-criados por `add_missing_cards`).
+    """
+    last_id = 0
+    while True:
+        query = (
+            db.query(Card)
+            .options(
+                selectinload(Card.note).selectinload(Note.field_values).joinedload(NoteFieldValue.field),
+                selectinload(Card.note).selectinload(Note.field_values).joinedload(NoteFieldValue.media_asset),
+            )
+            .filter(Card.card_template_id == template.id, Card.id > last_id)
+        )
+        if only_missing:
+            query = query.filter(Card.preview == None)  # noqa: E711
+        cards = query.order_by(Card.id).limit(PREVIEW_BATCH).all()
+        if not cards:
+            return
+        for card in cards:
+            preview = card_preview(render_template(template.front_template, build_note_context(card.note)))
+            if card.preview != preview:
+                card.preview = preview
+        db.flush()
+        last_id = cards[-1].id
+        yield len(cards)
+
+
+def refresh_card_previews(db: Session, template: CardTemplate) -> None:
+    """Recalcula `Card.preview` de todos os cards do template (sem commit)."""
+    for _ in fill_card_previews(db, template):
+        pass
+
+
+def add_missing_cards(db: Session, template: CardTemplate) -> int:
+    """Cria, num único INSERT ... SELECT, o card do template em cada nota do note type que ainda não o tem.
+
+    Os cards novos herdam o mnemônico da nota (de um card existente) e saem sem preview; complete com
+    `fill_card_previews(..., only_missing=True)`. Devolve quantos cards foram criados (sem commit).
+    """
+    existing = aliased(Card)
+    sibling = aliased(Card)
+    mnemonic = (
+        select(sibling.mnemonic).where(sibling.note_id == Note.id).order_by(sibling.id).limit(1).scalar_subquery()
+    )
+    rows = select(
+        Note.id,
+        literal(template.id),
+        mnemonic,
+        literal(datetime.utcnow(), Card.due_at.type),
+        literal(next_sync_seq(db)),
+    ).where(
+        Note.note_type_id == template.note_type_id,
+        ~exists().where(existing.note_id == Note.id, existing.card_template_id == template.id),
+    )
+    result = db.execute(
+        insert(Card).from_select(["note_id", "card_template_id", "mnemonic", "due_at", "updated_seq"], rows)
+    )
+    return result.rowcount or 0
+
+
+def touch_template_cards(db: Session, template: CardTemplate) -> None:
+    """Invalida a renderização guardada dos cards do template.
+
+    Clientes de sync veem os cards como alterados (novo `updated_seq`). Sessões de estudo abertas nos
+    decks com notas do note type (e nos forks deles) guardam o HTML já renderizado: são expiradas, e o
+    cliente abre outra com a renderização nova.
+    """
+    db.execute(update(Card).where(Card.card_template_id == template.id).values(updated_seq=next_sync_seq(db)))
+    deck_ids = select(Note.deck_id).where(Note.note_type_id == template.note_type_id).distinct()
+    now = datetime.utcnow()
+    db.execute(
+        update(StudySession)
+        .where(
+            StudySession.expires_at > now,
+            StudySession.deck_id.in_(deck_ids)
+            | StudySession.deck_id.in_(select(Deck.id).where(Deck.source_deck_id.in_(deck_ids))),
+        )
+        .values(expires_at=now)
+    )
+
+
+def _validate_media_asset(db: Session, asset_id: int, deck: Deck) -> MediaAsset:
     asset = db.get(MediaAsset, asset_id)
     if not asset:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Media asset not found")
-    if asset.deck_id != deck_id:
+    if asset.deck_id not in deck_scope(deck):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Media asset must belong to the same deck"
         )
     return asset
 
 
+def sort_field(note_type: NoteType) -> NoteField | None:
+    """Campo que identifica a nota (como o "sort field" do Anki): `config.sort_field` ou o primeiro."""
+    fields = sorted(note_type.fields, key=lambda field: (field.sort_order or 0, field.id))
+    for field in fields:
+        if (field.config or {}).get("sort_field"):
+            return field
+    return fields[0] if fields else None
+
+
+def note_content_hash(note_type_id: int, sort_value: str | None) -> str | None:
+    """Hash do valor normalizado do sort field; notas com o mesmo hash no deck são duplicadas."""
+    normalized = normalize_text(sort_value or "")
+    if not normalized:
+        return None
+    return hashlib.blake2b(f"{note_type_id}\x1f{normalized}".encode(), digest_size=16).hexdigest()
+
+
+def _ensure_not_duplicate(db: Session, deck: Deck, content_hash: str | None, note_id: int | None = None) -> None:
+    if content_hash is None:
+        return
+    existing_id = db.scalar(
+        select(Note.id).where(deck_note_filter(deck), Note.content_hash == content_hash).limit(1)
+    )
+    if existing_id and existing_id != note_id:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail=f"Duplicate note: note {existing_id} has the same content"
+        )
+
+
+def _commit_or_conflict(db: Session) -> None:
+    # Corrida entre duas criações iguais: o índice único (deck_id, content_hash) decide
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Duplicate note")
+
+
+def _build_cards(note: Note, templates: list[CardTemplate], context: dict[str, str], mnemonic: str | None) -> None:
+    now = datetime.utcnow()
+    for template in templates:
+        if not template.is_active:
+            continue
+        note.cards.append(
+            Card(
+                card_template_id=template.id,
+                mnemonic=mnemonic,
+                preview=card_preview(render_template(template.front_template, context)),
+                status=CardStatus.new,
+                srs_interval=0,
+                srs_ease=2.5,
+                due_at=now,
+                lapses=0,
+                reps=0,
+            )
+        )
+
+
 def create_note_with_cards(db: Session, payload: NoteCreate) -> Note:
     note_type: NoteType | None = (
         db.query(NoteType)
@@ -55,7 +246,7 @@ def create_note_with_cards(db: Session, payload: NoteCreate) -> Note:
     deck = db.get(Deck, payload.deck_id)
     if not deck:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Deck not found")
-    if note_type.deck_id and note_type.deck_id != deck.id:
+    if note_type.deck_id and note_type.deck_id not in deck_scope(deck):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Note type is not part of this deck")
 
     field_map: dict[int, NoteField] = {field.id: field for field in note_type.fields}
@@ -72,12 +263,20 @@ def create_note_with_cards(db: Session, payload: NoteCreate) -> Note:
         if not field:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Field does not belong to note type")
         if value.media_asset_id:
-            _validate_media_asset(db, value.media_asset_id, deck.id)
+            _validate_media_asset(db, value.media_asset_id, deck)
+
+    key_field = sort_field(note_type)
+    sort_value = next((v.value_text for v in payload.field_values if key_field and v.field_id == key_field.id), None)
+    content_hash = note_content_hash(note_type.id, sort_value)
+    _ensure_not_duplicate(db, deck, content_hash)
 
-    note = Note(deck_id=payload.deck_id, note_type_id=payload.note_type_id, tags=payload.tags or [])
+    note = Note(
+        deck_id=payload.deck_id, note_type_id=payload.note_type_id, tags=payload.tags or [], content_hash=content_hash
+    )
     db.add(note)
     db.flush()
 
+    context: dict[str, str] = {}
     for value in payload.field_values:
         db.add(
             NoteFieldValue(
@@ -87,27 +286,163 @@ def create_note_with_cards(db: Session, payload: NoteCreate) -> Note:
                 media_asset_id=value.media_asset_id,
             )
         )
+        asset = db.get(MediaAsset, value.media_asset_id) if value.media_asset_id else None
+        context[field_map[value.field_id].name] = asset.url if asset else value.value_text or ""
 
-    now = datetime.utcnow()
-    for template in note_type.templates:
-        if not template.is_active:
-            continue
-        db.add(
-            Card(
-                note_id=note.id,
-                card_template_id=template.id,
-                mnemonic=payload.mnemonic,
-                status=CardStatus.new,
-                srs_interval=0,
-                srs_ease=2.5,
-                due_at=now,
-                lapses=0,
-                reps=0,
+    _build_cards(note, note_type.templates, context, payload.mnemonic)
+    index_note(db, note, [value.value_text for value in payload.field_values])
+
+    _commit_or_conflict(db)
+    db.refresh(note)
+    return _load_note(db, note.id)
+
+
+def update_note(db: Session, note: Note, payload: NoteUpdate) -> Note:
+    """Atualiza tags, mnemônico e valores de campo; recalcula previews, hash e o índice de busca."""
+    if payload.tags is not None:
+        note.tags = payload.tags
+    if payload.mnemonic is not None:
+        for card in note.cards:
+            card.mnemonic = payload.mnemonic
+
+    if payload.field_values is not None:
+        field_map: dict[int, NoteField] = {field.id: field for field in note.note_type.fields}
+        existing = {value.field_id: value for value in note.field_values}
+        for value in payload.field_values:
+            if value.field_id not in field_map:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Field does not belong to note type")
+            if value.media_asset_id:
+                _validate_media_asset(db, value.media_asset_id, note.deck)
+            current = existing.get(value.field_id)
+            if current:
+                current.value_text = value.value_text
+                current.media_asset_id = value.media_asset_id
+            else:
+                note.field_values.append(
+                    NoteFieldValue(field_id=value.field_id, value_text=value.value_text, media_asset_id=value.media_asset_id)
+                )
+
+        key_field = sort_field(note.note_type)
+        sort_value = next((v.value_text for v in note.field_values if key_field and v.field_id == key_field.id), None)
+        content_hash = note_content_hash(note.note_type_id, sort_value)
+        _ensure_not_duplicate(db, note.deck, content_hash, note.id)
+        note.content_hash = content_hash
+
+        # Recarrega valores/relacionamentos (media_asset) a partir do que acabou de ser gravado
+        db.flush()
+        db.expire_all()
+
+        context = build_note_context(note)
+        for card in note.cards:
+            card.preview = card_preview(render_template(card.template.front_template, context))
+        index_note(db, note, [value.value_text for value in note.field_values])
+
+    # Edição só de valores de campo não altera a linha da nota; força updated_at
+    note.updated_at = datetime.utcnow()
+    _commit_or_conflict(db)
+    return _load_note(db, note.id)
+
+
+def import_notes(db: Session, deck: Deck, note_type: NoteType, items: list[NoteImportItem]) -> NoteImportResult:
+    """Upsert em lote pelo content_hash: uma consulta para achar as existentes, um commit no fim.
+
+    Itens cujo sort field já existe no deck atualizam a nota (campos enviados, tags, mnemônico);
+    os demais criam nota e cards. Itens repetidos no próprio lote se fundem na mesma nota.
+    """
+    field_by_name = {field.name: field for field in note_type.fields}
+    key_field = sort_field(note_type)
+    if not key_field:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Note type has no fields")
+
+    hashes: list[str] = []
+    for position, item in enumerate(items):
+        unknown = [name for name in item.fields if name not in field_by_name]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail=f"Item {position}: unknown fields: {', '.join(unknown)}"
+            )
+        content_hash = note_content_hash(note_type.id, item.fields.get(key_field.name))
+        if content_hash is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail=f"Item {position}: missing sort field '{key_field.name}'"
             )
+        hashes.append(content_hash)
+
+    notes_by_hash: dict[str, Note] = {
+        note.content_hash: note
+        for note in db.query(Note)
+        .options(
+            selectinload(Note.field_values).joinedload(NoteFieldValue.field),
+            selectinload(Note.field_values).joinedload(NoteFieldValue.media_asset),
+            selectinload(Note.cards).joinedload(Card.template),
         )
+        .filter(deck_note_filter(deck), Note.content_hash.in_(set(hashes)))
+    }
+    if deck.source_deck_id:
+        # Num fork, as notas da origem que o lote atualiza viram cópias do fork antes da edição
+        own = ensure_own_notes(db, deck, list(notes_by_hash.values()))
+        notes_by_hash = {content_hash: own[note.id] for content_hash, note in notes_by_hash.items()}
 
-    db.commit()
-    db.refresh(note)
+    required = [field.name for field in note_type.fields if field.is_required]
+    touched: dict[str, Note] = {}
+    new_mnemonics: dict[str, str | None] = {}
+    for position, (item, content_hash) in enumerate(zip(items, hashes)):
+        note = notes_by_hash.get(content_hash)
+        if note is None:
+            missing = [name for name in required if not item.fields.get(name)]
+            if missing:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Item {position}: missing required fields: {', '.join(missing)}",
+                )
+            note = Note(deck_id=deck.id, note_type_id=note_type.id, tags=item.tags or [], content_hash=content_hash)
+            db.add(note)
+            notes_by_hash[content_hash] = note
+            new_mnemonics[content_hash] = item.mnemonic
+        else:
+            if item.tags is not None:
+                note.tags = item.tags
+            if item.mnemonic is not None:
+                if content_hash in new_mnemonics:
+                    new_mnemonics[content_hash] = item.mnemonic
+                for card in note.cards:
+                    card.mnemonic = item.mnemonic
+
+        # Valores criados por um item anterior do lote ainda não têm field_id (só o relacionamento)
+        values = {
+            value.field_id if value.field_id is not None else value.field.id: value for value in note.field_values
+        }
+        for name, text in item.fields.items():
+            field = field_by_name[name]
+            current = values.get(field.id)
+            if current:
+                if current.value_text != text:
+                    current.value_text = text
+            else:
+                note.field_values.append(NoteFieldValue(field=field, value_text=text))
+        touched[content_hash] = note
+
+    # Cards/previews só depois de aplicados todos os itens do lote (itens repetidos se fundem)
+    for content_hash, note in touched.items():
+        context = build_note_context(note)
+        if content_hash in new_mnemonics:
+            _build_cards(note, note_type.templates, context, new_mnemonics[content_hash])
+        else:
+            for card in note.cards:
+                card.preview = card_preview(render_template(card.template.front_template, context))
+
+    db.flush()
+    index_notes(db, [(note, [value.value_text for value in note.field_values]) for note in touched.values()])
+    result = NoteImportResult(
+        created=len(new_mnemonics),
+        updated=len(touched) - len(new_mnemonics),
+        note_ids=[notes_by_hash[content_hash].id for content_hash in hashes],
+    )
+    _commit_or_conflict(db)
+    return result
+
+
+def _load_note(db: Session, note_id: int) -> Note:
     return (
         db.query(Note)
         .options(
@@ -115,6 +450,6 @@ def create_note_with_cards(db: Session, payload: NoteCreate) -> Note:
             joinedload(Note.field_values).joinedload(NoteFieldValue.media_asset),
             joinedload(Note.note_type),
         )
-        .filter(Note.id == note.id)
+        .filter(Note.id == note_id)
         .first()
     )
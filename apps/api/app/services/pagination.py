@@ -0,0 +1,42 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any
+
+from fastapi import HTTPException, status
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(value: Any, last_id: int, scope: str | None = None) -> str:
+    """Cursor opaco de paginação keyset: último valor da chave de ordenação + id de desempate.
+
+    `scope` identifica a ordenação que gerou o cursor (ex.: "due:asc"); ele só vale para ela.
+    """
+    if isinstance(value, datetime):
+        value = {"dt": value.isoformat()}
+    payload = [value, last_id] if scope is None else [value, last_id, scope]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, scope: str | None = None, value_type: type | None = None) -> tuple[Any, int]:
+    """Valida e decodifica o cursor; 400 se ele é de outra ordenação ou o valor não é do tipo da chave."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        if scope is None:
+            value, last_id = data
+        else:
+            value, last_id, cursor_scope = data
+            if cursor_scope != scope:
+                raise ValueError("cursor from another ordering")
+        if isinstance(value, dict):
+            value = datetime.fromisoformat(value["dt"])
+        if value_type is not None and (not isinstance(value, value_type) or isinstance(value, bool)):
+            raise ValueError("cursor value of the wrong type")
+        if not isinstance(last_id, int) or isinstance(last_id, bool):
+            raise ValueError("cursor id is not an integer")
+        return value, last_id
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
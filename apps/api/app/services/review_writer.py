@@ -0,0 +1,148 @@
+"""Group commit das revisões avulsas (`POST /cards/{card_id}/review`) por usuário.
+
+Rajadas de revisões do mesmo usuário (cliques rápidos, várias abas) viravam um commit cada. Aqui a
+primeira requisição de uma rajada vira líder: espera `REVIEW_COALESCE_MS`, junta as revisões que
+chegaram do mesmo usuário nesse meio tempo e aplica todas numa sessão só, com um único commit. As
+demais threads só esperam o resultado da sua revisão (a mesma `ReviewResponse` da rota) ou o erro
+dela (404/403 valem só para a revisão em questão; uma falha no commit vale para o lote todo).
+
+A ordem de chegada é preservada: por usuário há no máximo um lote em andamento, e as revisões que
+chegam durante o commit formam o próximo lote, cuja liderança passa para a primeira delas.
+"""
+
+import threading
+import time
+from collections.abc import Callable
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import joinedload
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.metrics import stage_timer
+from app.models import Card, Deck, Note, User, UserCardProgress
+from app.schemas.study import ReviewResponse
+from app.services.srs import load_user_srs_params
+from app.services.study import record_review, review_response
+
+
+class PendingReview:
+    def __init__(self, user: User, card_id: int, correct: bool) -> None:
+        self.user = user
+        self.card_id = card_id
+        self.correct = correct
+        self.done = threading.Event()
+        self.lead = False
+        self.response: ReviewResponse | None = None
+        self.error: BaseException | None = None
+
+    def finish(self, response: ReviewResponse | None = None, error: BaseException | None = None) -> None:
+        self.response = response
+        self.error = error
+        self.done.set()
+
+
+class ReviewWriter:
+    def __init__(self, authorize: Callable[[Deck | None, User], Deck]) -> None:
+        # `authorize(deck, user)` devolve o deck ou levanta HTTPException (a mesma checagem das rotas de estudo)
+        self.authorize = authorize
+        # {user_id: revisões aguardando}; a presença da chave indica que há um líder ativo para o usuário
+        self.queues: dict[int, list[PendingReview]] = {}
+        self.lock = threading.Lock()
+
+    def submit(self, user: User, card_id: int, correct: bool) -> ReviewResponse:
+        """Aplica a revisão (junto com as concorrentes do mesmo usuário) e devolve a resposta dela."""
+        pending = PendingReview(user, card_id, correct)
+        with self.lock:
+            queue = self.queues.get(user.id)
+            lead = queue is None
+            if lead:
+                queue = self.queues[user.id] = []
+            queue.append(pending)
+
+        if lead:
+            with stage_timer("coalesce_wait"):
+                time.sleep(settings.REVIEW_COALESCE_MS / 1000)
+            self._lead(user.id)
+        else:
+            pending.done.wait()
+            if pending.lead:
+                # O lote anterior terminou e este pedido é o primeiro do seguinte: as revisões já se acumularam
+                pending.done.clear()
+                pending.lead = False
+                self._lead(user.id)
+
+        if pending.error is not None:
+            raise pending.error
+        return pending.response
+
+    def _lead(self, user_id: int) -> None:
+        with self.lock:
+            batch = self.queues[user_id]
+            self.queues[user_id] = []
+        try:
+            self._apply(batch)
+        finally:
+            with self.lock:
+                waiting = self.queues[user_id]
+                if waiting:
+                    waiting[0].lead = True
+                    waiting[0].done.set()
+                else:
+                    del self.queues[user_id]
+
+    def _apply(self, batch: list[PendingReview]) -> None:
+        user = batch[0].user
+        card_ids = {item.card_id for item in batch}
+        applied: list[tuple[PendingReview, ReviewResponse]] = []
+        try:
+            with SessionLocal() as db:
+                cards = {
+                    card.id: card
+                    for card in db.query(Card)
+                    .options(joinedload(Card.note).joinedload(Note.deck))
+                    .filter(Card.id.in_(card_ids))
+                }
+                progress_map = {
+                    progress.card_id: progress
+                    for progress in db.query(UserCardProgress).filter(
+                        UserCardProgress.user_id == user.id, UserCardProgress.card_id.in_(card_ids)
+                    )
+                }
+                srs_params: dict[str | None, dict | None] = {}
+                for item in batch:
+                    card = cards.get(item.card_id)
+                    try:
+                        if not card:
+                            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Card not found")
+                        with stage_timer("access_check"):
+                            deck = self.authorize(card.note.deck if card.note else None, user)
+                    except HTTPException as exc:
+                        item.finish(error=exc)
+                        continue
+                    if deck.srs_algorithm not in srs_params:
+                        srs_params[deck.srs_algorithm] = load_user_srs_params(db, user.id, deck.srs_algorithm)
+                    progress = record_review(
+                        db,
+                        user.id,
+                        deck,
+                        card,
+                        correct=item.correct,
+                        initial=False,
+                        progress=progress_map.get(card.id),
+                        params=srs_params[deck.srs_algorithm],
+                    )
+                    # A mesma carta duas vezes no lote: a segunda parte do progresso deixado pela primeira
+                    progress_map[card.id] = progress
+                    applied.append((item, review_response(card.id, progress)))
+                with stage_timer("commit"):
+                    db.commit()
+        except BaseException as exc:
+            for item, _ in applied:
+                item.finish(error=exc)
+            for item in batch:
+                if not item.done.is_set():
+                    item.finish(error=exc)
+            raise
+        for item, response in applied:
+            item.finish(response=response)
@@ -0,0 +1,51 @@
+"""Índice de busca das notas (`note_search_index`).
+
+Cada nota tem uma linha com o texto dos campos em duas formas (ver `packages.core.kana`): normalizado
+(minúsculas, katakana como hiragana) e chave em romaji. Assim "shi", "si", "し" e "シ" encontram a
+mesma nota com LIKE sobre `content`. O índice é mantido na escrita (`create_note_with_cards`, `update_note`).
+"""
+
+from sqlalchemy.orm import Session
+
+from app.models import Note, NoteSearchIndex
+from packages.core.kana import normalize_text, normalize_text_batch, romaji_key, romaji_key_batch
+
+
+def search_terms(query: str) -> list[str]:
+    """Formas da consulta procuradas no índice: texto normalizado (hiragana) e chave em romaji."""
+    terms = []
+    for term in (normalize_text(query), romaji_key(query)):
+        if term and term not in terms:
+            terms.append(term)
+    return terms
+
+
+def build_search_text(values: list[str | None]) -> str:
+    texts = [value for value in values if value]
+    lines: list[str] = []
+    for line in normalize_text_batch(texts) + romaji_key_batch(texts):
+        if line and line not in lines:
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def index_notes(db: Session, entries: list[tuple[Note, list[str | None]]]) -> None:
+    """Grava (ou substitui) as linhas de busca das notas com os textos dos campos (sem commit)."""
+    if not entries:
+        return
+    existing = {
+        entry.note_id: entry
+        for entry in db.query(NoteSearchIndex).filter(NoteSearchIndex.note_id.in_([note.id for note, _ in entries]))
+    }
+    for note, values in entries:
+        entry = existing.get(note.id)
+        if not entry:
+            entry = NoteSearchIndex(note_id=note.id, deck_id=note.deck_id)
+            db.add(entry)
+            existing[note.id] = entry
+        entry.deck_id = note.deck_id
+        entry.content = build_search_text(values)
+
+
+def index_note(db: Session, note: Note, values: list[str | None]) -> None:
+    index_notes(db, [(note, values)])
@@ -0,0 +1,408 @@
+"""Snapshot de deck em formato binário compacto (msgpack colunar comprimido com zstd).
+
+O arquivo é um único frame zstd com uma sequência de mapas msgpack ("registros"):
+
+- `header`: formato, versão e os atributos do deck;
+- `note_types`: tipos de nota com campos e templates (ids de origem, usados só como referência);
+- `media`: manifest de mídia em lotes colunares (`{coluna: [valores]}`), sem os bytes: o conteúdo
+  é endereçado por `sha256` e servido por `/media/<sha256>`;
+- `notes`: notas em lotes colunares, com os valores de campo achatados (`value_note` indexa a nota
+  dentro do lote);
+- `end`: totais, para o import confirmar que recebeu o arquivo inteiro.
+
+Export e import trabalham lote a lote, então nenhum dos dois monta o deck inteiro em memória.
+"""
+
+from datetime import datetime
+from typing import Any, Iterator
+
+import msgpack
+import zstandard
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models import Card, CardTemplate, Deck, MediaAsset, Note, NoteField, NoteFieldValue, NoteType
+from app.models.enums import MediaType, NoteFieldType
+from app.services.forks import deck_note_filter, deck_scope
+from app.services.media import blob_path, media_url
+from app.services.notes import _build_cards, note_content_hash, sort_field
+from app.services.search import index_notes
+
+SNAPSHOT_FORMAT = "nihon-flash-deck"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_MEDIA_TYPE = "application/vnd.nihon-flash.deck+zstd"
+NOTE_BATCH = 500
+MEDIA_BATCH = 1000
+ZSTD_LEVEL = 10
+# Limites da leitura: janela do zstd (o nível acima usa no máximo 4 MiB), pedaço de saída do
+# descompressor e registro msgpack incompleto em buffer
+SNAPSHOT_MAX_WINDOW_BYTES = 8 * 1024 * 1024
+SNAPSHOT_WRITE_SIZE = 128 * 1024
+SNAPSHOT_MAX_BUFFER_BYTES = 64 * 1024 * 1024
+
+DECK_ATTRIBUTES = (
+    "name",
+    "slug",
+    "description",
+    "description_md",
+    "cover_image_url",
+    "instructions_md",
+    "source_lang",
+    "target_lang",
+    "tags",
+    "srs_algorithm",
+    "load_balance_due",
+)
+FIELD_ATTRIBUTES = ("id", "name", "label", "is_required", "sort_order", "hint", "config")
+TEMPLATE_ATTRIBUTES = ("id", "name", "front_template", "back_template", "css", "is_active")
+MEDIA_COLUMNS = ("id", "file_name", "url", "media_type", "attribution", "license", "sha256", "metadata")
+
+
+def _columns(rows: list[dict[str, Any]], names: tuple[str, ...]) -> dict[str, list[Any]]:
+    return {name: [row[name] for row in rows] for name in names}
+
+
+def _rows(record: dict[str, Any], names: tuple[str, ...]) -> list[dict[str, Any]]:
+    columns = [record.get(name) or [] for name in names]
+    return [dict(zip(names, values)) for values in zip(*columns)]
+
+
+def _export_records(db: Session, deck_id: int) -> Iterator[dict[str, Any]]:
+    deck = db.get(Deck, deck_id)
+    yield {
+        "kind": "header",
+        "format": SNAPSHOT_FORMAT,
+        "version": SNAPSHOT_VERSION,
+        "exported_at": datetime.utcnow().isoformat(),
+        "deck": {name: getattr(deck, name) for name in DECK_ATTRIBUTES},
+    }
+
+    # Um fork exporta o que enxerga: as próprias notas e as da origem ainda não copiadas
+    note_filter = deck_note_filter(deck)
+    scope = deck_scope(deck)
+
+    # Tipos de nota do deck e os globais usados pelas notas dele
+    used_type_ids = select(Note.note_type_id).where(note_filter).distinct()
+    note_types = (
+        db.query(NoteType)
+        .options(selectinload(NoteType.fields), selectinload(NoteType.templates))
+        .filter(NoteType.deck_id.in_(scope) | NoteType.id.in_(used_type_ids))
+        .order_by(NoteType.id)
+        .all()
+    )
+    yield {
+        "kind": "note_types",
+        "items": [
+            {
+                "id": note_type.id,
+                "name": note_type.name,
+                "description": note_type.description,
+                "fields": [
+                    {**{name: getattr(field, name) for name in FIELD_ATTRIBUTES}, "field_type": field.field_type.value}
+                    for field in note_type.fields
+                ],
+                "templates": [
+                    {name: getattr(template, name) for name in TEMPLATE_ATTRIBUTES}
+                    for template in sorted(note_type.templates, key=lambda t: t.id)
+                ],
+            }
+            for note_type in note_types
+        ],
+    }
+    db.expunge_all()
+
+    media_count = 0
+    last_id = 0
+    while True:
+        assets = db.scalars(
+            select(MediaAsset)
+            .where(MediaAsset.deck_id.in_(scope), MediaAsset.id > last_id)
+            .order_by(MediaAsset.id)
+            .limit(MEDIA_BATCH)
+        ).all()
+        if not assets:
+            break
+        rows = [
+            {
+                "id": asset.id,
+                "file_name": asset.file_name,
+                "url": asset.url,
+                "media_type": asset.media_type.value,
+                "attribution": asset.attribution,
+                "license": asset.license,
+                "sha256": asset.sha256,
+                "metadata": asset.metadata_json or {},
+            }
+            for asset in assets
+        ]
+        yield {"kind": "media", **_columns(rows, MEDIA_COLUMNS)}
+        media_count += len(assets)
+        last_id = assets[-1].id
+        db.expunge_all()
+
+    note_count = 0
+    last_id = 0
+    while True:
+        notes = db.execute(
+            select(Note.id, Note.note_type_id, Note.tags)
+            .where(note_filter, Note.id > last_id)
+            .order_by(Note.id)
+            .limit(NOTE_BATCH)
+        ).all()
+        if not notes:
+            break
+        ids = [note.id for note in notes]
+        position = {note_id: index for index, note_id in enumerate(ids)}
+        values = db.execute(
+            select(NoteFieldValue.note_id, NoteFieldValue.field_id, NoteFieldValue.value_text, NoteFieldValue.media_asset_id)
+            .where(NoteFieldValue.note_id.in_(ids))
+            .order_by(NoteFieldValue.note_id, NoteFieldValue.id)
+        ).all()
+        # O mnemônico mora nos cards; todos os cards da nota compartilham o mesmo
+        mnemonics: dict[int, str | None] = {}
+        for note_id, mnemonic in db.execute(
+            select(Card.note_id, Card.mnemonic).where(Card.note_id.in_(ids)).order_by(Card.id)
+        ):
+            mnemonics.setdefault(note_id, mnemonic)
+        yield {
+            "kind": "notes",
+            "id": ids,
+            "note_type_id": [note.note_type_id for note in notes],
+            "tags": [note.tags or [] for note in notes],
+            "mnemonic": [mnemonics.get(note_id) for note_id in ids],
+            "value_note": [position[value.note_id] for value in values],
+            "value_field": [value.field_id for value in values],
+            "value_text": [value.value_text for value in values],
+            "value_media": [value.media_asset_id for value in values],
+        }
+        note_count += len(notes)
+        last_id = ids[-1]
+
+    yield {"kind": "end", "notes": note_count, "media": media_count}
+
+
+def export_deck_stream(deck_id: int) -> Iterator[bytes]:
+    """Gera o snapshot em pedaços comprimidos. Usa sessão própria: a da requisição fecha antes do streaming."""
+    db = SessionLocal()
+    compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+    packer = msgpack.Packer()
+    try:
+        for record in _export_records(db, deck_id):
+            chunk = compressor.compress(packer.pack(record))
+            if chunk:
+                yield chunk
+        yield compressor.flush()
+    finally:
+        db.close()
+
+
+def _invalid(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid snapshot: {detail}")
+
+
+class _SnapshotTooLarge(Exception):
+    pass
+
+
+class _UnpackerSink:
+    """Destino do `stream_writer`: recebe a saída em pedaços de até `write_size` e conta o total."""
+
+    def __init__(self, unpacker: msgpack.Unpacker, max_bytes: int) -> None:
+        self.unpacker = unpacker
+        self.max_bytes = max_bytes
+        self.size = 0
+
+    def write(self, data: bytes) -> int:
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise _SnapshotTooLarge
+        self.unpacker.feed(data)
+        return len(data)
+
+
+class SnapshotReader:
+    """Descomprime e decodifica o snapshot incrementalmente: `feed(chunk)` devolve os registros completos.
+
+    A saída é limitada: janela do zstd até `SNAPSHOT_MAX_WINDOW_BYTES` (memória do decoder) e no
+    máximo `max_bytes` descomprimidos no total (`413` acima disso), então um arquivo pequeno que
+    expande para gigabytes é recusado sem ser materializado.
+    """
+
+    def __init__(self, max_bytes: int | None = None) -> None:
+        self._unpacker = msgpack.Unpacker(raw=False, strict_map_key=False, max_buffer_size=SNAPSHOT_MAX_BUFFER_BYTES)
+        self._sink = _UnpackerSink(self._unpacker, max_bytes or settings.DECK_IMPORT_MAX_DECOMPRESSED_BYTES)
+        self._decompressor = zstandard.ZstdDecompressor(max_window_size=SNAPSHOT_MAX_WINDOW_BYTES).stream_writer(
+            self._sink, write_size=SNAPSHOT_WRITE_SIZE, closefd=False
+        )
+
+    def feed(self, chunk: bytes) -> list[dict[str, Any]]:
+        if not chunk:
+            return []
+        try:
+            self._decompressor.write(chunk)
+            records = list(self._unpacker)
+        except _SnapshotTooLarge:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Snapshot too large when decompressed"
+            ) from None
+        except (zstandard.ZstdError, ValueError, msgpack.UnpackException) as exc:
+            raise _invalid("corrupted data") from exc
+        if any(not isinstance(record, dict) for record in records):
+            raise _invalid("unexpected record")
+        return records
+
+
+def _unique_slug(db: Session, base: str) -> str:
+    slug = base
+    suffix = 2
+    while db.scalar(select(Deck.id).where(Deck.slug == slug)):
+        slug = f"{base}-{suffix}"
+        suffix += 1
+    return slug
+
+
+class DeckImporter:
+    """Aplica os registros do snapshot num deck novo do usuário, lote a lote (commit só no `finish`)."""
+
+    def __init__(self, db: Session, owner_id: int, slug: str | None = None, name: str | None = None) -> None:
+        self.db = db
+        self.owner_id = owner_id
+        self.slug = slug
+        self.name = name
+        self.deck: Deck | None = None
+        self.note_types: dict[int, NoteType] = {}
+        self.fields: dict[int, NoteField] = {}
+        self.sort_field_ids: set[int] = set()
+        self.media: dict[int, tuple[int, str]] = {}
+        self.counts = {"notes": 0, "media": 0}
+        self.finished = False
+
+    def apply(self, record: dict[str, Any]) -> None:
+        kind = record.get("kind")
+        if self.deck is None and kind != "header":
+            raise _invalid("missing header")
+        if self.finished:
+            raise _invalid("data after end")
+        handler = getattr(self, f"_apply_{kind}", None)
+        if handler is None:
+            raise _invalid(f"unknown record '{kind}'")
+        try:
+            handler(record)
+        except (KeyError, TypeError, ValueError) as exc:
+            raise _invalid(f"malformed '{kind}' record") from exc
+
+    def _apply_header(self, record: dict[str, Any]) -> None:
+        if self.deck is not None:
+            raise _invalid("duplicated header")
+        if record.get("format") != SNAPSHOT_FORMAT or record.get("version") != SNAPSHOT_VERSION:
+            raise _invalid("unsupported format or version")
+        attributes = {name: value for name, value in record["deck"].items() if name in DECK_ATTRIBUTES}
+        if self.name:
+            attributes["name"] = self.name
+        attributes["slug"] = self.slug or _unique_slug(self.db, attributes.get("slug") or "deck")
+        if self.db.scalar(select(Deck.id).where(Deck.slug == attributes["slug"])):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Slug already in use")
+        self.deck = Deck(**attributes, owner_id=self.owner_id, is_public=False)
+        self.db.add(self.deck)
+        self.db.flush()
+
+    def _apply_note_types(self, record: dict[str, Any]) -> None:
+        # Sempre cópias presas ao deck novo, inclusive de tipos globais: ids mudam entre ambientes
+        for item in record["items"]:
+            note_type = NoteType(name=item["name"], description=item.get("description"), deck_id=self.deck.id)
+            for data in item["fields"]:
+                field = NoteField(
+                    **{name: data[name] for name in FIELD_ATTRIBUTES if name != "id"},
+                    field_type=NoteFieldType(data["field_type"]),
+                )
+                note_type.fields.append(field)
+                self.fields[data["id"]] = field
+            for data in item["templates"]:
+                note_type.templates.append(CardTemplate(**{name: data[name] for name in TEMPLATE_ATTRIBUTES if name != "id"}))
+            self.db.add(note_type)
+            self.note_types[item["id"]] = note_type
+        self.db.flush()
+        for note_type in self.note_types.values():
+            key_field = sort_field(note_type)
+            if key_field:
+                self.sort_field_ids.add(key_field.id)
+
+    def _apply_media(self, record: dict[str, Any]) -> None:
+        assets = []
+        for row in _rows(record, MEDIA_COLUMNS):
+            sha = row["sha256"]
+            # Conteúdo já presente neste ambiente é servido daqui; senão mantém a URL de origem
+            url = media_url(sha) if sha and blob_path(sha).exists() else row["url"]
+            asset = MediaAsset(
+                deck_id=self.deck.id,
+                file_name=row["file_name"],
+                url=url,
+                media_type=MediaType(row["media_type"]),
+                attribution=row["attribution"],
+                license=row["license"],
+                sha256=sha,
+                metadata_json=row["metadata"] or {},
+            )
+            self.db.add(asset)
+            assets.append((row["id"], asset))
+        self.db.flush()
+        for source_id, asset in assets:
+            self.media[source_id] = (asset.id, asset.url)
+        self.counts["media"] += len(assets)
+
+    def _apply_notes(self, record: dict[str, Any]) -> None:
+        notes: list[Note] = []
+        contexts: list[dict[str, str]] = []
+        texts: list[list[str | None]] = []
+        sort_values: list[str | None] = []
+        for note_type_id, tags in zip(record["note_type_id"], record["tags"]):
+            note = Note(deck_id=self.deck.id, note_type_id=self.note_types[note_type_id].id, tags=tags or [])
+            notes.append(note)
+            contexts.append({})
+            texts.append([])
+            sort_values.append(None)
+
+        for index, field_id, text, media_id in zip(
+            record["value_note"], record["value_field"], record["value_text"], record["value_media"]
+        ):
+            field = self.fields[field_id]
+            asset_id, url = self.media[media_id] if media_id is not None else (None, None)
+            notes[index].field_values.append(NoteFieldValue(field=field, value_text=text, media_asset_id=asset_id))
+            contexts[index][field.name] = url or text or ""
+            texts[index].append(text)
+            if field.id in self.sort_field_ids:
+                sort_values[index] = text
+
+        for note, source_type_id, context, mnemonic, sort_value in zip(
+            notes, record["note_type_id"], contexts, record["mnemonic"], sort_values
+        ):
+            note_type = self.note_types[source_type_id]
+            note.content_hash = note_content_hash(note_type.id, sort_value)
+            _build_cards(note, note_type.templates, context, mnemonic)
+            self.db.add(note)
+        self.db.flush()
+        index_notes(self.db, list(zip(notes, texts)))
+        self.db.flush()
+        self.counts["notes"] += len(notes)
+        # Libera o lote do identity map: o import não acumula o deck em memória
+        for note in notes:
+            self.db.expunge(note)
+
+    def _apply_end(self, record: dict[str, Any]) -> None:
+        if record.get("notes") != self.counts["notes"] or record.get("media") != self.counts["media"]:
+            raise _invalid("incomplete data")
+        self.finished = True
+
+    def finish(self, commit: bool = True) -> Deck:
+        """Valida o fim do snapshot e grava o deck; com `commit=False` só faz flush (quem chama commita)."""
+        if not self.finished:
+            raise _invalid("truncated file")
+        if commit:
+            self.db.commit()
+        else:
+            self.db.flush()
+        self.db.refresh(self.deck)
+        return self.deck
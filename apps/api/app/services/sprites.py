@@ -0,0 +1,177 @@
+"""Sprites de áudio por deck: os áudios do deck concatenados em poucos arquivos.
+
+Uma sessão de estudo baixa um ou dois sprites (cacheados como qualquer blob de `/media`) em vez
+de um arquivo por card; o cliente toca o trecho `[offset, offset + duration)` de cada clipe.
+O índice fica em `Deck.audio_sprites` e cada `MediaAsset` incluído ganha `metadata["sprite"]`
+com `{url, offset, duration}`.
+
+MP3s são concatenados frame a frame (sem recodificar, com a duração exata pela contagem de
+frames) e WAVs amostra a amostra, com um pequeno silêncio entre os clipes. Só entram no mesmo
+sprite arquivos com os mesmos parâmetros (taxa/canais); formatos sem suporte ficam de fora e
+continuam tocando pela própria URL.
+"""
+
+import hashlib
+import io
+import wave
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import Deck, MediaAsset
+from app.models.enums import MediaType
+from app.services.forks import deck_scope
+from app.services.media import blob_path, media_url, mp3_frames, sniff_file, store_file
+
+# Limite por sprite: o primeiro áudio da sessão não deve esperar um download grande
+SPRITE_MAX_BYTES = 2 * 1024 * 1024
+WAV_GAP_SECONDS = 0.05
+
+
+@dataclass
+class _Clip:
+    asset_id: int
+    data: bytes
+    duration: float
+
+
+@dataclass
+class _Pack:
+    mime_type: str
+    params: Any
+    clips: list[_Clip] = field(default_factory=list)
+    size: int = 0
+
+
+def _load_clip(asset: MediaAsset) -> tuple[str, Any, _Clip] | None:
+    path = blob_path(asset.sha256)
+    if not path.exists():
+        return None
+    mime = sniff_file(path)
+    if mime == "audio/mpeg":
+        parsed = mp3_frames(path.read_bytes())
+        if not parsed:
+            return None
+        data, duration, sample_rate = parsed
+        return mime, sample_rate, _Clip(asset.id, data, duration)
+    if mime == "audio/wav":
+        try:
+            with wave.open(str(path), "rb") as wav:
+                params = (wav.getnchannels(), wav.getsampwidth(), wav.getframerate())
+                data = wav.readframes(wav.getnframes())
+        except (wave.Error, EOFError):
+            return None
+        return mime, params, _Clip(asset.id, data, len(data) / (params[0] * params[1] * params[2]))
+    return None
+
+
+def _encode_pack(pack: _Pack) -> tuple[bytes, dict[int, tuple[float, float]], float]:
+    """Concatena os clipes; devolve os bytes, {asset_id: (offset, duração)} e a duração total."""
+    offsets: dict[int, tuple[float, float]] = {}
+    position = 0.0
+    if pack.mime_type == "audio/mpeg":
+        for clip in pack.clips:
+            offsets[clip.asset_id] = (round(position, 3), round(clip.duration, 3))
+            position += clip.duration
+        return b"".join(clip.data for clip in pack.clips), offsets, round(position, 3)
+
+    channels, sample_width, rate = pack.params
+    gap = b"\x00" * (int(rate * WAV_GAP_SECONDS) * channels * sample_width)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as out:
+        out.setnchannels(channels)
+        out.setsampwidth(sample_width)
+        out.setframerate(rate)
+        for index, clip in enumerate(pack.clips):
+            if index:
+                out.writeframes(gap)
+                position += WAV_GAP_SECONDS
+            offsets[clip.asset_id] = (round(position, 3), round(clip.duration, 3))
+            out.writeframes(clip.data)
+            position += clip.duration
+    return buffer.getvalue(), offsets, round(position, 3)
+
+
+def _sprite_key(assets: list[MediaAsset]) -> str:
+    content = ",".join(f"{asset.id}:{asset.sha256}" for asset in sorted(assets, key=lambda a: a.id))
+    return hashlib.blake2b(content.encode("ascii"), digest_size=16).hexdigest()
+
+
+def _audio_assets(db: Session, deck: Deck) -> list[MediaAsset]:
+    # Num fork, os áudios da origem também tocam nos cards: entram no sprite do fork
+    return list(
+        db.scalars(
+            select(MediaAsset)
+            .where(
+                MediaAsset.deck_id.in_(deck_scope(deck)),
+                MediaAsset.media_type == MediaType.audio,
+                MediaAsset.sha256.is_not(None),
+            )
+            .order_by(MediaAsset.id)
+        )
+    )
+
+
+def sprites_stale(db: Session, deck: Deck) -> bool:
+    """True se os áudios do deck mudaram desde o último build."""
+    return (deck.audio_sprites or {}).get("key") != _sprite_key(_audio_assets(db, deck))
+
+
+def build_deck_sprites(db: Session, deck: Deck, max_bytes: int = SPRITE_MAX_BYTES) -> dict[str, Any]:
+    """Monta os sprites do deck, grava o índice em `deck.audio_sprites` e nos assets (sem commit)."""
+    assets = _audio_assets(db, deck)
+    packs: list[_Pack] = []
+    open_packs: dict[tuple[str, Any], _Pack] = {}
+    for asset in assets:
+        loaded = _load_clip(asset)
+        if not loaded:
+            continue
+        mime, params, clip = loaded
+        pack = open_packs.get((mime, params))
+        if pack is None or (pack.clips and pack.size + len(clip.data) > max_bytes):
+            pack = _Pack(mime_type=mime, params=params)
+            open_packs[(mime, params)] = pack
+            packs.append(pack)
+        pack.clips.append(clip)
+        pack.size += len(clip.data)
+
+    sprites: list[dict[str, Any]] = []
+    clips: dict[str, dict[str, Any]] = {}
+    for number, pack in enumerate(packs):
+        data, offsets, duration = _encode_pack(pack)
+        blob = store_file(io.BytesIO(data))
+        sprites.append(
+            {
+                "sha256": blob.sha256,
+                "url": media_url(blob.sha256),
+                "mime_type": pack.mime_type,
+                "size": blob.size,
+                "duration": duration,
+            }
+        )
+        for asset_id, (offset, clip_duration) in offsets.items():
+            clips[str(asset_id)] = {"sprite": number, "offset": offset, "duration": clip_duration}
+
+    # `metadata.sprite` só nos assets do próprio deck: os da origem apontam para o sprite dela
+    for asset in (asset for asset in assets if asset.deck_id == deck.id):
+        metadata = {key: value for key, value in (asset.metadata_json or {}).items() if key != "sprite"}
+        clip = clips.get(str(asset.id))
+        if clip:
+            metadata["sprite"] = {
+                "url": sprites[clip["sprite"]]["url"],
+                "offset": clip["offset"],
+                "duration": clip["duration"],
+            }
+        if metadata != asset.metadata_json:
+            asset.metadata_json = metadata
+
+    deck.audio_sprites = {
+        "key": _sprite_key(assets),
+        "built_at": datetime.utcnow().isoformat(),
+        "sprites": sprites,
+        "clips": clips,
+    }
+    return deck.audio_sprites
@@ -0,0 +1,143 @@
+"""Ajuste offline dos parâmetros SRS por usuário a partir do card_review_log.
+
+Cada usuário é processado isoladamente: os logs são lidos em streaming (ordenados por card e data),
+cada par de revisões consecutivas do mesmo card vira uma razão `tempo decorrido / intervalo agendado`
+e o resultado é acumulado em bins fixos. A memória fica limitada ao tamanho do chunk mais os bins,
+independente de quantas linhas o usuário tenha. Usuários são distribuídos num pool de processos.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Iterator
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal, engine
+from app.models import CardReviewLog, UserSrsParams
+from packages.core.srs.fitting import DEFAULT_DESIRED_RETENTION, fit_sm2_params
+
+FITTED_ALGORITHM = "sm2"
+DEFAULT_CHUNK_SIZE = 5000
+# Razões t/I agrupadas em bins de 0.05 até 10x o intervalo (o último bin acumula o excedente)
+RATIO_BIN_WIDTH = 0.05
+RATIO_MAX = 10.0
+RATIO_BINS = int(RATIO_MAX / RATIO_BIN_WIDTH)
+
+
+def iter_user_ids(db: Session) -> Iterator[int]:
+    yield from db.scalars(select(CardReviewLog.user_id).distinct().order_by(CardReviewLog.user_id))
+
+
+def collect_ratio_bins(db: Session, user_id: int, chunk_size: int = DEFAULT_CHUNK_SIZE) -> tuple[np.ndarray, np.ndarray]:
+    """Contagens de acertos/erros por bin de razão t/I para um usuário, lendo o log em streaming."""
+    successes = np.zeros(RATIO_BINS, dtype=np.float64)
+    failures = np.zeros(RATIO_BINS, dtype=np.float64)
+
+    rows = db.execute(
+        select(
+            CardReviewLog.card_id,
+            CardReviewLog.created_at,
+            CardReviewLog.correct,
+            CardReviewLog.srs_interval_after,
+        )
+        .where(CardReviewLog.user_id == user_id)
+        .order_by(CardReviewLog.card_id, CardReviewLog.created_at, CardReviewLog.id)
+        .execution_options(yield_per=chunk_size)
+    )
+
+    previous_card: int | None = None
+    previous_at: datetime | None = None
+    previous_interval = 0
+    ratios: list[float] = []
+    outcomes: list[bool] = []
+
+    def flush() -> None:
+        if not ratios:
+            return
+        bins = np.minimum((np.asarray(ratios) / RATIO_BIN_WIDTH).astype(np.int64), RATIO_BINS - 1)
+        hits = np.asarray(outcomes, dtype=bool)
+        successes[:] += np.bincount(bins[hits], minlength=RATIO_BINS)
+        failures[:] += np.bincount(bins[~hits], minlength=RATIO_BINS)
+        ratios.clear()
+        outcomes.clear()
+
+    for card_id, created_at, correct, interval_after in rows:
+        if card_id == previous_card and previous_at and created_at and previous_interval > 0:
+            elapsed = (created_at - previous_at).total_seconds() / 60
+            if elapsed > 0:
+                ratios.append(elapsed / previous_interval)
+                outcomes.append(bool(correct))
+                if len(ratios) >= chunk_size:
+                    flush()
+        previous_card = card_id
+        previous_at = created_at
+        previous_interval = interval_after or 0
+    flush()
+    return successes, failures
+
+
+def fit_user(
+    user_id: int,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    desired_retention: float = DEFAULT_DESIRED_RETENTION,
+) -> tuple[int, dict[str, float] | None]:
+    db = SessionLocal()
+    try:
+        successes, failures = collect_ratio_bins(db, user_id, chunk_size)
+    finally:
+        db.close()
+    centers = (np.arange(RATIO_BINS) + 0.5) * RATIO_BIN_WIDTH
+    return user_id, fit_sm2_params(centers, successes, failures, desired_retention=desired_retention)
+
+
+def _init_worker() -> None:
+    # Conexões herdadas do processo pai não podem ser reutilizadas após o fork
+    engine.dispose(close=False)
+
+
+def save_user_params(db: Session, user_id: int, params: dict[str, float]) -> None:
+    row = db.get(UserSrsParams, (user_id, FITTED_ALGORITHM))
+    if not row:
+        row = UserSrsParams(user_id=user_id, algorithm=FITTED_ALGORITHM)
+        db.add(row)
+    row.params = params
+    row.review_count = int(params.get("review_count", 0))
+    row.fitted_at = datetime.utcnow()
+
+
+def run_fitting(
+    user_ids: list[int] | None = None,
+    workers: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    desired_retention: float = DEFAULT_DESIRED_RETENTION,
+) -> dict[str, int]:
+    """Ajusta e grava os parâmetros de todos os usuários (ou dos informados). Retorna contadores."""
+    db = SessionLocal()
+    try:
+        if user_ids is None:
+            user_ids = list(iter_user_ids(db))
+        summary = {"users": len(user_ids), "fitted": 0, "skipped": 0}
+        if not user_ids:
+            return summary
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            results = pool.map(
+                fit_user,
+                user_ids,
+                [chunk_size] * len(user_ids),
+                [desired_retention] * len(user_ids),
+            )
+            for user_id, params in results:
+                if params is None:
+                    summary["skipped"] += 1
+                    continue
+                save_user_params(db, user_id, params)
+                summary["fitted"] += 1
+                if summary["fitted"] % 100 == 0:
+                    db.commit()
+        db.commit()
+        return summary
+    finally:
+        db.close()
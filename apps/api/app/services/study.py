@@ -0,0 +1,319 @@
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import exists, func, or_, select
+from sqlalchemy.orm import Session, joinedload
+
+from app.core.metrics import stage_timer
+from app.models import Card, CardReviewLog, Deck, Note, NoteFieldValue, UserCardProgress, UserDeckState
+from app.models.enums import CardStatus
+from app.schemas.card import RenderedCard
+from app.schemas.note import NoteRead
+from app.schemas.study import ReviewResponse, ReviewStats
+from app.services.forks import deck_note_filter
+from app.services.load_balance import ensure_due_histogram, move_due, pick_balanced_due
+from app.services.notes import build_note_context, render_template
+from app.services.srs import apply_review
+
+
+def render_card(card: Card, progress: UserCardProgress | None = None) -> RenderedCard:
+    with stage_timer("build_note_context"):
+        context = build_note_context(card.note)
+    with stage_timer("render_template"):
+        front = render_template(card.template.front_template, context)
+        back = render_template(card.template.back_template, context)
+    with stage_timer("note_serialization"):
+        note_read = NoteRead.model_validate(card.note, from_attributes=True)
+
+    status = progress.status if progress else card.status
+    stage = getattr(progress, "stage", None) if progress else getattr(card, "stage", None)
+    srs_interval = progress.srs_interval if progress else card.srs_interval
+    srs_ease = progress.srs_ease if progress else card.srs_ease
+    due_at = progress.due_at if progress else card.due_at
+    last_reviewed_at = progress.last_reviewed_at if progress else card.last_reviewed_at
+    lapses = progress.lapses if progress else card.lapses
+    reps = progress.reps if progress else card.reps
+
+    return RenderedCard(
+        id=card.id,
+        note_id=card.note_id,
+        card_template_id=card.card_template_id,
+        mnemonic=card.mnemonic,
+        status=status,
+        stage=stage,
+        srs_interval=srs_interval,
+        srs_ease=srs_ease,
+        due_at=due_at,
+        last_reviewed_at=last_reviewed_at,
+        lapses=lapses,
+        reps=reps,
+        front=front,
+        back=back,
+        note=note_read,
+        template_name=card.template.name if card.template else None,
+    )
+
+
+# Cards já respondidos fora de ordem logo após os introduzidos também são absorvidos pelo cursor
+CURSOR_LOOKAHEAD = 50
+
+
+def get_new_card_cursor(db: Session, user_id: int, deck_id: int) -> int:
+    cursor = db.scalar(
+        select(UserDeckState.new_card_cursor).where(
+            UserDeckState.user_id == user_id, UserDeckState.deck_id == deck_id
+        )
+    )
+    return cursor or 0
+
+
+def advance_new_card_cursor(db: Session, user_id: int, deck: Deck, card_ids: list[int]) -> None:
+    """Avança o cursor de novos cards sobre o prefixo contíguo já introduzido (sem commit).
+
+    `card_ids` são os cards introduzidos agora (o progresso deles pode ainda não ter ido ao banco).
+    Um card de id menor ainda sem resposta segura o cursor: `new_cards_query` só olha ids acima dele,
+    então passar por cima o perderia de vez.
+    """
+    if not card_ids:
+        return
+    state = db.get(UserDeckState, (user_id, deck.id))
+    cursor = state.new_card_cursor if state else 0
+    introduced = set(card_ids)
+    has_progress = exists().where(UserCardProgress.card_id == Card.id, UserCardProgress.user_id == user_id)
+    candidates = (
+        db.query(Card.id, has_progress)
+        .join(Note)
+        .filter(deck_note_filter(deck), Card.id > cursor)
+        .order_by(Card.id)
+        .limit(len(introduced) + CURSOR_LOOKAHEAD)
+    )
+    new_cursor = cursor
+    for card_id, answered in candidates:
+        if not answered and card_id not in introduced:
+            break
+        new_cursor = card_id
+    if new_cursor == cursor:
+        return
+    if not state:
+        state = UserDeckState(user_id=user_id, deck_id=deck.id, new_card_cursor=0)
+        db.add(state)
+    state.new_card_cursor = new_cursor
+
+
+def new_cards_query(db: Session, user_id: int, deck: Deck):
+    """Cards novos a partir do cursor do usuário: range seek em Card.id em vez de anti-join no progresso.
+
+    O NOT EXISTS só descarta cards já respondidos fora da ordem (ex.: revisão direta), via PK do progresso.
+    """
+    has_progress = exists().where(UserCardProgress.card_id == Card.id, UserCardProgress.user_id == user_id)
+    return (
+        db.query(Card)
+        .join(Note)
+        .filter(
+            deck_note_filter(deck),
+            Card.id > get_new_card_cursor(db, user_id, deck.id),
+            Card.status != CardStatus.suspended,
+            ~has_progress,
+        )
+    )
+
+
+def select_new_cards(db: Session, user_id: int, deck: Deck, limit: int) -> list[Card]:
+    """Cards do deck ainda não introduzidos ao usuário, já com nota/template carregados.
+
+    Duas etapas: a fila (só ids, pelo índice) e depois a carga dos cards escolhidos com nota/template.
+    """
+    with stage_timer("queue_query"):
+        card_ids = [
+            row.id for row in new_cards_query(db, user_id, deck).with_entities(Card.id).order_by(Card.id).limit(limit)
+        ]
+    if not card_ids:
+        return []
+    with stage_timer("eager_load"):
+        return load_study_cards(db, card_ids)
+
+
+def load_study_cards(db: Session, card_ids: list[int]) -> list[Card]:
+    """Cards escolhidos para estudo com nota (valores, mídia, tipo) e template, na ordem de id."""
+    return (
+        db.query(Card)
+        .options(
+            joinedload(Card.template),
+            joinedload(Card.note).joinedload(Note.field_values).joinedload(NoteFieldValue.field),
+            joinedload(Card.note).joinedload(Note.field_values).joinedload(NoteFieldValue.media_asset),
+            joinedload(Card.note).joinedload(Note.note_type),
+        )
+        .filter(Card.id.in_(card_ids))
+        .order_by(Card.id)
+        .all()
+    )
+
+
+def select_reviews(
+    db: Session, user_id: int, deck: Deck, limit: int, due_only: bool = True, now: datetime | None = None
+) -> list[UserCardProgress]:
+    """Fila de revisão do usuário no deck, com card/nota/template carregados.
+
+    Como em `select_new_cards`: primeiro a fila (ids), depois a carga dos cards escolhidos.
+    """
+    query = (
+        db.query(UserCardProgress.card_id)
+        .join(Card, UserCardProgress.card_id == Card.id)
+        .join(Note, Card.note_id == Note.id)
+        .filter(
+            deck_note_filter(deck),
+            UserCardProgress.user_id == user_id,
+            UserCardProgress.status != CardStatus.suspended,
+        )
+    )
+    if due_only:
+        now = now or datetime.utcnow()
+        query = query.filter(or_(UserCardProgress.due_at == None, UserCardProgress.due_at <= now))  # noqa: E711
+    with stage_timer("queue_query"):
+        card_ids = [row.card_id for row in query.order_by(UserCardProgress.due_at.nullsfirst(), Card.id).limit(limit)]
+    if not card_ids:
+        return []
+
+    with stage_timer("eager_load"):
+        progresses = load_study_progress(db, user_id, card_ids)
+    position = {card_id: index for index, card_id in enumerate(card_ids)}
+    return sorted(progresses, key=lambda progress: position[progress.card_id])
+
+
+def load_study_progress(db: Session, user_id: int, card_ids: list[int]) -> list[UserCardProgress]:
+    """Progresso do usuário nos cards escolhidos, com card/nota/template carregados (sem ordem definida)."""
+    return (
+        db.query(UserCardProgress)
+        .options(
+            joinedload(UserCardProgress.card)
+            .joinedload(Card.template),
+            joinedload(UserCardProgress.card)
+            .joinedload(Card.note)
+            .joinedload(Note.field_values)
+            .joinedload(NoteFieldValue.field),
+            joinedload(UserCardProgress.card)
+            .joinedload(Card.note)
+            .joinedload(Note.field_values)
+            .joinedload(NoteFieldValue.media_asset),
+            joinedload(UserCardProgress.card).joinedload(Card.note).joinedload(Note.note_type),
+        )
+        .filter(UserCardProgress.user_id == user_id, UserCardProgress.card_id.in_(card_ids))
+        .all()
+    )
+
+
+def record_review(
+    db: Session,
+    user_id: int,
+    deck: Deck,
+    card: Card,
+    correct: bool,
+    initial: bool,
+    progress: UserCardProgress | None = None,
+    params: dict[str, Any] | None = None,
+    now: datetime | None = None,
+) -> UserCardProgress:
+    """Aplica uma resposta ao progresso do usuário e registra no card_review_log (sem commit).
+
+    `now` permite reaplicar revisões feitas offline no horário em que aconteceram.
+    """
+    now = now or datetime.utcnow()
+    if deck.load_balance_due:
+        # Antes de criar/alterar o progresso: a reconstrução não pode contar este card
+        ensure_due_histogram(db, user_id, deck)
+    if not progress:
+        progress = UserCardProgress(
+            user_id=user_id,
+            card_id=card.id,
+            status=CardStatus.new,
+            stage=None,
+            srs_interval=card.srs_interval,
+            srs_ease=card.srs_ease,
+            reps=0,
+            lapses=0,
+        )
+        db.add(progress)
+
+    before_stage = progress.stage
+    before_due = progress.due_at
+    with stage_timer("apply_review"):
+        apply_review(progress, correct=correct, initial=initial, algorithm=deck.srs_algorithm, params=params, now=now)
+    if deck.load_balance_due:
+        balanced_due = pick_balanced_due(db, user_id, deck.id, progress.due_at, progress.srs_interval)
+        move_due(db, user_id, deck.id, before_due, balanced_due)
+        progress.due_at = balanced_due
+    db.add(
+        CardReviewLog(
+            user_id=user_id,
+            card_id=card.id,
+            note_id=card.note_id,
+            deck_id=deck.id,
+            correct=correct,
+            stage_before=before_stage,
+            stage_after=progress.stage,
+            status_after=progress.status,
+            due_at_after=progress.due_at,
+            srs_interval_after=progress.srs_interval,
+            srs_ease_after=progress.srs_ease,
+            reps_after=progress.reps,
+            lapses_after=progress.lapses,
+            created_at=now,
+        )
+    )
+    return progress
+
+
+def review_response(card_id: int, progress: UserCardProgress) -> ReviewResponse:
+    return ReviewResponse(
+        card_id=card_id,
+        status=progress.status.value if progress.status else None,
+        stage=progress.stage.value if progress.stage else None,
+        due_at=progress.due_at,
+        srs_interval=progress.srs_interval,
+        srs_ease=progress.srs_ease,
+        reps=progress.reps,
+        lapses=progress.lapses,
+    )
+
+
+def _scheduled_progress_query(db: Session, user_id: int, deck: Deck):
+    return (
+        db.query(UserCardProgress)
+        .join(Card, UserCardProgress.card_id == Card.id)
+        .join(Note, Card.note_id == Note.id)
+        .filter(
+            deck_note_filter(deck),
+            UserCardProgress.user_id == user_id,
+            UserCardProgress.status != CardStatus.suspended,
+            UserCardProgress.due_at != None,  # noqa: E711
+        )
+    )
+
+
+def end_of_day(now: datetime) -> datetime:
+    return now.replace(hour=23, minute=59, second=59, microsecond=999999)
+
+
+def review_stats_with_next_change(
+    db: Session, user_id: int, deck: Deck, now: datetime | None = None
+) -> tuple[ReviewStats, datetime]:
+    """`review_stats` e quando elas mudam sozinhas (o próximo card a vencer ou a virada do dia), numa consulta só."""
+    now = now or datetime.utcnow()
+    due_now, due_today, next_due_at, upcoming = (
+        _scheduled_progress_query(db, user_id, deck)
+        .with_entities(
+            func.count().filter(UserCardProgress.due_at <= now),
+            func.count().filter(UserCardProgress.due_at <= end_of_day(now)),
+            func.min(UserCardProgress.due_at),
+            func.min(UserCardProgress.due_at).filter(UserCardProgress.due_at > now),
+        )
+        .one()
+    )
+    stats = ReviewStats(due_count_today=due_today or 0, due_now_count=due_now or 0, next_due_at=next_due_at)
+    midnight = end_of_day(now) + timedelta(microseconds=1)
+    return stats, min(upcoming, midnight) if upcoming else midnight
+
+
+def review_stats(db: Session, user_id: int, deck: Deck, now: datetime | None = None) -> ReviewStats:
+    """Contagens de revisão do usuário no deck (badge): devidas agora, até o fim do dia e o próximo vencimento."""
+    return review_stats_with_next_change(db, user_id, deck, now)[0]
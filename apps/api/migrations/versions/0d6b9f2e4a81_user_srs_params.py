@@ -0,0 +1,39 @@
+"""add user_srs_params table
+
+Revision ID: 0d6b9f2e4a81
+Revises: c71e4b0a8d52
+Create Date: 2026-10-19 12:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0d6b9f2e4a81"
+down_revision = "c71e4b0a8d52"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_srs_params",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("algorithm", sa.String(length=30), nullable=False),
+        sa.Column("params", sa.JSON(), nullable=False, server_default=sa.text("'{}'")),
+        sa.Column("review_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("fitted_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "algorithm"),
+    )
+    # Reconstrução das sequências por usuário/card no job de ajuste
+    op.create_index(
+        "ix_card_review_log_user_card_created",
+        "card_review_log",
+        ["user_id", "card_id", "created_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_card_review_log_user_card_created", table_name="card_review_log")
+    op.drop_table("user_srs_params")
@@ -0,0 +1,169 @@
+"""rebuild note_search_index: n' before vowels and a marker for a final sokuon
+
+Revision ID: 1f7c3e9a5b28
+Revises: b8e1f4c6a372
+Create Date: 2026-10-20 01:00:00.000000
+"""
+
+import re
+import unicodedata
+from collections import defaultdict
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "1f7c3e9a5b28"
+down_revision = "b8e1f4c6a372"
+branch_labels = None
+depends_on = None
+
+note_field_values = sa.table(
+    "note_field_values",
+    sa.column("note_id", sa.Integer),
+    sa.column("value_text", sa.Text),
+)
+note_search_index = sa.table(
+    "note_search_index",
+    sa.column("note_id", sa.Integer),
+    sa.column("content", sa.Text),
+)
+
+# Cópia congelada de `normalize_text`/`romaji_key` (`packages.core.kana`) nesta revisão: a migração
+# não pode mudar de comportamento quando o módulo evoluir
+_MONOGRAPHS = {
+    "あ": "a", "い": "i", "う": "u", "え": "e", "お": "o",
+    "か": "ka", "き": "ki", "く": "ku", "け": "ke", "こ": "ko",
+    "さ": "sa", "し": "shi", "す": "su", "せ": "se", "そ": "so",
+    "た": "ta", "ち": "chi", "つ": "tsu", "て": "te", "と": "to",
+    "な": "na", "に": "ni", "ぬ": "nu", "ね": "ne", "の": "no",
+    "は": "ha", "ひ": "hi", "ふ": "fu", "へ": "he", "ほ": "ho",
+    "ま": "ma", "み": "mi", "む": "mu", "め": "me", "も": "mo",
+    "や": "ya", "ゆ": "yu", "よ": "yo",
+    "ら": "ra", "り": "ri", "る": "ru", "れ": "re", "ろ": "ro",
+    "わ": "wa", "ゐ": "wi", "ゑ": "we", "を": "wo", "ん": "n",
+    "が": "ga", "ぎ": "gi", "ぐ": "gu", "げ": "ge", "ご": "go",
+    "ざ": "za", "じ": "ji", "ず": "zu", "ぜ": "ze", "ぞ": "zo",
+    "だ": "da", "ぢ": "ji", "づ": "zu", "で": "de", "ど": "do",
+    "ば": "ba", "び": "bi", "ぶ": "bu", "べ": "be", "ぼ": "bo",
+    "ぱ": "pa", "ぴ": "pi", "ぷ": "pu", "ぺ": "pe", "ぽ": "po",
+    "ゔ": "vu",
+    "ぁ": "a", "ぃ": "i", "ぅ": "u", "ぇ": "e", "ぉ": "o",
+    "ゃ": "ya", "ゅ": "yu", "ょ": "yo", "ゎ": "wa",
+}
+_YOON_BASES = {
+    "き": "ky", "ぎ": "gy", "に": "ny", "ひ": "hy", "び": "by", "ぴ": "py", "み": "my", "り": "ry",
+    "し": "sh", "じ": "j", "ち": "ch", "ぢ": "j",
+}
+_YOON_VOWELS = {"ゃ": "a", "ゅ": "u", "ょ": "o"}
+_EXTENDED = {
+    "てぃ": "ti", "でぃ": "di", "とぅ": "tu", "どぅ": "du",
+    "ふぁ": "fa", "ふぃ": "fi", "ふぇ": "fe", "ふぉ": "fo",
+    "うぃ": "wi", "うぇ": "we", "うぉ": "wo",
+    "ゔぁ": "va", "ゔぃ": "vi", "ゔぇ": "ve", "ゔぉ": "vo",
+    "しぇ": "she", "じぇ": "je", "ちぇ": "che",
+}
+_ROMAJI_ALIASES = {
+    "si": "し", "ti": "ち", "tu": "つ", "hu": "ふ", "zi": "じ", "di": "ぢ", "du": "づ",
+    "sya": "しゃ", "syu": "しゅ", "syo": "しょ",
+    "tya": "ちゃ", "tyu": "ちゅ", "tyo": "ちょ",
+    "zya": "じゃ", "zyu": "じゅ", "zyo": "じょ",
+    "jya": "じゃ", "jyu": "じゅ", "jyo": "じょ",
+    "cha": "ちゃ", "chu": "ちゅ", "cho": "ちょ",
+    "xa": "ぁ", "xi": "ぃ", "xu": "ぅ", "xe": "ぇ", "xo": "ぉ",
+    "la": "ぁ", "li": "ぃ", "lu": "ぅ", "le": "ぇ", "lo": "ぉ",
+    "xya": "ゃ", "xyu": "ゅ", "xyo": "ょ", "xtu": "っ", "ltu": "っ",
+}
+_MACRONS = str.maketrans(
+    {"ā": "aa", "ī": "ii", "ū": "uu", "ē": "ee", "ō": "ou", "â": "aa", "î": "ii", "û": "uu", "ê": "ee", "ô": "ou"}
+)
+_KATAKANA_TO_HIRAGANA = {code: code - 0x60 for code in range(ord("ァ"), ord("ヶ") + 1)}
+
+
+def _build_tables() -> tuple[dict[str, str], dict[int, str], dict[str, str]]:
+    kana_to_romaji = dict(_MONOGRAPHS)
+    for base, consonant in _YOON_BASES.items():
+        for small, vowel in _YOON_VOWELS.items():
+            kana_to_romaji[base + small] = consonant + vowel
+    kana_to_romaji.update(_EXTENDED)
+    for kana, romaji in list(kana_to_romaji.items()):
+        if romaji[0] not in "aeiou" and kana != "ん":
+            kana_to_romaji["っ" + kana] = ("t" if romaji.startswith("ch") else romaji[0]) + romaji
+
+    romaji_to_kana: dict[str, str] = {}
+    for kana, romaji in kana_to_romaji.items():
+        if kana.startswith("っ") or kana in "ぁぃぅぇぉゃゅょゎゐゑぢづ" or kana == "ん":
+            continue
+        romaji_to_kana.setdefault(romaji, kana)
+    for kana, romaji in _EXTENDED.items():
+        romaji_to_kana.setdefault(romaji, kana)
+    romaji_to_kana.update(_ROMAJI_ALIASES)
+    for romaji, kana in list(romaji_to_kana.items()):
+        if romaji[0] not in "aeioun":
+            romaji_to_kana[(romaji[0] if not romaji.startswith("ch") else "t") + romaji] = "っ" + kana
+
+    digraphs = {kana: romaji for kana, romaji in kana_to_romaji.items() if len(kana) > 1}
+    monographs = {ord(kana): romaji for kana, romaji in kana_to_romaji.items() if len(kana) == 1}
+    monographs[ord("っ")] = "xtu"
+    return digraphs, monographs, romaji_to_kana
+
+
+_KANA_DIGRAPHS, _KANA_MONOGRAPHS, _ROMAJI_TO_KANA = _build_tables()
+_KANA_PATTERN = re.compile("っ?[ぁ-ゖ][ぁぃぅぇぉゃゅょゎ]|っ[ぁ-ゖ]|ん(?=[あいうえおやゆよ])")
+_ROMAJI_PATTERN = re.compile(
+    "|".join(re.escape(key) for key in sorted(_ROMAJI_TO_KANA, key=len, reverse=True))
+    + r"|n'|nn(?![aiueoy])|n(?![aiueoy])"
+)
+_LONG_VOWEL = re.compile(r"([aeiou])ー")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _normalize_text(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text).lower().translate(_MACRONS)
+    return _WHITESPACE.sub(" ", text).strip().translate(_KATAKANA_TO_HIRAGANA)
+
+
+def _kana_repl(match: re.Match) -> str:
+    unit = match.group()
+    if unit == "ん":
+        return "n'"
+    romaji = _KANA_DIGRAPHS.get(unit)
+    return romaji if romaji is not None else unit.translate(_KANA_MONOGRAPHS)
+
+
+def _romaji_key(text: str) -> str:
+    hiragana = _ROMAJI_PATTERN.sub(lambda match: _ROMAJI_TO_KANA.get(match.group(), "ん"), _normalize_text(text))
+    romaji = _KANA_PATTERN.sub(_kana_repl, hiragana.translate(_KATAKANA_TO_HIRAGANA)).translate(_KANA_MONOGRAPHS)
+    return _LONG_VOWEL.sub(r"\1\1", romaji) if "ー" in romaji else romaji
+
+
+def _build_search_text(values: list[str | None]) -> str:
+    texts = [value for value in values if value]
+    lines: list[str] = []
+    for line in [_normalize_text(text) for text in texts] + [_romaji_key(text) for text in texts]:
+        if line and line not in lines:
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    values: dict[int, list[str]] = defaultdict(list)
+    for note_id, value_text in bind.execute(sa.select(note_field_values.c.note_id, note_field_values.c.value_text)):
+        values[note_id].append(value_text)
+    rows = [
+        {"target_id": note_id, "content": _build_search_text(values.get(note_id, []))}
+        for note_id in bind.execute(sa.select(note_search_index.c.note_id)).scalars()
+    ]
+    if rows:
+        bind.execute(
+            note_search_index.update()
+            .where(note_search_index.c.note_id == sa.bindparam("target_id"))
+            .values(content=sa.bindparam("content")),
+            rows,
+        )
+
+
+def downgrade() -> None:
+    # A chave antiga ("kani" para かんい) só encontrava a mais; nada a desfazer
+    pass
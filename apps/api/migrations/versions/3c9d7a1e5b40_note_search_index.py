@@ -0,0 +1,107 @@
+"""add note_search_index for deck search
+
+Revision ID: 3c9d7a1e5b40
+Revises: a6e1c9d3f275
+Create Date: 2026-10-19 16:00:00.000000
+"""
+
+import unicodedata
+from collections import defaultdict
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "3c9d7a1e5b40"
+down_revision = "a6e1c9d3f275"
+branch_labels = None
+depends_on = None
+
+notes = sa.table("notes", sa.column("id", sa.Integer), sa.column("deck_id", sa.Integer))
+note_field_values = sa.table(
+    "note_field_values",
+    sa.column("note_id", sa.Integer),
+    sa.column("value_text", sa.Text),
+)
+
+# Cópia congelada da normalização de `app.services.search` nesta revisão: a migração não pode mudar
+# de comportamento quando o serviço evoluir (d5f8b2c4e617 reconstrói o índice com a normalização nova)
+_KATAKANA_TO_HIRAGANA = {code: code - 0x60 for code in range(ord("ァ"), ord("ヶ") + 1)}
+
+_ROMAJI = {
+    "あ": "a", "い": "i", "う": "u", "え": "e", "お": "o",
+    "か": "ka", "き": "ki", "く": "ku", "け": "ke", "こ": "ko",
+    "さ": "sa", "し": "shi", "す": "su", "せ": "se", "そ": "so",
+    "た": "ta", "ち": "chi", "つ": "tsu", "て": "te", "と": "to",
+    "な": "na", "に": "ni", "ぬ": "nu", "ね": "ne", "の": "no",
+    "は": "ha", "ひ": "hi", "ふ": "fu", "へ": "he", "ほ": "ho",
+    "ま": "ma", "み": "mi", "む": "mu", "め": "me", "も": "mo",
+    "や": "ya", "ゆ": "yu", "よ": "yo",
+    "ら": "ra", "り": "ri", "る": "ru", "れ": "re", "ろ": "ro",
+    "わ": "wa", "を": "wo", "ん": "n",
+    "が": "ga", "ぎ": "gi", "ぐ": "gu", "げ": "ge", "ご": "go",
+    "ざ": "za", "じ": "ji", "ず": "zu", "ぜ": "ze", "ぞ": "zo",
+    "だ": "da", "ぢ": "ji", "づ": "zu", "で": "de", "ど": "do",
+    "ば": "ba", "び": "bi", "ぶ": "bu", "べ": "be", "ぼ": "bo",
+    "ぱ": "pa", "ぴ": "pi", "ぷ": "pu", "ぺ": "pe", "ぽ": "po",
+}
+
+
+def _build_search_text(values: list[str]) -> str:
+    lines: list[str] = []
+    for value in values:
+        if not value:
+            continue
+        raw = unicodedata.normalize("NFKC", value).lower()
+        folded = unicodedata.normalize("NFKC", value).strip().lower().translate(_KATAKANA_TO_HIRAGANA)
+        romaji = "".join(_ROMAJI.get(char, char) for char in folded)
+        for variant in (raw, folded, romaji):
+            if variant not in lines:
+                lines.append(variant)
+    return "\n".join(lines)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "note_search_index",
+        sa.Column("note_id", sa.Integer(), nullable=False),
+        sa.Column("deck_id", sa.Integer(), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False, server_default=""),
+        sa.ForeignKeyConstraint(["note_id"], ["notes.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["deck_id"], ["decks.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("note_id"),
+    )
+    op.create_index("ix_note_search_index_deck_id", "note_search_index", ["deck_id"])
+
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        # Índice trigram atende LIKE '%termo%' sem varrer o deck inteiro
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute(
+            "CREATE INDEX ix_note_search_index_content_trgm ON note_search_index USING gin (content gin_trgm_ops)"
+        )
+
+    values: dict[int, list[str]] = defaultdict(list)
+    for note_id, value_text in bind.execute(sa.select(note_field_values.c.note_id, note_field_values.c.value_text)):
+        values[note_id].append(value_text)
+    rows = [
+        {"note_id": note_id, "deck_id": deck_id, "content": _build_search_text(values.get(note_id, []))}
+        for note_id, deck_id in bind.execute(sa.select(notes.c.id, notes.c.deck_id))
+    ]
+    if rows:
+        op.bulk_insert(
+            sa.table(
+                "note_search_index",
+                sa.column("note_id", sa.Integer),
+                sa.column("deck_id", sa.Integer),
+                sa.column("content", sa.Text),
+            ),
+            rows,
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_note_search_index_content_trgm")
+    op.drop_index("ix_note_search_index_deck_id", table_name="note_search_index")
+    op.drop_table("note_search_index")
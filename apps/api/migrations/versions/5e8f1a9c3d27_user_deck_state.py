@@ -0,0 +1,31 @@
+"""add user_deck_state table with new-card cursor
+
+Revision ID: 5e8f1a9c3d27
+Revises: 9a4d2c7e1b3f
+Create Date: 2026-10-19 10:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "5e8f1a9c3d27"
+down_revision = "9a4d2c7e1b3f"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_deck_state",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("deck_id", sa.Integer(), nullable=False),
+        sa.Column("new_card_cursor", sa.Integer(), nullable=False, server_default="0"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["deck_id"], ["decks.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "deck_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("user_deck_state")
@@ -0,0 +1,109 @@
+"""add notes.content_hash for duplicate detection
+
+Revision ID: 7e2a4c9b1d53
+Revises: d5f8b2c4e617
+Create Date: 2026-10-19 18:00:00.000000
+"""
+
+import hashlib
+import json
+import re
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "7e2a4c9b1d53"
+down_revision = "d5f8b2c4e617"
+branch_labels = None
+depends_on = None
+
+notes = sa.table(
+    "notes",
+    sa.column("id", sa.Integer),
+    sa.column("deck_id", sa.Integer),
+    sa.column("note_type_id", sa.Integer),
+    sa.column("content_hash", sa.String),
+)
+note_fields = sa.table(
+    "note_fields",
+    sa.column("id", sa.Integer),
+    sa.column("note_type_id", sa.Integer),
+    sa.column("sort_order", sa.Integer),
+    sa.column("config", sa.JSON),
+)
+note_field_values = sa.table(
+    "note_field_values",
+    sa.column("note_id", sa.Integer),
+    sa.column("field_id", sa.Integer),
+    sa.column("value_text", sa.Text),
+)
+
+# Cópia congelada de `app.services.notes.note_content_hash` (com o `normalize_text` de
+# `packages.core.kana`) nesta revisão: a migração não pode mudar quando o serviço evoluir
+_MACRONS = str.maketrans(
+    {"ā": "aa", "ī": "ii", "ū": "uu", "ē": "ee", "ō": "ou", "â": "aa", "î": "ii", "û": "uu", "ê": "ee", "ô": "ou"}
+)
+_KATAKANA_TO_HIRAGANA = {code: code - 0x60 for code in range(ord("ァ"), ord("ヶ") + 1)}
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _note_content_hash(note_type_id: int, sort_value: str | None) -> str | None:
+    text = unicodedata.normalize("NFKC", sort_value or "").lower().translate(_MACRONS)
+    normalized = _WHITESPACE.sub(" ", text).strip().translate(_KATAKANA_TO_HIRAGANA)
+    if not normalized:
+        return None
+    return hashlib.blake2b(f"{note_type_id}\x1f{normalized}".encode(), digest_size=16).hexdigest()
+
+
+
+def _sort_fields(bind) -> dict[int, int]:
+    # Mesma regra de app.services.notes.sort_field: config.sort_field ou menor (sort_order, id)
+    chosen: dict[int, tuple] = {}
+    rows = bind.execute(
+        sa.select(note_fields.c.id, note_fields.c.note_type_id, note_fields.c.sort_order, note_fields.c.config)
+    )
+    for field_id, note_type_id, sort_order, config in rows:
+        if isinstance(config, str):
+            config = json.loads(config or "{}")
+        rank = (0 if (config or {}).get("sort_field") else 1, sort_order or 0, field_id)
+        if note_type_id not in chosen or rank < chosen[note_type_id]:
+            chosen[note_type_id] = rank
+    return {note_type_id: rank[2] for note_type_id, rank in chosen.items()}
+
+
+def upgrade() -> None:
+    op.add_column("notes", sa.Column("content_hash", sa.String(length=32), nullable=True))
+
+    bind = op.get_bind()
+    sort_fields = _sort_fields(bind)
+    values = {
+        (note_id, field_id): value_text
+        for note_id, field_id, value_text in bind.execute(
+            sa.select(note_field_values.c.note_id, note_field_values.c.field_id, note_field_values.c.value_text)
+        )
+    }
+    seen: set[tuple[int, str]] = set()
+    updates = []
+    for note_id, deck_id, note_type_id in bind.execute(
+        sa.select(notes.c.id, notes.c.deck_id, notes.c.note_type_id).order_by(notes.c.id)
+    ):
+        content_hash = _note_content_hash(note_type_id, values.get((note_id, sort_fields.get(note_type_id))))
+        # Duplicadas já existentes: a nota mais antiga fica com o hash, as demais ficam sem
+        if content_hash is None or (deck_id, content_hash) in seen:
+            continue
+        seen.add((deck_id, content_hash))
+        updates.append({"target_id": note_id, "content_hash": content_hash})
+    if updates:
+        bind.execute(
+            notes.update().where(notes.c.id == sa.bindparam("target_id")).values(content_hash=sa.bindparam("content_hash")),
+            updates,
+        )
+
+    op.create_index("uq_notes_deck_content_hash", "notes", ["deck_id", "content_hash"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("uq_notes_deck_content_hash", table_name="notes")
+    op.drop_column("notes", "content_hash")
@@ -0,0 +1,42 @@
+"""add updated_seq change tracking for offline sync
+
+Revision ID: 8b3c5e7f2a64
+Revises: f4a2d8c6b913
+Create Date: 2026-10-19 14:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "8b3c5e7f2a64"
+down_revision = "f4a2d8c6b913"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "sync_sequence",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("value", sa.Integer(), nullable=False, server_default="0"),
+    )
+    # Linhas existentes entram no seq 1, então um cliente novo (since=0) recebe tudo
+    op.execute("INSERT INTO sync_sequence (id, value) VALUES (1, 1)")
+
+    for table in ("cards", "notes", "user_card_progress"):
+        op.add_column(table, sa.Column("updated_seq", sa.Integer(), nullable=False, server_default="0"))
+        op.execute(f"UPDATE {table} SET updated_seq = 1")
+
+    op.create_index("ix_cards_updated_seq", "cards", ["updated_seq"])
+    op.create_index("ix_notes_updated_seq", "notes", ["updated_seq"])
+    op.create_index("ix_user_card_progress_user_seq", "user_card_progress", ["user_id", "updated_seq"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_card_progress_user_seq", table_name="user_card_progress")
+    op.drop_index("ix_notes_updated_seq", table_name="notes")
+    op.drop_index("ix_cards_updated_seq", table_name="cards")
+    for table in ("user_card_progress", "notes", "cards"):
+        op.drop_column(table, "updated_seq")
+    op.drop_table("sync_sequence")
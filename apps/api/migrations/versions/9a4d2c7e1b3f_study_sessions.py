@@ -0,0 +1,35 @@
+"""add study_sessions table
+
+Revision ID: 9a4d2c7e1b3f
+Revises: e3c2b5b8aa31
+Create Date: 2026-10-19 09:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "9a4d2c7e1b3f"
+down_revision = "e3c2b5b8aa31"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "study_sessions",
+        sa.Column("id", sa.String(length=36), primary_key=True),
+        sa.Column("user_id", sa.Integer(), nullable=False, index=True),
+        sa.Column("deck_id", sa.Integer(), nullable=False, index=True),
+        sa.Column("cards", sa.JSON(), nullable=False, server_default=sa.text("'[]'")),
+        sa.Column("cursor", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("answered_card_ids", sa.JSON(), nullable=False, server_default=sa.text("'[]'")),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["deck_id"], ["decks.id"], ondelete="CASCADE"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("study_sessions")
@@ -0,0 +1,76 @@
+"""add stored card preview for deck listings
+
+Revision ID: a6e1c9d3f275
+Revises: 8b3c5e7f2a64
+Create Date: 2026-10-19 15:00:00.000000
+"""
+
+import re
+from collections import defaultdict
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "a6e1c9d3f275"
+down_revision = "8b3c5e7f2a64"
+branch_labels = None
+depends_on = None
+
+PREVIEW_LENGTH = 80
+PLACEHOLDER = re.compile(r"{{\s*([\w\-]+)\s*}}")
+
+cards = sa.table(
+    "cards",
+    sa.column("id", sa.Integer),
+    sa.column("note_id", sa.Integer),
+    sa.column("card_template_id", sa.Integer),
+    sa.column("preview", sa.String),
+)
+card_templates = sa.table("card_templates", sa.column("id", sa.Integer), sa.column("front_template", sa.Text))
+note_fields = sa.table("note_fields", sa.column("id", sa.Integer), sa.column("name", sa.String))
+note_field_values = sa.table(
+    "note_field_values",
+    sa.column("note_id", sa.Integer),
+    sa.column("field_id", sa.Integer),
+    sa.column("value_text", sa.Text),
+    sa.column("media_asset_id", sa.Integer),
+)
+media_assets = sa.table("media_assets", sa.column("id", sa.Integer), sa.column("url", sa.String))
+
+
+def upgrade() -> None:
+    op.add_column("cards", sa.Column("preview", sa.String(length=120), nullable=True))
+
+    # Mesma renderização de app.services.notes.render_template, sem depender do app
+    bind = op.get_bind()
+    contexts: dict[int, dict[str, str]] = defaultdict(dict)
+    rows = bind.execute(
+        sa.select(note_field_values.c.note_id, note_fields.c.name, note_field_values.c.value_text, media_assets.c.url)
+        .select_from(note_field_values)
+        .join(note_fields, note_fields.c.id == note_field_values.c.field_id)
+        .outerjoin(media_assets, media_assets.c.id == note_field_values.c.media_asset_id)
+    )
+    for note_id, name, value_text, url in rows:
+        contexts[note_id][name] = url or value_text or ""
+
+    rows = bind.execute(
+        sa.select(cards.c.id, cards.c.note_id, card_templates.c.front_template).join(
+            card_templates, card_templates.c.id == cards.c.card_template_id
+        )
+    ).all()
+    updates = []
+    for card_id, note_id, front_template in rows:
+        context = contexts.get(note_id, {})
+        front = PLACEHOLDER.sub(lambda m: context.get(m.group(1), ""), front_template or "")
+        preview = front if len(front) <= PREVIEW_LENGTH else front[: PREVIEW_LENGTH - 3] + "..."
+        updates.append({"card_id": card_id, "preview": preview})
+    if updates:
+        bind.execute(
+            cards.update().where(cards.c.id == sa.bindparam("card_id")).values(preview=sa.bindparam("preview")),
+            updates,
+        )
+
+
+def downgrade() -> None:
+    op.drop_column("cards", "preview")
@@ -0,0 +1,37 @@
+"""widen updated_seq to bigint (transaction-id based sync seqs on Postgres)
+
+Revision ID: b8e1f4c6a372
+Revises: a7d3c5e9f260
+Create Date: 2026-10-20 00:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "b8e1f4c6a372"
+down_revision = "a7d3c5e9f260"
+branch_labels = None
+depends_on = None
+
+COLUMNS = (
+    ("cards", "updated_seq"),
+    ("notes", "updated_seq"),
+    ("user_card_progress", "updated_seq"),
+    ("sync_sequence", "value"),
+)
+
+
+def upgrade() -> None:
+    # No SQLite INTEGER já tem 64 bits; no Postgres os seqs passam a ser ids de transação (bigint)
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for table, column in COLUMNS:
+        op.alter_column(table, column, type_=sa.BigInteger(), existing_type=sa.Integer(), existing_nullable=False)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for table, column in COLUMNS:
+        op.alter_column(table, column, type_=sa.Integer(), existing_type=sa.BigInteger(), existing_nullable=False)
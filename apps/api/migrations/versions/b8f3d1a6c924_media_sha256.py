@@ -0,0 +1,27 @@
+"""add content-addressed sha256 to media_assets
+
+Revision ID: b8f3d1a6c924
+Revises: 7e2a4c9b1d53
+Create Date: 2026-10-19 19:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "b8f3d1a6c924"
+down_revision = "7e2a4c9b1d53"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("media_assets", sa.Column("sha256", sa.String(length=64), nullable=True))
+    op.create_index("ix_media_assets_sha256", "media_assets", ["sha256"])
+    op.create_index("uq_media_assets_deck_sha256", "media_assets", ["deck_id", "sha256"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("uq_media_assets_deck_sha256", table_name="media_assets")
+    op.drop_index("ix_media_assets_sha256", table_name="media_assets")
+    op.drop_column("media_assets", "sha256")
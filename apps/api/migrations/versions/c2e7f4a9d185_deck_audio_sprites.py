@@ -0,0 +1,23 @@
+"""add audio sprite index to decks
+
+Revision ID: c2e7f4a9d185
+Revises: b8f3d1a6c924
+Create Date: 2026-10-19 21:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "c2e7f4a9d185"
+down_revision = "b8f3d1a6c924"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("decks", sa.Column("audio_sprites", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("decks", "audio_sprites")
@@ -0,0 +1,26 @@
+"""add srs_algorithm to decks
+
+Revision ID: c71e4b0a8d52
+Revises: 5e8f1a9c3d27
+Create Date: 2026-10-19 11:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "c71e4b0a8d52"
+down_revision = "5e8f1a9c3d27"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "decks",
+        sa.Column("srs_algorithm", sa.String(length=30), nullable=False, server_default="stages"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("decks", "srs_algorithm")
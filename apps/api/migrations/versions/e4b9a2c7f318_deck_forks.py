@@ -0,0 +1,41 @@
+"""add copy-on-write deck forks
+
+Revision ID: e4b9a2c7f318
+Revises: c2e7f4a9d185
+Create Date: 2026-10-19 22:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "e4b9a2c7f318"
+down_revision = "c2e7f4a9d185"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("decks") as batch:
+        batch.add_column(sa.Column("source_deck_id", sa.Integer(), nullable=True))
+        batch.create_foreign_key(
+            "fk_decks_source_deck_id", "decks", ["source_deck_id"], ["id"], ondelete="SET NULL"
+        )
+        batch.create_index("ix_decks_source_deck_id", ["source_deck_id"])
+    with op.batch_alter_table("notes") as batch:
+        batch.add_column(sa.Column("origin_note_id", sa.Integer(), nullable=True))
+        batch.create_foreign_key(
+            "fk_notes_origin_note_id", "notes", ["origin_note_id"], ["id"], ondelete="SET NULL"
+        )
+        batch.create_index("uq_notes_deck_origin", ["deck_id", "origin_note_id"], unique=True)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("notes") as batch:
+        batch.drop_index("uq_notes_deck_origin")
+        batch.drop_constraint("fk_notes_origin_note_id", type_="foreignkey")
+        batch.drop_column("origin_note_id")
+    with op.batch_alter_table("decks") as batch:
+        batch.drop_index("ix_decks_source_deck_id")
+        batch.drop_constraint("fk_decks_source_deck_id", type_="foreignkey")
+        batch.drop_column("source_deck_id")
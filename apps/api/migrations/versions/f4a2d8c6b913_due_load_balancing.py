@@ -0,0 +1,39 @@
+"""add due-date load balancing (deck flag, due_load_buckets)
+
+Revision ID: f4a2d8c6b913
+Revises: 0d6b9f2e4a81
+Create Date: 2026-10-19 13:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "f4a2d8c6b913"
+down_revision = "0d6b9f2e4a81"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "decks",
+        sa.Column("load_balance_due", sa.Boolean(), nullable=False, server_default=sa.text("0")),
+    )
+    op.add_column("user_deck_state", sa.Column("due_histogram_at", sa.DateTime(timezone=True), nullable=True))
+    op.create_table(
+        "due_load_buckets",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("deck_id", sa.Integer(), nullable=False),
+        sa.Column("bucket", sa.Integer(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False, server_default="0"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["deck_id"], ["decks.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "deck_id", "bucket"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("due_load_buckets")
+    op.drop_column("user_deck_state", "due_histogram_at")
+    op.drop_column("decks", "load_balance_due")
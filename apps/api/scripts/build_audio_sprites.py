@@ -0,0 +1,43 @@
+"""
+Monta os sprites de áudio de um deck (os áudios concatenados em poucos arquivos, com o índice
+de offsets em decks.audio_sprites e em metadata["sprite"] de cada media_asset).
+
+Execute a partir da raiz do repo (depois de link_*_audio.py):
+    python apps/api/scripts/build_audio_sprites.py --deck-slug hiragana-basico [--max-kb 2048]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Garantir que o pacote app esteja no path
+API_ROOT = Path(__file__).resolve().parents[1]
+if str(API_ROOT) not in sys.path:
+    sys.path.append(str(API_ROOT))
+
+from app.core.database import SessionLocal  # noqa: E402
+from app.services.sprites import SPRITE_MAX_BYTES, build_deck_sprites  # noqa: E402
+from utils.common import get_deck_by_slug  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Monta os sprites de áudio de um deck")
+    parser.add_argument("--deck-slug", action="append", dest="slugs", required=True)
+    parser.add_argument("--max-kb", type=int, default=SPRITE_MAX_BYTES // 1024, help="tamanho máximo por sprite")
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        for slug in args.slugs:
+            deck = get_deck_by_slug(session, slug)
+            if not deck:
+                raise SystemExit(f"Deck '{slug}' não encontrado.")
+            index = build_deck_sprites(session, deck, max_bytes=args.max_kb * 1024)
+            session.commit()
+            print(f"{slug}: {len(index['clips'])} áudios em {len(index['sprites'])} sprite(s)")
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
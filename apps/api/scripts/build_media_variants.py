@@ -0,0 +1,70 @@
+"""
+Gera derivados (WebP/AVIF redimensionados) para imagens já armazenadas por SHA-256 que ainda não os têm.
+
+Execute a partir da raiz do repo:
+    python apps/api/scripts/build_media_variants.py [--batch-size 32]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from sqlalchemy import select
+
+# Garantir que o pacote app esteja no path
+API_ROOT = Path(__file__).resolve().parents[1]
+if str(API_ROOT) not in sys.path:
+    sys.path.append(str(API_ROOT))
+
+from app.core.database import SessionLocal  # noqa: E402
+from app.models import MediaAsset  # noqa: E402
+from app.models.enums import MediaType  # noqa: E402
+from app.services.images import build_variants_batch, shutdown_pool  # noqa: E402
+from app.services.media import StoredBlob, blob_path  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        assets = [
+            asset
+            for asset in session.scalars(
+                select(MediaAsset).where(MediaAsset.media_type == MediaType.image, MediaAsset.sha256.is_not(None))
+            )
+            if not (asset.metadata_json or {}).get("variants")
+        ]
+        # O mesmo conteúdo em vários decks é codificado uma vez só
+        by_sha: dict[str, list[MediaAsset]] = {}
+        for asset in assets:
+            by_sha.setdefault(asset.sha256, []).append(asset)
+        shas = [sha for sha in by_sha if blob_path(sha).exists()]
+
+        updated = 0
+        for start in range(0, len(shas), args.batch_size):
+            batch = shas[start : start + args.batch_size]
+            items = []
+            for sha in batch:
+                path = blob_path(sha)
+                mime = (by_sha[sha][0].metadata_json or {}).get("mime_type", "")
+                items.append((StoredBlob(sha256=sha, size=path.stat().st_size, path=path), mime))
+            for sha, variants in zip(batch, build_variants_batch(items)):
+                if not variants:
+                    continue
+                for asset in by_sha[sha]:
+                    asset.metadata_json = {**(asset.metadata_json or {}), "variants": variants}
+                    updated += 1
+            session.commit()
+            print(f"{min(start + args.batch_size, len(shas))}/{len(shas)} imagens processadas")
+
+        print(f"Concluído. Assets atualizados: {updated}")
+    finally:
+        session.close()
+        shutdown_pool()
+
+
+if __name__ == "__main__":
+    main()
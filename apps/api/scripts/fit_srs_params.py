@@ -0,0 +1,47 @@
+"""
+Ajusta os parâmetros SRS (SM-2) de cada usuário a partir do card_review_log e grava em user_srs_params.
+Os decks com `srs_algorithm = "sm2"` passam a usar esses parâmetros em apply_review.
+
+Execute a partir da raiz do repositório:
+    python apps/api/scripts/fit_srs_params.py [--workers 4] [--chunk-size 5000] [--user-id 1 ...]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+API_ROOT = Path(__file__).resolve().parents[1]
+if str(API_ROOT) not in sys.path:
+    sys.path.append(str(API_ROOT))
+
+try:
+    import numpy  # noqa: F401
+except ImportError:
+    raise SystemExit("Instale NumPy primeiro: pip install numpy")
+
+from app.services.srs_fitting import DEFAULT_CHUNK_SIZE, run_fitting  # noqa: E402
+from packages.core.srs.fitting import DEFAULT_DESIRED_RETENTION  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Ajuste offline de parâmetros SRS por usuário")
+    parser.add_argument("--workers", type=int, default=None, help="processos paralelos (padrão: nº de CPUs)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="linhas de log por leitura")
+    parser.add_argument("--desired-retention", type=float, default=DEFAULT_DESIRED_RETENTION)
+    parser.add_argument("--user-id", type=int, action="append", dest="user_ids", help="limita a usuários específicos")
+    args = parser.parse_args()
+
+    summary = run_fitting(
+        user_ids=args.user_ids,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        desired_retention=args.desired_retention,
+    )
+    print(
+        f"Concluído. Usuários: {summary['users']}, ajustados: {summary['fitted']}, "
+        f"sem revisões suficientes: {summary['skipped']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
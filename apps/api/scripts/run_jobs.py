@@ -0,0 +1,37 @@
+"""
+Worker da fila de jobs em background (tabela jobs): reivindica os jobs prontos e os executa num
+pool de processos, com novas tentativas e backoff em caso de falha.
+
+Execute a partir da raiz do repo, ao lado da API:
+    python apps/api/scripts/run_jobs.py [--workers 2] [--poll 1.0] [--once]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Garantir que o pacote app esteja no path
+API_ROOT = Path(__file__).resolve().parents[1]
+if str(API_ROOT) not in sys.path:
+    sys.path.append(str(API_ROOT))
+
+from app.core.config import settings  # noqa: E402
+from app.services.jobs import run_worker  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Executa os jobs em background da API")
+    parser.add_argument("--workers", type=int, default=settings.JOB_WORKERS, help="processos no pool")
+    parser.add_argument("--poll", type=float, default=settings.JOB_POLL_SECONDS, help="intervalo de consulta à fila (s)")
+    parser.add_argument("--once", action="store_true", help="esvazia a fila e sai (cron/CI)")
+    args = parser.parse_args()
+
+    try:
+        processed = run_worker(workers=args.workers, poll_seconds=args.poll, once=args.once)
+    except KeyboardInterrupt:
+        return
+    print(f"{processed} job(s) executado(s)")
+
+
+if __name__ == "__main__":
+    main()
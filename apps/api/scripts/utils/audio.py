@@ -0,0 +1,62 @@
+"""Trechos comuns dos scripts de áudio do kana (geração via pipeline de TTS e arquivos para o seed)."""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+# utils.common coloca apps/api no sys.path antes dos imports de app
+from utils.common import get_repo_root
+
+from app.services.audio import (  # noqa: E402
+    BACKENDS,
+    DEFAULT_WORKERS,
+    AudioItem,
+    generate_audio,
+    get_backend,
+    load_manifest,
+)
+
+
+def audio_dir(alphabet: str) -> Path:
+    return get_repo_root() / "apps" / "web" / "public" / "audio" / alphabet
+
+
+def run_generate(pairs: list[tuple[str, str]], alphabet: str) -> None:
+    parser = argparse.ArgumentParser(description=f"Gera os áudios do {alphabet} (<romaji>.mp3/.opus ou .wav)")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="gtts")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="gerações simultâneas")
+    parser.add_argument("--force", action="store_true", help="regera mesmo os arquivos inalterados")
+    args = parser.parse_args()
+
+    try:
+        backend = get_backend(args.backend)
+    except ValueError as exc:
+        raise SystemExit(str(exc))
+    out_dir = audio_dir(alphabet)
+    items = [AudioItem(name=romaji, text=kana) for kana, romaji in pairs]
+
+    def progress(item: AudioItem, status: str) -> None:
+        if status != "skipped":
+            print(f"{'✔' if status == 'generated' else '✘'} {item.name} ({item.text}) {status}")
+
+    summary = generate_audio(items, out_dir, backend, workers=args.workers, force=args.force, progress=progress)
+    print(
+        f"Concluído. Gerados: {summary['generated']}, inalterados: {summary['skipped']}, "
+        f"falhas: {summary['failed']}. Arquivos em {out_dir}"
+    )
+
+
+def manifest_files(alphabet: str):
+    """`files(romaji)` para o seed: o arquivo principal do manifest e, depois, as variantes (Opus)."""
+    out_dir = audio_dir(alphabet)
+    manifest = load_manifest(out_dir)
+    if not manifest:
+        raise SystemExit(f"Nenhum manifest em {out_dir}. Rode o script de geração primeiro.")
+
+    def files(romaji: str) -> list[Path]:
+        entry = manifest.get(romaji)
+        paths = [out_dir / item["file"] for item in entry["files"]] if entry else []
+        return paths if paths and all(path.exists() for path in paths) else []
+
+    return files
@@ -0,0 +1,325 @@
+"""Motor genérico dos seeds de mídia dos decks de kana.
+
+Recebe o slug do deck, a tabela de pares (kana, romaji) e de onde vêm os arquivos de cada romaji,
+e garante que o campo de mídia (`imagem`, `audio`, ...) de cada nota aponte para o MediaAsset certo.
+O estado atual é carregado com poucas consultas em lote (campos, notas por romaji, assets e valores
+do campo), a diferença é calculada em memória e aplicada com INSERT/UPDATE em lote numa única
+transação. Com `dry_run` nada é gravado (nem no armazenamento de mídia) e só o relatório é impresso.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+# utils.common coloca apps/api no sys.path antes dos imports de app
+from utils.common import get_deck_by_slug, get_note_type_for_deck
+
+from sqlalchemy import insert, select, update  # noqa: E402
+
+from app.core.database import SessionLocal  # noqa: E402
+from app.models import CardTemplate, MediaAsset, Note, NoteField, NoteFieldValue  # noqa: E402
+from app.models.enums import MediaType, NoteFieldType  # noqa: E402
+from app.models.sync import next_sync_seq  # noqa: E402
+from app.services.images import build_variants_batch, shutdown_pool  # noqa: E402
+from app.services.media import (  # noqa: E402
+    CHUNK_SIZE,
+    StoredBlob,
+    detect_mime,
+    media_url,
+    probe_metadata,
+    store_file,
+)
+from app.services.notes import refresh_card_previews  # noqa: E402
+
+
+@dataclass(frozen=True)
+class MediaSeed:
+    """O que semear: `files(romaji)` devolve [arquivo principal, *variantes já prontas] ou []."""
+
+    deck_slug: str
+    pairs: list[tuple[str, str]]
+    field_name: str
+    field_type: NoteFieldType
+    field_label: str
+    files: Callable[[str], list[Path]]
+    field_hint: str | None = None
+    attribution: str | None = None
+    # Trecho exigido no verso/frente do primeiro template (ex.: <img src="{{imagem}}">)
+    front_snippet: str | None = None
+
+
+@dataclass
+class SeedReport:
+    deck_slug: str
+    dry_run: bool
+    field_created: bool = False
+    template_updated: bool = False
+    assets_created: int = 0
+    assets_updated: int = 0
+    values_created: int = 0
+    values_updated: int = 0
+    unchanged: int = 0
+    warnings: list[str] = field(default_factory=list)
+
+    def print(self) -> None:
+        prefix = "[dry-run] " if self.dry_run else ""
+        for warning in self.warnings:
+            print(f"[WARN] {warning}")
+        if self.field_created:
+            print(f"{prefix}Campo de mídia criado.")
+        if self.template_updated:
+            print(f"{prefix}Template atualizado.")
+        print(
+            f"{prefix}{self.deck_slug}: media assets novos: {self.assets_created}, atualizados: {self.assets_updated}; "
+            f"valores de campo novos: {self.values_created}, atualizados: {self.values_updated}; "
+            f"inalterados: {self.unchanged}"
+        )
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        while chunk := handle.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _asset_row(blob: StoredBlob, path: Path, variants: list[dict]) -> dict:
+    mime = detect_mime(blob.path, path.name, None)
+    metadata = probe_metadata(blob, mime)
+    if variants:
+        metadata["variants"] = variants
+    return {"file_name": path.name, "sha256": blob.sha256, "url": media_url(blob.sha256), "metadata_json": metadata}
+
+
+def _ready_variants(paths: list[Path]) -> list[dict]:
+    variants = []
+    for path in paths:
+        blob = store_file(path)
+        row = _asset_row(blob, path, [])
+        variants.append({**row["metadata_json"], "sha256": blob.sha256, "url": row["url"]})
+    return variants
+
+
+def _ensure_field(session, spec: MediaSeed, fields: dict[str, NoteField], note_type_id: int, report: SeedReport):
+    existing = fields.get(spec.field_name)
+    if existing:
+        return existing
+    report.field_created = True
+    target = NoteField(
+        note_type_id=note_type_id,
+        name=spec.field_name,
+        label=spec.field_label,
+        field_type=spec.field_type,
+        is_required=False,
+        sort_order=max((f.sort_order for f in fields.values()), default=0) + 1,
+        hint=spec.field_hint,
+        config={},
+    )
+    session.add(target)
+    return target
+
+
+def _apply_snippet(template: CardTemplate, snippet: str, placeholder: str) -> bool:
+    front = template.front_template or ""
+    back = template.back_template or ""
+    new_front = front if placeholder in front else f"{front}\n{snippet}".strip()
+    # Remover a mídia do verso para evitar duplicação
+    new_back = back.replace(snippet, "").replace(placeholder, "").strip() if back else back
+    if (new_front, new_back) == (front, back):
+        return False
+    template.front_template = new_front
+    template.back_template = new_back
+    return True
+
+
+def seed_media(spec: MediaSeed, dry_run: bool = False) -> SeedReport:
+    report = SeedReport(deck_slug=spec.deck_slug, dry_run=dry_run)
+    session = SessionLocal()
+    try:
+        deck = get_deck_by_slug(session, spec.deck_slug)
+        if not deck:
+            raise SystemExit(f"Deck '{spec.deck_slug}' não encontrado. Rode migrations/seed primeiro.")
+        note_type = get_note_type_for_deck(session, deck.id)
+        if not note_type:
+            raise SystemExit(f"NoteType do deck '{spec.deck_slug}' não encontrado.")
+
+        fields = {f.name: f for f in session.scalars(select(NoteField).where(NoteField.note_type_id == note_type.id))}
+        if "romaji" not in fields:
+            raise SystemExit(f"Campo 'romaji' não encontrado no note_type do deck '{spec.deck_slug}'.")
+        target = _ensure_field(session, spec, fields, note_type.id, report)
+
+        romaji_to_note = {
+            value.strip().lower(): note_id
+            for note_id, value in session.execute(
+                select(NoteFieldValue.note_id, NoteFieldValue.value_text)
+                .join(Note, Note.id == NoteFieldValue.note_id)
+                .where(Note.deck_id == deck.id, NoteFieldValue.field_id == fields["romaji"].id)
+            )
+            if value
+        }
+
+        # Arquivos desejados por romaji, com o hash calculado uma vez por caminho
+        wanted: dict[str, tuple[Path, list[Path], str]] = {}
+        for kana, romaji in spec.pairs:
+            paths = spec.files(romaji)
+            if not paths:
+                report.warnings.append(f"Sem arquivo para romaji '{romaji}' ({kana})")
+            elif romaji not in romaji_to_note:
+                report.warnings.append(f"Sem nota para romaji '{romaji}' ({kana})")
+            else:
+                wanted[romaji] = (paths[0], paths[1:], _file_sha256(paths[0]))
+
+        shas = {sha for _, _, sha in wanted.values()}
+        names = {path.name for path, _, _ in wanted.values()}
+        assets = list(
+            session.scalars(
+                select(MediaAsset).where(
+                    MediaAsset.deck_id == deck.id,
+                    MediaAsset.sha256.in_(shas) | MediaAsset.file_name.in_(names),
+                )
+            )
+        )
+        asset_ids = {asset.sha256: asset.id for asset in assets if asset.sha256}
+        by_name = {asset.file_name: asset for asset in assets}
+        values = (
+            {
+                value.note_id: value
+                for value in session.scalars(
+                    select(NoteFieldValue).where(
+                        NoteFieldValue.field_id == target.id,
+                        NoteFieldValue.note_id.in_([romaji_to_note[romaji] for romaji in wanted]),
+                    )
+                )
+            }
+            if target.id
+            else {}
+        )
+
+        # Diferença: o que falta no armazenamento/assets e quais valores apontam para o lugar errado
+        new_by_sha: dict[str, tuple[Path, list[Path]]] = {}
+        asset_updates: dict[int, tuple[Path, list[Path]]] = {}
+        for path, extra, sha in wanted.values():
+            if sha in asset_ids:
+                continue
+            # Mesmo nome de arquivo com outro conteúdo (ou asset antigo só com URL): atualiza no lugar
+            stale = by_name.get(path.name)
+            if stale is not None and stale.sha256 not in shas and stale.id not in asset_updates:
+                asset_updates[stale.id] = (path, extra)
+                asset_ids[sha] = stale.id
+            else:
+                new_by_sha.setdefault(sha, (path, extra))
+        report.assets_created = len(new_by_sha)
+        report.assets_updated = len(asset_updates)
+
+        if front_changed := bool(spec.front_snippet):
+            template = session.scalar(
+                select(CardTemplate).where(CardTemplate.note_type_id == note_type.id).order_by(CardTemplate.id).limit(1)
+            )
+            front_changed = bool(template) and _apply_snippet(template, spec.front_snippet, f"{{{{{spec.field_name}}}}}")
+            report.template_updated = front_changed
+
+        if dry_run:
+            for romaji, (_, _, sha) in wanted.items():
+                value = values.get(romaji_to_note[romaji])
+                if value is None:
+                    report.values_created += 1
+                elif sha not in asset_ids or value.media_asset_id != asset_ids[sha] or value.value_text:
+                    report.values_updated += 1
+                else:
+                    report.unchanged += 1
+            session.rollback()
+            return report
+
+        session.flush()
+
+        # Blobs novos: grava no armazenamento e gera os derivados de imagem em paralelo
+        pending = [(sha, path, extra, store_file(path)) for sha, (path, extra) in new_by_sha.items()]
+        updating = [(asset_id, path, extra, store_file(path)) for asset_id, (path, extra) in asset_updates.items()]
+        image_variants: list[list[dict]] = []
+        if spec.field_type == NoteFieldType.image:
+            blobs = [(blob, detect_mime(blob.path, path.name, None)) for _, path, _, blob in pending + updating]
+            image_variants = build_variants_batch(blobs)
+        variants_for = iter(image_variants)
+
+        media_type = MediaType.image if spec.field_type == NoteFieldType.image else MediaType.audio
+        new_rows = []
+        for _, path, extra, blob in pending:
+            row = _asset_row(blob, path, next(variants_for, []) + _ready_variants(extra))
+            new_rows.append(
+                {**row, "deck_id": deck.id, "media_type": media_type, "attribution": spec.attribution, "license": ""}
+            )
+        if new_rows:
+            for asset_id, sha in session.execute(
+                insert(MediaAsset).returning(MediaAsset.id, MediaAsset.sha256), new_rows
+            ):
+                asset_ids[sha] = asset_id
+        update_rows = [
+            {"id": asset_id, **_asset_row(blob, path, next(variants_for, []) + _ready_variants(extra))}
+            for asset_id, path, extra, blob in updating
+        ]
+        if update_rows:
+            session.execute(update(MediaAsset), update_rows)
+
+        value_inserts = []
+        value_updates = []
+        for romaji, (_, _, sha) in wanted.items():
+            note_id = romaji_to_note[romaji]
+            asset_id = asset_ids[sha]
+            value = values.get(note_id)
+            if value is None:
+                value_inserts.append(
+                    {"note_id": note_id, "field_id": target.id, "media_asset_id": asset_id, "value_text": None}
+                )
+            elif value.media_asset_id != asset_id or value.value_text:
+                value_updates.append({"id": value.id, "note_id": note_id, "media_asset_id": asset_id, "value_text": None})
+            else:
+                report.unchanged += 1
+        if value_inserts:
+            session.execute(insert(NoteFieldValue), value_inserts)
+        if value_updates:
+            session.execute(update(NoteFieldValue), value_updates)
+        report.values_created = len(value_inserts)
+        report.values_updated = len(value_updates)
+
+        touched = {row["note_id"] for row in value_inserts} | {row["note_id"] for row in value_updates}
+        if touched:
+            # Escrita em massa não passa pelo listener do sync: marca as notas explicitamente
+            seq = next_sync_seq(session)
+            session.execute(
+                update(Note).where(Note.id.in_(touched)).values(updated_seq=seq),
+                execution_options={"synchronize_session": False},
+            )
+        if touched or front_changed or update_rows:
+            # Previews dos cards incluem a URL da mídia renderizada
+            session.expire_all()
+            for template in session.scalars(select(CardTemplate).where(CardTemplate.note_type_id == note_type.id)):
+                refresh_card_previews(session, template)
+
+        session.commit()
+        return report
+    finally:
+        session.close()
+        shutdown_pool()
+
+
+def files_in_dir(media_dir: Path, extension: str) -> Callable[[str], list[Path]]:
+    """`files(romaji)` para arquivos `<romaji>.<extension>` num diretório."""
+
+    def files(romaji: str) -> list[Path]:
+        path = media_dir / f"{romaji}.{extension}"
+        return [path] if path.exists() else []
+
+    return files
+
+
+def run_seed(build_spec: Callable[[], MediaSeed], description: str) -> None:
+    """Ponto de entrada dos scripts: `--dry-run` só mostra o que mudaria."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--dry-run", action="store_true", help="não grava nada; só mostra o relatório")
+    args = parser.parse_args()
+    seed_media(build_spec(), dry_run=args.dry_run).print()
@@ -0,0 +1,62 @@
+"""Fixtures dos testes da API: banco SQLite temporário migrado até o head (com os decks de seed)."""
+
+import os
+import subprocess
+import sys
+import tempfile
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+API_ROOT = Path(__file__).resolve().parents[1]
+DB_DIR = tempfile.mkdtemp(prefix="nihon-flash-tests-")
+
+# Antes de importar o app: o engine e as configurações são criados no import
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_DIR}/test.db"
+os.environ.setdefault("JWT_SECRET", "test-secret-key")
+os.environ["MEDIA_ROOT"] = f"{DB_DIR}/media"
+os.environ["JOB_FILES_ROOT"] = f"{DB_DIR}/job_files"
+os.environ["WARMUP_ON_STARTUP"] = "false"
+sys.path.insert(0, str(API_ROOT))
+
+subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], cwd=API_ROOT, check=True, capture_output=True)
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import select, update  # noqa: E402
+
+from app.core.database import SessionLocal  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import Deck  # noqa: E402
+
+SEED_DECK_SLUG = "hiragana-basico"
+
+
+@pytest.fixture(scope="session")
+def client() -> TestClient:
+    with SessionLocal() as db:
+        db.execute(update(Deck).values(is_public=True))
+        db.commit()
+    return TestClient(app)
+
+
+@pytest.fixture
+def db():
+    with SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def user(client: TestClient) -> SimpleNamespace:
+    """Usuário novo a cada teste (`id` e `headers`), para o progresso de um teste não vazar para outro."""
+    email = f"{uuid.uuid4().hex[:12]}@example.com"
+    created = client.post("/auth/register", json={"name": "Teste", "email": email, "password": "senha123"}).json()
+    token = client.post("/auth/login", json={"email": email, "password": "senha123"}).json()["access_token"]
+    return SimpleNamespace(id=created["id"], headers={"Authorization": f"Bearer {token}"})
+
+
+@pytest.fixture(scope="session")
+def deck_id(client: TestClient) -> int:
+    with SessionLocal() as db:
+        return db.scalar(select(Deck.id).where(Deck.slug == SEED_DECK_SLUG))
@@ -0,0 +1,33 @@
+from sqlalchemy import select
+
+from app.models import Note, NoteField
+from app.services.answers import accepted_answers, grade_answer
+
+
+def _seed_note(db, deck_id):
+    return db.scalars(select(Note).where(Note.deck_id == deck_id).order_by(Note.id)).first()
+
+
+def test_grades_kana_and_romaji_spellings(db, deck_id):
+    accepted = accepted_answers(db, _seed_note(db, deck_id))
+
+    assert grade_answer(accepted, accepted.expected).correct
+    assert grade_answer(accepted, f" {accepted.expected.upper()} ").correct
+    assert not grade_answer(accepted, "zzzz").correct
+
+
+def test_cache_follows_answer_field_config_changes(db, deck_id):
+    note = _seed_note(db, deck_id)
+    kana = db.scalar(select(NoteField).where(NoteField.note_type_id == note.note_type_id, NoteField.name == "kana"))
+    kana_value = next(value.value_text for value in note.field_values if value.field_id == kana.id)
+    before = accepted_answers(db, note).expected
+    assert before != kana_value
+
+    kana.config = {"answer": True}
+    db.commit()
+    try:
+        assert accepted_answers(db, note).expected == kana_value
+    finally:
+        kana.config = {}
+        db.commit()
+    assert accepted_answers(db, note).expected == before
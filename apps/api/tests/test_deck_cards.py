@@ -0,0 +1,50 @@
+import base64
+import json
+
+from sqlalchemy import select
+
+from app.models import Card, Note, UserCardProgress
+from app.models.enums import CardStatus
+
+
+def _cards_with_stats(client, user, deck_id, **params):
+    return client.get(f"/decks/{deck_id}/cards-with-stats", headers=user.headers, params=params)
+
+
+def test_cursor_pages_through_every_card(client, user, deck_id):
+    client.post(
+        "/study/submit", headers=user.headers, json={"deck_id": deck_id, "results": [{"card_id": 1, "correct": True}]}
+    )
+    expected = [card["id"] for card in _cards_with_stats(client, user, deck_id, sort="due").json()]
+
+    seen, cursor = [], None
+    while True:
+        params = {"sort": "due", "limit": 7, **({"cursor": cursor} if cursor else {})}
+        response = _cards_with_stats(client, user, deck_id, **params)
+        seen += [card["id"] for card in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert seen == expected
+
+
+def test_cursor_is_rejected_for_another_ordering(client, user, deck_id):
+    cursor = _cards_with_stats(client, user, deck_id, sort="due", limit=1).headers["X-Next-Cursor"]
+    handcrafted = base64.urlsafe_b64encode(json.dumps(["x", 1, "reps:asc"]).encode()).decode()
+
+    assert _cards_with_stats(client, user, deck_id, sort="id", cursor=cursor).status_code == 400
+    assert _cards_with_stats(client, user, deck_id, sort="due", order="desc", cursor=cursor).status_code == 400
+    assert _cards_with_stats(client, user, deck_id, sort="reps", cursor=handcrafted).status_code == 400
+    assert _cards_with_stats(client, user, deck_id, sort="due", cursor=cursor).status_code == 200
+
+
+def test_progress_without_stage_does_not_fall_back_to_the_card(client, user, deck_id, db):
+    card_id = db.scalar(select(Card.id).join(Note).where(Note.deck_id == deck_id).order_by(Card.id))
+    db.add(UserCardProgress(user_id=user.id, card_id=card_id, status=CardStatus.learning, stage=None))
+    db.commit()
+
+    cards = {card["id"]: card for card in _cards_with_stats(client, user, deck_id).json()}
+    assert cards[card_id]["stage"] is None
+    stage = next(card["stage"] for card in cards.values() if card["stage"])
+    assert card_id not in [card["id"] for card in _cards_with_stats(client, user, deck_id, stage=stage).json()]
@@ -0,0 +1,43 @@
+from app.services.due_stream import TimerWheel
+
+
+def _advance(wheel: TimerWheel, ticks: int) -> list:
+    expired = []
+    for _ in range(ticks):
+        expired.append(wheel.advance())
+    return expired
+
+
+def test_key_expires_on_its_tick():
+    wheel = TimerWheel(slots=8, tick=1.0)
+    wheel.schedule("a", 2.5)
+
+    assert _advance(wheel, 3) == [[], [], ["a"]]
+    assert wheel.positions == {}
+
+
+def test_delay_is_at_least_one_tick():
+    wheel = TimerWheel(slots=8, tick=1.0)
+    wheel.schedule("a", 0)
+
+    assert wheel.advance() == ["a"]
+
+
+def test_delay_beyond_one_revolution_counts_rounds():
+    wheel = TimerWheel(slots=4, tick=1.0)
+    wheel.schedule("a", 10)
+
+    expired = _advance(wheel, 12)
+    assert [tick for tick, keys in enumerate(expired, 1) if keys] == [10]
+
+
+def test_cancel_and_reschedule_replace_the_previous_slot():
+    wheel = TimerWheel(slots=8, tick=1.0)
+    wheel.schedule("a", 2)
+    wheel.schedule("b", 2)
+    wheel.cancel("b")
+    wheel.schedule("a", 5)
+
+    expired = _advance(wheel, 6)
+    assert [tick for tick, keys in enumerate(expired, 1) if keys] == [5]
+    assert expired[4] == ["a"]
@@ -0,0 +1,34 @@
+from sqlalchemy import event
+
+from app.core.database import engine
+from app.models import Deck
+from app.services.forks import deck_note_filter, deck_scope, deck_search_filter
+
+
+def test_fork_filters_are_built_from_the_loaded_deck(client, user, deck_id, db):
+    fork = client.post(f"/decks/{deck_id}/fork", headers=user.headers, json={})
+    assert fork.status_code == 201
+    deck = db.get(Deck, fork.json()["id"])
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        deck_note_filter(deck)
+        deck_search_filter(deck)
+        scope = deck_scope(deck)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert statements == []
+    assert scope == [deck.id, deck_id]
+
+
+def test_fork_sees_source_cards(client, user, deck_id):
+    fork_id = client.post(f"/decks/{deck_id}/fork", headers=user.headers, json={}).json()["id"]
+
+    source_stats = client.get(f"/decks/{deck_id}/stats", headers=user.headers).json()
+    fork_stats = client.get(f"/decks/{fork_id}/stats", headers=user.headers).json()
+
+    assert fork_stats["total_cards"] == source_stats["total_cards"] > 0
+    assert fork_stats["new_available"] == source_stats["total_cards"]
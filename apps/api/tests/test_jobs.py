@@ -0,0 +1,156 @@
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.models import Deck, Job, JobStatus
+from app.services import jobs
+
+
+@pytest.fixture
+def handler_kind():
+    kinds = []
+
+    def register(func):
+        kind = f"test_{func.__name__}"
+        jobs.job_handler(kind)(func)
+        kinds.append(kind)
+        return kind
+
+    yield register
+    for kind in kinds:
+        jobs.HANDLERS.pop(kind, None)
+
+
+def _claim(db, kind, payload=None):
+    job = jobs.enqueue(db, kind, payload or {})
+    db.commit()
+    for _ in range(20):
+        claimed = jobs.claim_next(db, "test-worker")
+        assert claimed is not None
+        if claimed[0] == job.id:
+            return claimed
+        jobs.record_failure(db, claimed[0], "not this test's job", permanent=True)
+    raise AssertionError("job not claimed")
+
+
+def test_job_that_lost_its_lock_does_not_overwrite_the_new_run(db, handler_kind):
+    def slow(ctx, payload):
+        # Outro worker reivindica o job no meio da execução (lock expirado)
+        ctx.db.query(Job).filter(Job.id == ctx.job.id).update({"locked_by": "other-worker:abc"})
+        ctx.db.commit()
+        return {"done": True}
+
+    job_id, _ = _claim(db, handler_kind(slow))
+    jobs.run_job(job_id)
+
+    db.expire_all()
+    job = db.get(Job, job_id)
+    assert job.status == JobStatus.running
+    assert job.locked_by == "other-worker:abc"
+    assert job.result is None
+
+
+def test_progress_stops_a_job_that_lost_its_lock(db, handler_kind):
+    steps = []
+
+    def chunks(ctx, payload):
+        ctx.progress(1, 3)
+        steps.append(1)
+        ctx.db.query(Job).filter(Job.id == ctx.job.id).update({"locked_by": "other-worker:abc"})
+        ctx.db.commit()
+        ctx.progress(2, 3)
+        steps.append(2)
+
+    job_id, _ = _claim(db, handler_kind(chunks))
+    jobs.run_job(job_id)
+
+    assert steps == [1]
+    db.expire_all()
+    assert db.get(Job, job_id).status == JobStatus.running
+
+
+def test_heartbeat_keeps_long_jobs_out_of_requeue_stale(db, handler_kind, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_LOCK_TIMEOUT_SECONDS", 3)
+    requeued = []
+
+    def long_running(ctx, payload):
+        ctx.db.query(Job).filter(Job.id == ctx.job.id).update(
+            {"locked_at": datetime.utcnow() - timedelta(seconds=2)}
+        )
+        ctx.db.commit()
+        time.sleep(1.5)
+        from app.core.database import SessionLocal
+
+        with SessionLocal() as other:
+            requeued.append(jobs.requeue_stale(other))
+        return {}
+
+    job_id, _ = _claim(db, handler_kind(long_running))
+    jobs.run_job(job_id)
+
+    assert requeued == [0]
+    db.expire_all()
+    assert db.get(Job, job_id).status == JobStatus.succeeded
+
+
+def test_background_import_rejects_oversized_body(client, user, monkeypatch):
+    monkeypatch.setattr(settings, "DECK_IMPORT_MAX_BYTES", 1024)
+    response = client.post(
+        "/decks/import", headers=user.headers, params={"background": "true"}, content=b"x" * 4096
+    )
+    assert response.status_code == 413
+
+
+def _import_payload(client, user, deck_id, content=None):
+    if content is None:
+        content = client.get(f"/decks/{deck_id}/export", headers=user.headers).content
+    name = f"{uuid.uuid4().hex}.nfdeck"
+    path = jobs.job_file_path(name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    return {"file": name, "owner_id": user.id, "slug": f"import-{uuid.uuid4().hex[:8]}", "name": None}
+
+
+def test_deck_import_commits_with_the_job_and_then_removes_the_file(client, user, deck_id, db):
+    payload = _import_payload(client, user, deck_id)
+
+    job_id, _ = _claim(db, "deck_import", payload)
+    jobs.run_job(job_id)
+
+    db.expire_all()
+    job = db.get(Job, job_id)
+    assert job.status == JobStatus.succeeded
+    assert db.scalar(select(Deck.id).where(Deck.slug == payload["slug"])) == job.result["deck_id"]
+    assert not jobs.job_file_path(payload["file"]).exists()
+
+
+def test_deck_import_that_lost_its_lock_leaves_no_deck(client, user, deck_id, db, handler_kind):
+    def import_then_lose_lock(ctx, payload):
+        result = jobs.HANDLERS["deck_import"](ctx, payload)
+        # Lock perdido depois do import (heartbeat travado): o UPDATE de sucesso não encontra o token
+        ctx.db.query(Job).filter(Job.id == ctx.job.id).update({"locked_by": "other-worker:abc"})
+        return result
+
+    payload = _import_payload(client, user, deck_id)
+    job_id, _ = _claim(db, handler_kind(import_then_lose_lock), payload)
+    jobs.run_job(job_id)
+
+    db.expire_all()
+    assert db.get(Job, job_id).status == JobStatus.running
+    assert db.scalar(select(Deck.id).where(Deck.slug == payload["slug"])) is None
+    assert jobs.job_file_path(payload["file"]).exists()
+
+
+def test_invalid_snapshot_fails_permanently_and_removes_the_file(client, user, deck_id, db):
+    payload = _import_payload(client, user, deck_id, content=b"not a snapshot")
+
+    job_id, _ = _claim(db, "deck_import", payload)
+    jobs.run_job(job_id)
+
+    db.expire_all()
+    assert db.get(Job, job_id).status == JobStatus.failed
+    assert not jobs.job_file_path(payload["file"]).exists()
@@ -0,0 +1,86 @@
+import pytest
+
+from packages.core.kana import (
+    BASIC_HIRAGANA,
+    normalize_text,
+    normalize_text_batch,
+    romaji_key,
+    romaji_key_batch,
+    romaji_to_hiragana,
+    romaji_to_hiragana_batch,
+    romaji_to_katakana,
+    to_hiragana,
+    to_katakana,
+    to_romaji,
+    to_romaji_batch,
+)
+
+
+@pytest.mark.parametrize(
+    ("kana", "romaji"),
+    [
+        ("きょう", "kyou"),
+        ("ちゃ", "cha"),
+        ("がっこう", "gakkou"),
+        ("しんぶん", "shinbun"),
+        ("ラーメン", "raamen"),
+        ("コーヒー", "koohii"),
+        ("ねこ と いぬ", "neko to inu"),
+        ("かんい", "kan'i"),
+        ("ほんや", "hon'ya"),
+        ("かに", "kani"),
+        ("あっ", "axtu"),
+    ],
+)
+def test_to_romaji(kana, romaji):
+    assert to_romaji(kana) == romaji
+
+
+@pytest.mark.parametrize(
+    ("romaji", "kana"),
+    [
+        ("kyou", "きょう"),
+        ("gakkou", "がっこう"),
+        ("si", "し"),
+        ("tu", "つ"),
+        ("kin'en", "きんえん"),
+        ("konnichiha", "こんにちは"),
+        ("nn", "ん"),
+        ("KaNa", "かな"),
+    ],
+)
+def test_romaji_to_hiragana(romaji, kana):
+    assert romaji_to_hiragana(romaji) == kana
+
+
+def test_kana_scripts_round_trip():
+    assert to_katakana("ひらがな") == "ヒラガナ"
+    assert to_hiragana("カタカナ") == "かたかな"
+    assert romaji_to_katakana("sushi") == "スシ"
+    for kana in BASIC_HIRAGANA:
+        assert romaji_to_hiragana(to_romaji(kana)) == kana
+
+
+def test_normalize_text_folds_width_case_macrons_and_spaces():
+    assert normalize_text("ｶﾀｶﾅ") == "かたかな"
+    assert normalize_text("  Tōkyō   Eki ") == "toukyou eki"
+
+
+@pytest.mark.parametrize("spelling", ["shi", "si", "し", "シ", "ｼ"])
+def test_romaji_key_matches_spellings(spelling):
+    assert romaji_key(spelling) == "shi"
+
+
+def test_batches_match_per_item_conversion():
+    texts = ["きょう", "  ｶﾀｶﾅ ", "kin'en", "Tōkyō", "", "ラーメン"]
+    assert to_romaji_batch(texts) == [to_romaji(text) for text in texts]
+    assert romaji_to_hiragana_batch(texts) == [romaji_to_hiragana(text) for text in texts]
+    assert normalize_text_batch(texts) == [normalize_text(text) for text in texts]
+    assert romaji_key_batch(texts) == [romaji_key(text) for text in texts]
+    assert to_romaji_batch([]) == []
+
+
+@pytest.mark.parametrize(("a", "b"), [("かんい", "かに"), ("ほんや", "ほにゃ"), ("あっ", "あ")])
+def test_distinct_words_keep_distinct_romaji_keys(a, b):
+    assert romaji_key(a) != romaji_key(b)
+    assert romaji_to_hiragana(romaji_key(a)) == a
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.database import engine
+from app.models import Card, Deck, DueLoadBucket, Note, UserCardProgress
+from app.services.load_balance import bucket_of, move_due
+from app.services.study import record_review
+
+
+def test_first_review_is_counted_once_with_autoflush(user, deck_id):
+    # Sessão com autoflush: a reconstrução do histograma não pode enxergar o card já revisado
+    with Session(engine, autoflush=True) as db:
+        deck = db.get(Deck, deck_id)
+        deck.load_balance_due = True
+        cards = db.scalars(select(Card).join(Note).where(Note.deck_id == deck_id).order_by(Card.id).limit(2)).all()
+
+        for card in cards:
+            record_review(db, user.id, deck, card, correct=True, initial=True)
+        db.flush()
+
+        buckets = db.scalar(
+            select(func.coalesce(func.sum(DueLoadBucket.count), 0)).where(
+                DueLoadBucket.user_id == user.id, DueLoadBucket.deck_id == deck_id
+            )
+        )
+        scheduled = db.scalar(
+            select(func.count()).where(UserCardProgress.user_id == user.id, UserCardProgress.due_at != None)  # noqa: E711
+        )
+        assert buckets == scheduled == len(cards)
+        db.rollback()
+
+
+def test_move_due_upserts_the_bucket(user, deck_id, db):
+    due = datetime.utcnow() + timedelta(days=3)
+    # Outra transação já criou o bucket: o incremento não pode tentar inseri-lo de novo
+    db.add(DueLoadBucket(user_id=user.id, deck_id=deck_id, bucket=bucket_of(due), count=1))
+    db.commit()
+
+    move_due(db, user.id, deck_id, None, due)
+    move_due(db, user.id, deck_id, None, due + timedelta(days=1))
+    move_due(db, user.id, deck_id, None, due + timedelta(days=1))
+    db.commit()
+
+    counts = dict(
+        db.execute(
+            select(DueLoadBucket.bucket, DueLoadBucket.count).where(
+                DueLoadBucket.user_id == user.id, DueLoadBucket.deck_id == deck_id
+            )
+        ).all()
+    )
+    assert counts == {bucket_of(due): 2, bucket_of(due + timedelta(days=1)): 2}
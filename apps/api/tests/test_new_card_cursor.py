@@ -0,0 +1,85 @@
+from app.models import UserDeckState
+
+
+def _study(client, user, deck_id, limit=3):
+    response = client.get(f"/decks/{deck_id}/study?limit={limit}", headers=user.headers)
+    assert response.status_code == 200
+    return [card["id"] for card in response.json()["cards"]]
+
+
+def _submit(client, user, deck_id, card_ids):
+    response = client.post(
+        "/study/submit",
+        headers=user.headers,
+        json={"deck_id": deck_id, "results": [{"card_id": card_id, "correct": True} for card_id in card_ids]},
+    )
+    assert response.status_code == 200
+
+
+def _cursor(db, user, deck_id):
+    db.expire_all()
+    state = db.get(UserDeckState, (user.id, deck_id))
+    return state.new_card_cursor if state else 0
+
+
+def test_answering_out_of_order_keeps_lower_new_cards(client, user, deck_id):
+    first = _study(client, user, deck_id)
+    available = client.get(f"/decks/{deck_id}/stats", headers=user.headers).json()["new_available"]
+
+    _submit(client, user, deck_id, [first[2]])
+
+    assert _study(client, user, deck_id)[:2] == first[:2]
+    assert client.get(f"/decks/{deck_id}/stats", headers=user.headers).json()["new_available"] == available - 1
+
+
+def test_cursor_advances_over_contiguous_answered_prefix(client, user, deck_id, db):
+    first = _study(client, user, deck_id)
+
+    _submit(client, user, deck_id, [first[1]])
+    assert _cursor(db, user, deck_id) == 0
+
+    _submit(client, user, deck_id, [first[0]])
+    assert _cursor(db, user, deck_id) == first[1]
+    assert _study(client, user, deck_id)[0] == first[2]
+
+
+def test_typed_answer_on_later_card_does_not_skip_earlier(client, user, deck_id, db):
+    first = _study(client, user, deck_id)
+
+    response = client.post(f"/cards/{first[1]}/answer", headers=user.headers, json={"answer": "x"})
+    assert response.status_code == 200
+
+    assert _cursor(db, user, deck_id) == 0
+    assert _study(client, user, deck_id)[0] == first[0]
+
+
+def test_session_answers_do_not_skip_pending_reserved_cards(client, user, deck_id, db):
+    response = client.post(
+        f"/decks/{deck_id}/sessions", headers=user.headers, json={"new_limit": 3, "review_limit": 0, "batch_size": 3}
+    )
+    assert response.status_code == 201
+    session = response.json()
+    card_ids = [card["id"] for card in session["cards"]]
+
+    response = client.post(
+        f"/sessions/{session['id']}/answers",
+        headers=user.headers,
+        json={"results": [{"card_id": card_ids[1], "correct": True}]},
+    )
+    assert response.status_code == 200
+    assert _cursor(db, user, deck_id) == 0
+
+
+def test_offline_sync_push_does_not_skip_earlier_new_cards(client, user, deck_id, db):
+    first = _study(client, user, deck_id)
+
+    response = client.post(
+        "/me/sync",
+        headers=user.headers,
+        json={"reviews": [{"card_id": first[2], "correct": True, "reviewed_at": "2026-01-01T10:00:00"}]},
+    )
+    assert response.status_code == 200
+    assert response.json()["applied"] == 1
+
+    assert _cursor(db, user, deck_id) == 0
+    assert _study(client, user, deck_id)[:2] == first[:2]
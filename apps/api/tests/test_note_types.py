@@ -0,0 +1,78 @@
+import uuid
+
+import pytest
+from sqlalchemy import func, select
+
+from app.models import Card
+
+
+@pytest.fixture
+def note_type(client, user):
+    """Deck e note type do usuário, com duas notas e o template "front" ativo."""
+    deck_id = client.post("/decks", headers=user.headers, json={"name": f"Deck {uuid.uuid4().hex[:8]}"}).json()["id"]
+    note_type_id = client.post("/note-types", headers=user.headers, json={"name": "Vocab", "deck_id": deck_id}).json()["id"]
+    client.post(
+        f"/note-types/{note_type_id}/fields",
+        headers=user.headers,
+        json={"name": "word", "label": "Palavra", "field_type": "text"},
+    )
+    front = _create_template(client, user, note_type_id, "front", is_active=True)
+    client.post(
+        "/notes/import",
+        headers=user.headers,
+        json={"deck_id": deck_id, "note_type_id": note_type_id, "notes": [{"fields": {"word": w}} for w in ("ねこ", "いぬ")]},
+    )
+    return {"id": note_type_id, "deck_id": deck_id, "front": front}
+
+
+def _create_template(client, user, note_type_id, name, is_active):
+    response = client.post(
+        f"/note-types/{note_type_id}/templates",
+        headers=user.headers,
+        json={"name": name, "front_template": f"{name} {{{{word}}}}", "back_template": "{{word}}", "is_active": is_active},
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def _update_template(client, user, template_id, **changes):
+    response = client.put(f"/note-types/card-templates/{template_id}", headers=user.headers, json=changes)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _card_count(db, template_id):
+    return db.scalar(select(func.count()).select_from(Card).where(Card.card_template_id == template_id))
+
+
+def test_new_active_template_creates_cards_for_existing_notes(client, user, db, note_type):
+    template = _create_template(client, user, note_type["id"], "back", is_active=True)
+
+    assert template["propagation_job_id"] is None
+    assert _card_count(db, template["id"]) == 2
+    previews = db.scalars(select(Card.preview).where(Card.card_template_id == template["id"])).all()
+    assert sorted(previews) == ["back いぬ", "back ねこ"]
+
+
+def test_activating_a_template_creates_its_cards_once(client, user, db, note_type):
+    template = _create_template(client, user, note_type["id"], "back", is_active=False)
+    assert _card_count(db, template["id"]) == 0
+
+    _update_template(client, user, template["id"], is_active=True)
+    assert _card_count(db, template["id"]) == 2
+
+    # Desativar mantém os cards; reativar não os duplica
+    _update_template(client, user, template["id"], is_active=False)
+    _update_template(client, user, template["id"], is_active=True)
+    assert _card_count(db, template["id"]) == 2
+
+
+def test_template_edit_expires_open_study_sessions(client, user, note_type):
+    session = client.post(f"/decks/{note_type['deck_id']}/sessions", headers=user.headers, json={"batch_size": 1}).json()
+    assert client.get(f"/sessions/{session['id']}/next", headers=user.headers).status_code == 200
+
+    _update_template(client, user, note_type["front"]["id"], front_template="novo {{word}}")
+
+    assert client.get(f"/sessions/{session['id']}/next", headers=user.headers).status_code == 404
+    fresh = client.post(f"/decks/{note_type['deck_id']}/sessions", headers=user.headers, json={}).json()
+    assert fresh["cards"] and all(card["front"].startswith("novo") for card in fresh["cards"])
@@ -0,0 +1,57 @@
+from sqlalchemy import select
+
+from app.models import NoteType
+
+
+def _import(client, user, deck_id, note_type_id, *items):
+    response = client.post(
+        "/notes/import",
+        headers=user.headers,
+        json={"deck_id": deck_id, "note_type_id": note_type_id, "notes": [{"fields": fields} for fields in items]},
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _values(client, user, note_id):
+    note = client.get(f"/notes/{note_id}", headers=user.headers).json()
+    return sorted((value["field"]["name"], value["value_text"]) for value in note["field_values"])
+
+
+def _fork(client, user, deck_id, db):
+    fork_id = client.post(f"/decks/{deck_id}/fork", headers=user.headers, json={}).json()["id"]
+    note_type_id = db.scalar(select(NoteType.id).where(NoteType.deck_id == deck_id))
+    return fork_id, note_type_id
+
+
+def test_import_merges_duplicates_within_the_batch(client, user, deck_id, db):
+    fork_id, note_type_id = _fork(client, user, deck_id, db)
+
+    # "ねこ" é nova; "か" vem da origem e vira cópia do fork. "ネコ"/"カ" têm o mesmo hash
+    result = _import(
+        client,
+        user,
+        fork_id,
+        note_type_id,
+        {"kana": "ねこ", "romaji": "neko"},
+        {"kana": "ネコ", "romaji": "NEKO"},
+        {"kana": "か", "romaji": "ka"},
+        {"kana": "カ", "romaji": "KA2"},
+    )
+
+    new_id, _, copy_id, _ = result["note_ids"]
+    assert result["note_ids"] == [new_id, new_id, copy_id, copy_id]
+    assert (result["created"], result["updated"]) == (1, 1)
+    assert _values(client, user, new_id) == [("kana", "ネコ"), ("romaji", "NEKO")]
+    assert [name for name, _ in _values(client, user, copy_id)].count("romaji") == 1
+    assert ("romaji", "KA2") in _values(client, user, copy_id)
+
+
+def test_reimport_updates_the_existing_note(client, user, deck_id, db):
+    fork_id, note_type_id = _fork(client, user, deck_id, db)
+    note_id = _import(client, user, fork_id, note_type_id, {"kana": "いぬ", "romaji": "inu"})["note_ids"][0]
+
+    result = _import(client, user, fork_id, note_type_id, {"kana": "イヌ", "romaji": "INU", "exemplo": "犬"})
+
+    assert result == {"created": 0, "updated": 1, "note_ids": [note_id]}
+    assert _values(client, user, note_id) == [("exemplo", "犬"), ("kana", "イヌ"), ("romaji", "INU")]
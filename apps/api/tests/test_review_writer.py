@@ -0,0 +1,82 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event, select
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.rate_limit import TokenBucketLimiter
+from app.models import Card, Note, User
+from app.routers.study import _ensure_deck_access
+from app.services.review_writer import ReviewWriter
+
+
+def _submit_together(writer: ReviewWriter, user: User, reviews: list[tuple[int, bool]]) -> list:
+    barrier = Barrier(len(reviews))
+
+    def submit(review):
+        barrier.wait()
+        try:
+            return writer.submit(user, *review)
+        except HTTPException as exc:
+            return exc
+
+    with ThreadPoolExecutor(len(reviews)) as pool:
+        return list(pool.map(submit, reviews))
+
+
+@pytest.fixture
+def commits():
+    count = []
+    listener = lambda session: count.append(session)  # noqa: E731
+    event.listen(SessionLocal, "after_commit", listener)
+    yield count
+    event.remove(SessionLocal, "after_commit", listener)
+
+
+def test_concurrent_reviews_share_one_commit(user, deck_id, db, commits, monkeypatch):
+    monkeypatch.setattr(settings, "REVIEW_COALESCE_MS", 300)
+    account = db.get(User, user.id)
+    card_ids = db.scalars(select(Card.id).join(Note).where(Note.deck_id == deck_id).order_by(Card.id).limit(3)).all()
+
+    results = _submit_together(ReviewWriter(_ensure_deck_access), account, [(card_id, True) for card_id in card_ids])
+
+    assert [result.card_id for result in results] == card_ids
+    assert all(result.reps == 1 for result in results)
+    assert len(commits) == 1
+
+
+def test_errors_are_per_review(user, deck_id, db, commits, monkeypatch):
+    monkeypatch.setattr(settings, "REVIEW_COALESCE_MS", 300)
+    account = db.get(User, user.id)
+    card_id = db.scalar(select(Card.id).join(Note).where(Note.deck_id == deck_id).order_by(Card.id))
+
+    missing, applied = _submit_together(ReviewWriter(_ensure_deck_access), account, [(0, True), (card_id, True)])
+
+    assert isinstance(missing, HTTPException) and missing.status_code == 404
+    assert applied.card_id == card_id
+    assert len(commits) == 1
+
+
+def test_same_card_twice_in_a_batch_chains_progress(user, deck_id, db, monkeypatch):
+    monkeypatch.setattr(settings, "REVIEW_COALESCE_MS", 300)
+    account = db.get(User, user.id)
+    card_id = db.scalar(select(Card.id).join(Note).where(Note.deck_id == deck_id).order_by(Card.id))
+
+    results = _submit_together(ReviewWriter(_ensure_deck_access), account, [(card_id, True), (card_id, True)])
+
+    assert sorted(result.reps for result in results) == [1, 2]
+
+
+def test_token_bucket_allows_burst_then_asks_to_wait():
+    limiter = TokenBucketLimiter(rate=1, burst=2)
+    assert limiter.acquire("user") == limiter.acquire("user") == 0
+    assert 0 < limiter.acquire("user") <= 1
+    assert limiter.acquire("other") == 0
+
+    with pytest.raises(HTTPException) as exc:
+        limiter.check("user")
+    assert exc.value.status_code == 429
+    assert exc.value.headers["Retry-After"] == "1"
@@ -0,0 +1,44 @@
+import msgpack
+import pytest
+import zstandard
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.services.snapshots import SNAPSHOT_MEDIA_TYPE, SnapshotReader
+
+
+def _snapshot(*records) -> bytes:
+    return zstandard.ZstdCompressor().compress(b"".join(msgpack.packb(record) for record in records))
+
+
+def test_reader_returns_records_across_chunks():
+    data = _snapshot({"kind": "header"}, {"kind": "end", "notes": 0})
+    reader = SnapshotReader()
+
+    records = reader.feed(data[:5]) + reader.feed(data[5:])
+
+    assert [record["kind"] for record in records] == ["header", "end"]
+
+
+def test_reader_rejects_decompression_bomb():
+    bomb = _snapshot({"kind": "header", "padding": "x" * (4 * 1024 * 1024)})
+    assert len(bomb) < 4096
+
+    with pytest.raises(HTTPException) as exc:
+        SnapshotReader(max_bytes=1024 * 1024).feed(bomb)
+    assert exc.value.status_code == 413
+
+
+def test_inline_import_caps_request_body(client, user, monkeypatch):
+    monkeypatch.setattr(settings, "DECK_IMPORT_MAX_BYTES", 1024)
+    body = _snapshot({"kind": "header", "padding": "x"}) + b"\0" * 2048
+
+    def chunks():
+        yield body[:1000]
+        yield body[1000:]
+
+    response = client.post(
+        "/decks/import", content=chunks(), headers={**user.headers, "Content-Type": SNAPSHOT_MEDIA_TYPE}
+    )
+
+    assert response.status_code == 413
@@ -0,0 +1,34 @@
+import io
+import uuid
+import wave
+
+from app.models import MediaAsset
+
+
+def _wav(seconds: float = 0.2) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(8000)
+        out.writeframes(b"\x01\x00" * int(8000 * seconds))
+    return buffer.getvalue()
+
+
+def test_fork_sprites_include_source_audio(client, user, db):
+    source_id = client.post("/decks", headers=user.headers, json={"name": f"Áudio {uuid.uuid4().hex[:8]}"}).json()["id"]
+    asset = client.post(
+        f"/decks/{source_id}/media",
+        params={"file_name": "a.wav"},
+        content=_wav(),
+        headers={**user.headers, "Content-Type": "audio/wav"},
+    ).json()
+    fork_id = client.post(f"/decks/{source_id}/fork", headers=user.headers, json={}).json()["id"]
+
+    built = client.post(f"/decks/{fork_id}/audio-sprites", headers=user.headers)
+    assert built.status_code == 200, built.text
+    assert list(built.json()["clips"]) == [str(asset["id"])]
+    assert client.get(f"/decks/{fork_id}/audio-sprites", headers=user.headers).json()["stale"] is False
+
+    # O asset é da origem: o build do fork não grava nele
+    assert "sprite" not in db.get(MediaAsset, asset["id"]).metadata_json
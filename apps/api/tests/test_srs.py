@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import select
+
+from app.models import Card, CardReviewLog, Note
+from app.services.srs_fitting import RATIO_BIN_WIDTH, collect_ratio_bins
+from packages.core.srs import ReviewState, SrsAlgorithm
+from packages.core.srs.fitting import MODIFIER_BOUNDS, RETENTION_BOUNDS, fit_retention, fit_sm2_params
+from packages.core.srs.registry import get_algorithm
+
+NOW = datetime(2026, 1, 1, 12, 0)
+
+
+def _expected_counts(retention: float, reviews_per_ratio: int = 1000):
+    # Contagens esperadas pelo modelo R = r0 ** (t / I): o estimador deve devolver r0
+    ratios = np.linspace(0.5, 3.0, 11)
+    recall = retention**ratios
+    return ratios, reviews_per_ratio * recall, reviews_per_ratio * (1 - recall)
+
+
+def test_srs_algorithm_requires_schedule():
+    with pytest.raises(TypeError):
+        SrsAlgorithm()
+
+
+def test_sm2_grows_interval_on_correct_and_resets_on_lapse():
+    sm2 = get_algorithm("sm2")
+    state = sm2.schedule(ReviewState(), correct=True, now=NOW, initial=True)
+    intervals = []
+    for _ in range(3):
+        state = sm2.schedule(state, correct=True, now=NOW)
+        intervals.append(state.interval)
+    assert intervals == sorted(intervals) and intervals[0] < intervals[-1]
+
+    lapsed = sm2.schedule(state, correct=False, now=NOW)
+    assert lapsed.interval == sm2.default_params["learning_step"]
+    assert lapsed.lapses == state.lapses + 1
+
+
+def test_sm2_interval_modifier_scales_intervals():
+    sm2 = get_algorithm("sm2")
+    state = ReviewState(interval=2 * 24 * 60, ease=2.5, reps=3)
+    base = sm2.schedule(state, correct=True, now=NOW).interval
+    scaled = sm2.schedule(state, correct=True, now=NOW, params={"interval_modifier": 0.5}).interval
+    assert scaled == pytest.approx(base / 2, abs=1)
+
+
+@pytest.mark.parametrize("retention", [0.7, 0.85, 0.95])
+def test_fit_retention_recovers_model_retention(retention):
+    assert fit_retention(*_expected_counts(retention)) == pytest.approx(retention, abs=1e-4)
+
+
+def test_fit_retention_bounds_without_failures_or_successes():
+    ratios = [1.0, 2.0]
+    assert fit_retention(ratios, [5, 5], [0, 0]) == RETENTION_BOUNDS[1]
+    assert fit_retention(ratios, [0, 0], [5, 5]) == RETENTION_BOUNDS[0]
+
+
+def test_fit_sm2_params_modifier_targets_desired_retention():
+    params = fit_sm2_params(*_expected_counts(0.85), desired_retention=0.9)
+    assert params["interval_modifier"] == pytest.approx(np.log(0.9) / np.log(0.85), rel=1e-3)
+
+    low = fit_sm2_params(*_expected_counts(0.5), desired_retention=0.9)
+    assert low["interval_modifier"] == MODIFIER_BOUNDS[0]
+
+
+def test_fit_sm2_params_needs_enough_reviews():
+    assert fit_sm2_params([1.0], [10], [5], min_reviews=30) is None
+
+
+def test_collect_ratio_bins_pairs_consecutive_reviews(db, user, deck_id):
+    card = db.scalars(select(Card).join(Note).where(Note.deck_id == deck_id).order_by(Card.id)).first()
+    # Agendado para 100 min: revisões 100 min (t/I = 1, acerto) e 300 min depois (t/I = 3, erro)
+    reviews = [(NOW, True, 100), (NOW + timedelta(minutes=100), True, 100), (NOW + timedelta(minutes=400), False, 60)]
+    for created_at, correct, interval in reviews:
+        db.add(
+            CardReviewLog(
+                user_id=user.id,
+                card_id=card.id,
+                note_id=card.note_id,
+                deck_id=deck_id,
+                correct=correct,
+                srs_interval_after=interval,
+                created_at=created_at,
+            )
+        )
+    db.flush()
+
+    successes, failures = collect_ratio_bins(db, user.id)
+    db.rollback()
+
+    assert successes.sum() == 1 and successes[int(1.0 / RATIO_BIN_WIDTH)] == 1
+    assert failures.sum() == 1 and failures[int(3.0 / RATIO_BIN_WIDTH)] == 1
@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from sqlalchemy import event
+from sqlalchemy.engine.default import CACHE_HIT
+
+from app.core import startup
+from app.core.database import engine
+from app.models import Deck
+from app.services.study import review_stats, select_new_cards, select_reviews
+
+
+def test_warmup_compiles_the_study_queries(client, user, deck_id, db):
+    client.post(
+        "/study/submit", headers=user.headers, json={"deck_id": deck_id, "results": [{"card_id": 1, "correct": True}]}
+    )
+    engine._compiled_cache.clear()
+    startup._warm_queries()
+
+    misses = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if context.cache_hit != CACHE_HIT:
+            misses.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        deck = db.get(Deck, deck_id)
+        assert select_new_cards(db, user.id, deck, 5)
+        assert select_reviews(db, user.id, deck, 5, now=datetime(2100, 1, 1))
+        review_stats(db, user.id, deck)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert misses == []
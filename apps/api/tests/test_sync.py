@@ -0,0 +1,65 @@
+from sqlalchemy import select
+
+from app.models import Card, Deck, Note
+from app.models.sync import current_sync_seq, next_sync_seq
+
+
+def _pull_deck_ids(client, user, db):
+    body = client.get("/me/sync?since=0&limit=2000", headers=user.headers).json()
+    note_ids = {card["note_id"] for card in body["cards"]}
+    return set(db.scalars(select(Note.deck_id).where(Note.id.in_(note_ids)))) if note_ids else set()
+
+
+def test_pull_ships_only_studied_decks(client, user, deck_id, db):
+    assert _pull_deck_ids(client, user, db) == set()
+
+    card_id = client.get(f"/decks/{deck_id}/study?limit=1", headers=user.headers).json()["cards"][0]["id"]
+    response = client.post(
+        "/study/submit", headers=user.headers, json={"deck_id": deck_id, "results": [{"card_id": card_id, "correct": True}]}
+    )
+    assert response.status_code == 200
+
+    assert _pull_deck_ids(client, user, db) == {deck_id}
+    other_public = db.scalars(select(Deck.id).where(Deck.id != deck_id, Deck.is_public == True)).all()  # noqa: E712
+    assert other_public
+
+
+def test_one_seq_per_transaction(db):
+    first = next_sync_seq(db)
+    assert next_sync_seq(db) == first
+    db.commit()
+
+    assert current_sync_seq(db) == first
+    assert next_sync_seq(db) == first + 1
+    db.rollback()
+    assert current_sync_seq(db) == first
+
+
+def test_flushes_in_one_transaction_share_the_seq(db):
+    cards = db.scalars(select(Card).order_by(Card.id).limit(2)).all()
+    cards[0].mnemonic = (cards[0].mnemonic or "") + " "
+    db.flush()
+    cards[1].mnemonic = (cards[1].mnemonic or "") + " "
+    db.flush()
+    assert cards[0].updated_seq == cards[1].updated_seq
+    db.rollback()
+
+
+def test_has_more_only_when_changes_remain(client, user, deck_id):
+    token = client.get("/me/sync?since=0&limit=2000", headers=user.headers).json()["token"]
+    card_ids = [card["id"] for card in client.get(f"/decks/{deck_id}/study?limit=2", headers=user.headers).json()["cards"]]
+    for card_id in card_ids:
+        client.post(
+            "/study/submit",
+            headers=user.headers,
+            json={"deck_id": deck_id, "results": [{"card_id": card_id, "correct": True}]},
+        )
+
+    # Exatamente `limit` mudanças restantes: a página as traz todas e não pede outra ida
+    full = client.get(f"/me/sync?since={token}&limit=2", headers=user.headers).json()
+    assert len(full["progress"]) == 2
+    assert full["has_more"] is False
+
+    partial = client.get(f"/me/sync?since={token}&limit=1", headers=user.headers).json()
+    assert len(partial["progress"]) == 1
+    assert partial["has_more"] is True
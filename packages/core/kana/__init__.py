@@ -0,0 +1,31 @@
+from packages.core.kana.tables import BASIC_HIRAGANA, KANA_TO_ROMAJI, ROMAJI_TO_KANA
+from packages.core.kana.transliterate import (
+    normalize_text,
+    normalize_text_batch,
+    romaji_key,
+    romaji_key_batch,
+    romaji_to_hiragana,
+    romaji_to_hiragana_batch,
+    romaji_to_katakana,
+    to_hiragana,
+    to_katakana,
+    to_romaji,
+    to_romaji_batch,
+)
+
+__all__ = [
+    "BASIC_HIRAGANA",
+    "KANA_TO_ROMAJI",
+    "ROMAJI_TO_KANA",
+    "normalize_text",
+    "normalize_text_batch",
+    "romaji_key",
+    "romaji_key_batch",
+    "romaji_to_hiragana",
+    "romaji_to_hiragana_batch",
+    "romaji_to_katakana",
+    "to_hiragana",
+    "to_katakana",
+    "to_romaji",
+    "to_romaji_batch",
+]
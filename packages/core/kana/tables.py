@@ -0,0 +1,120 @@
+"""Tabelas pré-computadas de transliteração (Hepburn) montadas uma vez na importação."""
+
+from __future__ import annotations
+
+# Ordem tradicional (gojūon) dos 46 kana básicos; usada pelos seeds e scripts
+BASIC_HIRAGANA = (
+    "あいうえお"
+    "かきくけこ"
+    "さしすせそ"
+    "たちつてと"
+    "なにぬねの"
+    "はひふへほ"
+    "まみむめも"
+    "やゆよ"
+    "らりるれろ"
+    "わをん"
+)
+
+_MONOGRAPHS = {
+    "あ": "a", "い": "i", "う": "u", "え": "e", "お": "o",
+    "か": "ka", "き": "ki", "く": "ku", "け": "ke", "こ": "ko",
+    "さ": "sa", "し": "shi", "す": "su", "せ": "se", "そ": "so",
+    "た": "ta", "ち": "chi", "つ": "tsu", "て": "te", "と": "to",
+    "な": "na", "に": "ni", "ぬ": "nu", "ね": "ne", "の": "no",
+    "は": "ha", "ひ": "hi", "ふ": "fu", "へ": "he", "ほ": "ho",
+    "ま": "ma", "み": "mi", "む": "mu", "め": "me", "も": "mo",
+    "や": "ya", "ゆ": "yu", "よ": "yo",
+    "ら": "ra", "り": "ri", "る": "ru", "れ": "re", "ろ": "ro",
+    "わ": "wa", "ゐ": "wi", "ゑ": "we", "を": "wo", "ん": "n",
+    "が": "ga", "ぎ": "gi", "ぐ": "gu", "げ": "ge", "ご": "go",
+    "ざ": "za", "じ": "ji", "ず": "zu", "ぜ": "ze", "ぞ": "zo",
+    "だ": "da", "ぢ": "ji", "づ": "zu", "で": "de", "ど": "do",
+    "ば": "ba", "び": "bi", "ぶ": "bu", "べ": "be", "ぼ": "bo",
+    "ぱ": "pa", "ぴ": "pi", "ぷ": "pu", "ぺ": "pe", "ぽ": "po",
+    "ゔ": "vu",
+    "ぁ": "a", "ぃ": "i", "ぅ": "u", "ぇ": "e", "ぉ": "o",
+    "ゃ": "ya", "ゅ": "yu", "ょ": "yo", "ゎ": "wa",
+}
+
+# Yōon: consoante da coluna i + ゃゅょ pequeno
+_YOON_BASES = {
+    "き": "ky", "ぎ": "gy", "に": "ny", "ひ": "hy", "び": "by", "ぴ": "py", "み": "my", "り": "ry",
+    "し": "sh", "じ": "j", "ち": "ch", "ぢ": "j",
+}
+_YOON_VOWELS = {"ゃ": "a", "ゅ": "u", "ょ": "o"}
+
+# Combinações estendidas usadas sobretudo em katakana (ティ, ファ, ウィ...)
+_EXTENDED = {
+    "てぃ": "ti", "でぃ": "di", "とぅ": "tu", "どぅ": "du",
+    "ふぁ": "fa", "ふぃ": "fi", "ふぇ": "fe", "ふぉ": "fo",
+    "うぃ": "wi", "うぇ": "we", "うぉ": "wo",
+    "ゔぁ": "va", "ゔぃ": "vi", "ゔぇ": "ve", "ゔぉ": "vo",
+    "しぇ": "she", "じぇ": "je", "ちぇ": "che",
+}
+
+
+# Katakana <-> hiragana é um deslocamento fixo de 0x60 nos blocos Unicode (ァ..ヶ / ぁ..ゖ)
+KATAKANA_TO_HIRAGANA = {code: code - 0x60 for code in range(ord("ァ"), ord("ヶ") + 1)}
+HIRAGANA_TO_KATAKANA = {code - 0x60: code for code in range(ord("ァ"), ord("ヶ") + 1)}
+
+
+def _build_kana_to_romaji() -> dict[str, str]:
+    table = dict(_MONOGRAPHS)
+    for base, consonant in _YOON_BASES.items():
+        for small, vowel in _YOON_VOWELS.items():
+            table[base + small] = consonant + vowel
+    table.update(_EXTENDED)
+    # Sokuon: っ dobra a consoante seguinte (っち -> tchi)
+    for kana, romaji in list(table.items()):
+        if romaji[0] not in "aeiou" and kana != "ん":
+            table["っ" + kana] = ("t" if romaji.startswith("ch") else romaji[0]) + romaji
+    return table
+
+
+# Romaji alternativo aceito na entrada (Kunrei/Nihon-shiki e digitação de IME)
+_ROMAJI_ALIASES = {
+    "si": "し", "ti": "ち", "tu": "つ", "hu": "ふ", "zi": "じ", "di": "ぢ", "du": "づ",
+    "sya": "しゃ", "syu": "しゅ", "syo": "しょ",
+    "tya": "ちゃ", "tyu": "ちゅ", "tyo": "ちょ",
+    "zya": "じゃ", "zyu": "じゅ", "zyo": "じょ",
+    "jya": "じゃ", "jyu": "じゅ", "jyo": "じょ",
+    "cha": "ちゃ", "chu": "ちゅ", "cho": "ちょ",
+    "xa": "ぁ", "xi": "ぃ", "xu": "ぅ", "xe": "ぇ", "xo": "ぉ",
+    "la": "ぁ", "li": "ぃ", "lu": "ぅ", "le": "ぇ", "lo": "ぉ",
+    "xya": "ゃ", "xyu": "ゅ", "xyo": "ょ", "xtu": "っ", "ltu": "っ",
+}
+
+
+def _build_romaji_to_kana(kana_to_romaji: dict[str, str]) -> dict[str, str]:
+    table: dict[str, str] = {}
+    # Formas canônicas: kana "grande" prevalece sobre o pequeno e ぢ/づ sobre じ/ず não
+    for kana, romaji in kana_to_romaji.items():
+        if kana.startswith("っ") or kana in "ぁぃぅぇぉゃゅょゎゐゑぢづ" or kana == "ん":
+            continue
+        table.setdefault(romaji, kana)
+    # Combinações estendidas não sobrescrevem as básicas (wo -> を, não うぉ)
+    for kana, romaji in _EXTENDED.items():
+        table.setdefault(romaji, kana)
+    table.update(_ROMAJI_ALIASES)
+    # "nn" é ん + n..., nunca sokuon
+    for romaji, kana in list(table.items()):
+        if romaji[0] not in "aeioun":
+            table[(romaji[0] if not romaji.startswith("ch") else "t") + romaji] = "っ" + kana
+    return table
+
+
+KANA_TO_ROMAJI = _build_kana_to_romaji()
+ROMAJI_TO_KANA = _build_romaji_to_kana(KANA_TO_ROMAJI)
+
+# Unidades de um caractere saem por str.translate; só as de vários (yōon, sokuon) precisam de regex
+KANA_DIGRAPHS = {kana: romaji for kana, romaji in KANA_TO_ROMAJI.items() if len(kana) > 1}
+KANA_MONOGRAPHS = {ord(kana): romaji for kana, romaji in KANA_TO_ROMAJI.items() if len(kana) == 1}
+# っ solto (fim de palavra) sai como na digitação de IME, para não sumir ("あっ" != "あ")
+KANA_MONOGRAPHS[ord("っ")] = "xtu"
+# ん antes de vogal ou y leva apóstrofo: かんい -> "kan'i", distinto de かに -> "kani"
+SYLLABIC_N = "n'"
+
+
+# Vogais longas com mácron (tōkyō) viram vogal dobrada
+MACRONS = str.maketrans({"ā": "aa", "ī": "ii", "ū": "uu", "ē": "ee", "ō": "ou", "â": "aa", "î": "ii", "û": "uu", "ê": "ee", "ô": "ou"})
@@ -0,0 +1,129 @@
+"""Conversão hiragana <-> katakana <-> romaji.
+
+Kana <-> kana é um único `str.translate`. Kana -> romaji troca primeiro as unidades de vários
+caracteres (yōon, sokuon, ん antes de vogal) com um `re.sub` pré-compilado e depois os kana
+simples com `str.translate`, sem laço por caractere em Python. Romaji -> kana usa a alternância de
+todas as chaves, da maior para a menor (casamento guloso). As APIs `*_batch` juntam as strings com um
+separador e fazem uma única passada; resultados de strings repetidas ficam em cache.
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Iterable
+
+from packages.core.kana.tables import (
+    HIRAGANA_TO_KATAKANA,
+    KANA_DIGRAPHS,
+    KANA_MONOGRAPHS,
+    KATAKANA_TO_HIRAGANA,
+    MACRONS,
+    ROMAJI_TO_KANA,
+    SYLLABIC_N,
+)
+
+_SEPARATOR = "\x00"
+_CACHE_SIZE = 65536
+
+
+def _alternation(keys: Iterable[str]) -> str:
+    return "|".join(re.escape(key) for key in sorted(keys, key=len, reverse=True))
+
+
+# Forma de toda unidade de vários kana: っ + kana e/ou kana + kana pequeno; classes de caracteres
+# casam bem mais rápido que a alternância com todas as chaves
+_KANA_PATTERN = re.compile("っ?[ぁ-ゖ][ぁぃぅぇぉゃゅょゎ]|っ[ぁ-ゖ]|ん(?=[あいうえおやゆよ])")
+# ん: "n'" explícito, "nn" ou "n" que não inicia sílaba (seguido de consoante ou fim)
+_ROMAJI_PATTERN = re.compile(_alternation(ROMAJI_TO_KANA) + r"|n'|nn(?![aiueoy])|n(?![aiueoy])")
+_HAS_KATAKANA = re.compile("[ァ-ヶ]")
+_LONG_VOWEL = re.compile(r"([aeiou])ー")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _kana_repl(match: re.Match[str]) -> str:
+    unit = match.group()
+    if unit == "ん":
+        return SYLLABIC_N
+    romaji = KANA_DIGRAPHS.get(unit)
+    return romaji if romaji is not None else unit.translate(KANA_MONOGRAPHS)
+
+
+def _romaji_repl(match: re.Match[str]) -> str:
+    return ROMAJI_TO_KANA.get(match.group(), "ん")
+
+
+def to_hiragana(text: str) -> str:
+    return text.translate(KATAKANA_TO_HIRAGANA)
+
+
+def to_katakana(text: str) -> str:
+    return text.translate(HIRAGANA_TO_KATAKANA)
+
+
+def _to_romaji(text: str) -> str:
+    hiragana = text.translate(KATAKANA_TO_HIRAGANA) if _HAS_KATAKANA.search(text) else text
+    romaji = _KANA_PATTERN.sub(_kana_repl, hiragana).translate(KANA_MONOGRAPHS)
+    return _LONG_VOWEL.sub(r"\1\1", romaji) if "ー" in romaji else romaji
+
+
+def _romaji_to_hiragana(text: str) -> str:
+    return _ROMAJI_PATTERN.sub(_romaji_repl, text.lower())
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def to_romaji(text: str) -> str:
+    """Kana (hiragana ou katakana) para romaji Hepburn; o que não é kana passa intacto."""
+    return _to_romaji(text)
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def romaji_to_hiragana(text: str) -> str:
+    """Romaji (Hepburn, Kunrei ou digitação de IME) para hiragana; o resto passa intacto."""
+    return _romaji_to_hiragana(text)
+
+
+def romaji_to_katakana(text: str) -> str:
+    return to_katakana(romaji_to_hiragana(text))
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def normalize_text(text: str) -> str:
+    """Forma canônica para comparação: NFKC (meia largura -> largura cheia), minúsculas, katakana
+    como hiragana, mácrons como vogal dobrada e espaços colapsados."""
+    text = unicodedata.normalize("NFKC", text).lower().translate(MACRONS)
+    return _WHITESPACE.sub(" ", text).strip().translate(KATAKANA_TO_HIRAGANA)
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def romaji_key(text: str) -> str:
+    """Chave fonética em romaji: "shi", "si", "し" e "シ" produzem a mesma chave."""
+    return _to_romaji(_romaji_to_hiragana(normalize_text(text)))
+
+
+def _batch(convert, texts: Iterable[str], strip: bool = False) -> list[str]:
+    texts = list(texts)
+    if not texts:
+        return []
+    if any(_SEPARATOR in text for text in texts):
+        return [convert(text) for text in texts]
+    parts = convert(_SEPARATOR.join(texts)).split(_SEPARATOR)
+    return [part.strip() for part in parts] if strip else parts
+
+
+def to_romaji_batch(texts: Iterable[str]) -> list[str]:
+    return _batch(_to_romaji, texts)
+
+
+def romaji_to_hiragana_batch(texts: Iterable[str]) -> list[str]:
+    return _batch(_romaji_to_hiragana, texts)
+
+
+def normalize_text_batch(texts: Iterable[str]) -> list[str]:
+    return _batch(normalize_text.__wrapped__, texts, strip=True)
+
+
+def romaji_key_batch(texts: Iterable[str]) -> list[str]:
+    # Normaliza por item antes (strip/espaços), depois converte tudo numa passada só
+    return _batch(lambda text: _to_romaji(_romaji_to_hiragana(text)), normalize_text_batch(texts))
@@ -0,0 +1,11 @@
+from packages.core.srs.base import ReviewState, SrsAlgorithm
+from packages.core.srs.registry import DEFAULT_ALGORITHM, available_algorithms, get_algorithm, register_algorithm
+
+__all__ = [
+    "ReviewState",
+    "SrsAlgorithm",
+    "DEFAULT_ALGORITHM",
+    "available_algorithms",
+    "get_algorithm",
+    "register_algorithm",
+]
@@ -1,2 +1,40 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any
+
+from packages.core.srs.algorithm_stages import stage_for_interval
+from packages.core.srs.base import MINUTES_PER_DAY, ReviewState, SrsAlgorithm, adjust_ease
+
+
 def calculate_next_review(is_correct: bool, current_interval: int) -> int:
     return max(1, current_interval * 2) if is_correct else 1
+
+
+@dataclass
+class SimpleAlgorithm(SrsAlgorithm):
+    """Dobra o intervalo (em dias) a cada acerto e volta para 1 dia no erro."""
+
+    name = "simple"
+
+    def schedule(
+        self,
+        state: ReviewState,
+        correct: bool,
+        now: datetime,
+        initial: bool = False,
+        params: dict[str, Any] | None = None,
+    ) -> ReviewState:
+        current_days = 0 if initial else (state.interval or 0) // MINUTES_PER_DAY
+        days = 1 if initial else calculate_next_review(correct, current_days)
+        interval = days * MINUTES_PER_DAY
+        return ReviewState(
+            stage=stage_for_interval(interval),
+            interval=interval,
+            ease=adjust_ease(state.ease or 2.5, correct),
+            reps=(state.reps or 0) + 1,
+            lapses=(state.lapses or 0) + (0 if correct else 1),
+            due_at=now + timedelta(minutes=interval),
+            last_reviewed_at=now,
+        )
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any
+
+from packages.core.srs.algorithm_stages import stage_for_interval
+from packages.core.srs.base import MINUTES_PER_DAY, ReviewState, SrsAlgorithm, adjust_ease
+
+SM2_DEFAULT_PARAMS: dict[str, Any] = {
+    # Passo de aprendizado (novos e reaprendizado após erro), em minutos
+    "learning_step": 4 * 60,
+    # Primeiro intervalo ao sair do aprendizado
+    "graduating_interval": MINUTES_PER_DAY,
+    # Multiplicador global dos intervalos; ajustado por usuário a partir do card_review_log
+    "interval_modifier": 1.0,
+    # Fração do intervalo mantida após um erro (0 = volta ao passo de aprendizado)
+    "lapse_multiplier": 0.0,
+    "max_interval": 365 * MINUTES_PER_DAY,
+}
+
+
+@dataclass
+class Sm2Algorithm(SrsAlgorithm):
+    """Variante do SM-2: o intervalo cresce pelo ease do card, escalado pelo `interval_modifier` do usuário."""
+
+    name = "sm2"
+    default_params: dict[str, Any] = field(default_factory=lambda: dict(SM2_DEFAULT_PARAMS))
+
+    def schedule(
+        self,
+        state: ReviewState,
+        correct: bool,
+        now: datetime,
+        initial: bool = False,
+        params: dict[str, Any] | None = None,
+    ) -> ReviewState:
+        p = self.resolve_params(params)
+        learning_step = int(p["learning_step"])
+        previous = max(int(state.interval or 0), learning_step)
+        ease = state.ease or 2.5
+
+        if initial or not state.reps:
+            interval = learning_step
+        elif correct:
+            if previous < p["graduating_interval"]:
+                interval = int(p["graduating_interval"])
+            else:
+                interval = int(previous * ease * p["interval_modifier"])
+        else:
+            interval = max(learning_step, int(previous * p["lapse_multiplier"]))
+        interval = min(interval, int(p["max_interval"]))
+
+        return ReviewState(
+            stage=stage_for_interval(interval),
+            interval=interval,
+            ease=adjust_ease(ease, correct),
+            reps=(state.reps or 0) + 1,
+            lapses=(state.lapses or 0) + (0 if correct else 1),
+            due_at=now + timedelta(minutes=interval),
+            last_reviewed_at=now,
+        )
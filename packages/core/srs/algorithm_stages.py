@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any
+
+from packages.core.srs.base import STAGES, ReviewState, SrsAlgorithm, adjust_ease
+
+STAGE_SCHEDULE: list[tuple[str, timedelta]] = [
+    ("curto_prazo", timedelta(hours=4)),
+    ("transicao", timedelta(hours=8)),
+    ("consolidacao", timedelta(days=1)),
+    ("longo_prazo", timedelta(days=2)),
+    ("memoria_estavel", timedelta(days=4)),
+]
+
+FALLBACK_LAST_INTERVAL = timedelta(days=7)
+
+
+def stage_index(stage: str | None) -> int:
+    for idx, (st, _) in enumerate(STAGE_SCHEDULE):
+        if stage == st:
+            return idx
+    return 0
+
+
+def stage_for_interval(interval_minutes: int) -> str:
+    """Maior estágio cujo intervalo fixo cabe no intervalo dado (para algoritmos sem estágios próprios)."""
+    stage = STAGES[0]
+    for st, interval in STAGE_SCHEDULE:
+        if interval_minutes >= interval.total_seconds() // 60:
+            stage = st
+    return stage
+
+
+@dataclass
+class StagesAlgorithm(SrsAlgorithm):
+    """Progressão por cinco estágios com intervalos fixos (comportamento original do backend)."""
+
+    name = "stages"
+
+    def schedule(
+        self,
+        state: ReviewState,
+        correct: bool,
+        now: datetime,
+        initial: bool = False,
+        params: dict[str, Any] | None = None,
+    ) -> ReviewState:
+        current_idx = stage_index(state.stage or STAGE_SCHEDULE[0][0])
+
+        if initial:
+            target_stage, interval = STAGE_SCHEDULE[0]
+        elif correct:
+            if current_idx < len(STAGE_SCHEDULE) - 1:
+                target_stage, interval = STAGE_SCHEDULE[current_idx + 1]
+            else:
+                target_stage, interval = STAGE_SCHEDULE[-1]
+                interval = FALLBACK_LAST_INTERVAL
+        else:
+            if current_idx > 0:
+                target_stage, interval = STAGE_SCHEDULE[current_idx - 1]
+            else:
+                target_stage, interval = STAGE_SCHEDULE[0]
+
+        return ReviewState(
+            stage=target_stage,
+            interval=int(interval.total_seconds() // 60),
+            ease=adjust_ease(state.ease or 2.5, correct),
+            reps=(state.reps or 0) + 1,
+            lapses=(state.lapses or 0) + (0 if correct else 1),
+            due_at=now + interval,
+            last_reviewed_at=now,
+        )
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, ClassVar
+
+# Estágios fixos usados pela UI/estatísticas (mesmos valores de LearningStage no backend)
+STAGES: tuple[str, ...] = ("curto_prazo", "transicao", "consolidacao", "longo_prazo", "memoria_estavel")
+
+MINUTES_PER_DAY = 24 * 60
+
+
+@dataclass
+class ReviewState:
+    """Estado SRS de um card para um usuário, independente do ORM. Intervalos em minutos."""
+
+    stage: str | None = None
+    interval: int = 0
+    ease: float = 2.5
+    reps: int = 0
+    lapses: int = 0
+    due_at: datetime | None = None
+    last_reviewed_at: datetime | None = None
+
+
+@dataclass
+class SrsAlgorithm(ABC):
+    """Interface dos algoritmos de agendamento.
+
+    `schedule` recebe o estado atual e devolve o próximo; `params` são parâmetros por usuário
+    (ajustados offline) que sobrescrevem `default_params`.
+    """
+
+    name: ClassVar[str] = ""
+    default_params: dict[str, Any] = field(default_factory=dict)
+
+    def resolve_params(self, params: dict[str, Any] | None) -> dict[str, Any]:
+        resolved = dict(self.default_params)
+        if params:
+            resolved.update({key: value for key, value in params.items() if key in resolved})
+        return resolved
+
+    @abstractmethod
+    def schedule(
+        self,
+        state: ReviewState,
+        correct: bool,
+        now: datetime,
+        initial: bool = False,
+        params: dict[str, Any] | None = None,
+    ) -> ReviewState:
+        ...
+
+
+def adjust_ease(current: float, correct: bool) -> float:
+    if correct:
+        return min(3.0, current + 0.05)
+    return max(1.3, current - 0.1)
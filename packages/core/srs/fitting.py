@@ -0,0 +1,75 @@
+"""Ajuste offline dos parâmetros por usuário do SM-2 a partir do histórico de revisões.
+
+Modelo: a retenção de um card revisado após `t` minutos, tendo sido agendado para `I` minutos,
+é `R = r0 ** (t / I)` (esquecimento exponencial com estabilidade proporcional ao intervalo).
+`r0` é a retenção observada no vencimento; para atingir a retenção desejada `r*` basta escalar os
+intervalos por `ln(r*) / ln(r0)`, que vira o `interval_modifier` do usuário.
+
+Requer NumPy (usado apenas pelo job de ajuste, não pelo caminho de revisão).
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+DEFAULT_DESIRED_RETENTION = 0.9
+MIN_REVIEWS_TO_FIT = 30
+MODIFIER_BOUNDS = (0.5, 2.5)
+RETENTION_BOUNDS = (0.01, 0.999)
+
+
+def _log_likelihood_gradient(theta: float, ratios: np.ndarray, successes: np.ndarray, failures: np.ndarray) -> float:
+    # theta = ln(r0) < 0; log R_i = theta * x_i
+    recall = np.exp(theta * ratios)
+    forget = np.maximum(1.0 - recall, 1e-12)
+    return float(np.sum(successes * ratios) - np.sum(failures * ratios * recall / forget))
+
+
+def fit_retention(ratios, successes, failures, iterations: int = 60) -> float:
+    """Estimativa de máxima verossimilhança de `r0`.
+
+    `ratios` são os tempos decorridos relativos ao intervalo agendado (t / I); `successes`/`failures`
+    são contagens por razão, o que permite passar dados agregados em bins. A log-verossimilhança é
+    côncava em ln(r0), então a derivada é monotônica e uma bisseção vetorizada converge sempre.
+    """
+    ratios = np.asarray(ratios, dtype=np.float64)
+    successes = np.asarray(successes, dtype=np.float64)
+    failures = np.asarray(failures, dtype=np.float64)
+    mask = (ratios > 0) & ((successes + failures) > 0)
+    ratios, successes, failures = ratios[mask], successes[mask], failures[mask]
+
+    low, high = np.log(RETENTION_BOUNDS[0]), np.log(RETENTION_BOUNDS[1])
+    if failures.sum() == 0:
+        return RETENTION_BOUNDS[1]
+    if successes.sum() == 0:
+        return RETENTION_BOUNDS[0]
+
+    for _ in range(iterations):
+        mid = (low + high) / 2
+        if _log_likelihood_gradient(mid, ratios, successes, failures) > 0:
+            low = mid
+        else:
+            high = mid
+    return float(np.exp((low + high) / 2))
+
+
+def fit_sm2_params(
+    ratios,
+    successes,
+    failures,
+    desired_retention: float = DEFAULT_DESIRED_RETENTION,
+    min_reviews: int = MIN_REVIEWS_TO_FIT,
+) -> dict[str, float] | None:
+    """Parâmetros do SM-2 para um usuário, ou None se não houver revisões suficientes."""
+    review_count = float(np.sum(successes) + np.sum(failures))
+    if review_count < min_reviews:
+        return None
+
+    retention = fit_retention(ratios, successes, failures)
+    modifier = float(np.log(desired_retention) / np.log(retention))
+    return {
+        "interval_modifier": float(np.clip(modifier, *MODIFIER_BOUNDS)),
+        "observed_retention": retention,
+        "desired_retention": desired_retention,
+        "review_count": review_count,
+    }
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from packages.core.srs.algorithm_simple import SimpleAlgorithm
+from packages.core.srs.algorithm_sm2 import Sm2Algorithm
+from packages.core.srs.algorithm_stages import StagesAlgorithm
+from packages.core.srs.base import SrsAlgorithm
+
+DEFAULT_ALGORITHM = "stages"
+
+_REGISTRY: dict[str, SrsAlgorithm] = {}
+
+
+def register_algorithm(algorithm: SrsAlgorithm) -> SrsAlgorithm:
+    if not algorithm.name:
+        raise ValueError("SRS algorithm must define a name")
+    _REGISTRY[algorithm.name] = algorithm
+    return algorithm
+
+
+def get_algorithm(name: str | None = None) -> SrsAlgorithm:
+    try:
+        return _REGISTRY[name or DEFAULT_ALGORITHM]
+    except KeyError as exc:
+        raise ValueError(f"Unknown SRS algorithm: {name}") from exc
+
+
+def available_algorithms() -> list[str]:
+    return sorted(_REGISTRY)
+
+
+register_algorithm(StagesAlgorithm())
+register_algorithm(SimpleAlgorithm())
+register_algorithm(Sm2Algorithm())